@@ -1,22 +1,223 @@
+import asyncio
 import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Callable, Generator, Optional, TypeVar
+
+from fastapi import HTTPException
 
 DATABASE_PATH = os.getenv("DATABASE_PATH", "app.db")
 
+# Pool sizing and per-connection PRAGMAs. All of them can be tuned per deployment.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+# Threads serving `run_in_db`; one per pooled connection by default
+DB_EXECUTOR_THREADS = int(os.getenv("DB_EXECUTOR_THREADS", str(DB_POOL_SIZE)))
+# Group commit: how long the writer keeps a transaction open for more mutations,
+# and the most mutations it commits at once
+DB_WRITE_WINDOW_MS = float(os.getenv("DB_WRITE_WINDOW_MS", "2"))
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "256"))
+
+T = TypeVar("T")
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time."""
 
-def get_connection() -> sqlite3.Connection:
-    """Create a new database connection."""
-    conn = sqlite3.connect(DATABASE_PATH)
+
+def get_connection(database_path: Optional[str] = None) -> sqlite3.Connection:
+    """Create a new, fully configured database connection."""
+    conn = sqlite3.connect(
+        database_path or DATABASE_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # Pooled connections move between threadpool workers
+    )
     conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+    conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = {-DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by the threadpool.
+    Connections are opened lazily up to `max_size` and configured once.
+    """
+
+    def __init__(self, database_path: str, max_size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.database_path = database_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._in_use = 0
+        self._closed = False
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening a new one while under `max_size`."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            self._checkouts += 1
+            open_new = self._idle.empty() and self._opened < self.max_size
+            if open_new:
+                self._opened += 1
+            self._in_use += 1
+
+        if open_new:
+            try:
+                return get_connection(self.database_path)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                    self._in_use -= 1
+                raise
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._waits += 1
+                self._timeouts += 1
+                self._in_use -= 1
+                self._wait_time += time.perf_counter() - started
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        with self._lock:
+            self._waits += 1
+            self._wait_time += time.perf_counter() - started
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding it if it is unusable."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            self._in_use -= 1
+            if self._closed:
+                self._opened -= 1
+                conn.close()
+                return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._opened -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Open idle connections up to `count` (default `max_size`); returns how many were opened."""
+        target = self.max_size if count is None else min(count, self.max_size)
+        opened = 0
+        while True:
+            with self._lock:
+                if self._closed or self._opened >= target:
+                    return opened
+                self._opened += 1
+            try:
+                conn = get_connection(self.database_path)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+            self._idle.put(conn)
+            opened += 1
+
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Check out a connection for the duration of a `with` block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close idle connections; busy ones are closed when released."""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+                conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "database_path": self.database_path,
+                "max_size": self.max_size,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_ms": round(self._wait_time * 1000, 3),
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_PATH)
+    return _pool
+
+
+def close_pool() -> None:
+    """Close the process-wide pool; the next `get_pool()` starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 @contextmanager
-def get_db() -> Generator[sqlite3.Connection, None, None]:
-    """Context manager for database connections."""
-    conn = get_connection()
+def db_session() -> Generator[sqlite3.Connection, None, None]:
+    """Context manager for a pooled connection wrapped in a transaction."""
+    pool = get_pool()
+    conn = pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -24,4 +225,243 @@ def get_db() -> Generator[sqlite3.Connection, None, None]:
         conn.rollback()
         raise
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+class DatabaseExecutor:
+    """
+    Dedicated threads for database work awaited from `async def` handlers.
+
+    With one thread per pooled connection a task never blocks waiting for a
+    connection. Requests beyond that wait as futures on the event loop instead
+    of holding a threadpool thread each, so one worker can keep thousands of
+    requests in flight.
+    """
+
+    def __init__(self, threads: int = DB_EXECUTOR_THREADS):
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(conn, *args, **kwargs)` in a pooled transaction off the event loop."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="db")
+            executor = self._executor
+            self._queued += 1
+            future = executor.submit(self._call, fn, *args, **kwargs)
+        future.add_done_callback(self._forget_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads": self.threads,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        succeeded = False
+        try:
+            with db_session() as conn:
+                result = fn(conn, *args, **kwargs)
+            succeeded = True
+            return result
+        except PoolTimeout as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        finally:
+            with self._lock:
+                self._running -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def _forget_cancelled(self, future) -> None:
+        # A request that went away before its task started never reaches _call
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+
+db_executor = DatabaseExecutor()
+
+
+async def run_in_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Await `fn(conn, *args, **kwargs)` on the database executor.
+    The call runs inside `db_session()`: it commits on success and rolls back if `fn` raises.
+    """
+    return await db_executor.run(fn, *args, **kwargs)
+
+
+class WriteQueue:
+    """
+    Single writer thread that commits mutations from many requests together.
+
+    The first queued mutation opens a transaction. Under concurrent load,
+    mutations arriving within `window` seconds (up to `max_batch`) join it, and
+    one COMMIT covers them all. Each mutation runs in its own SAVEPOINT, so one that raises is rolled
+    back alone and its caller gets the exception while the rest still commit.
+    Callers are resolved only after the COMMIT succeeds. The writer owns a
+    dedicated connection, so writes never compete for the lock with each
+    other and never take a pooled connection from readers.
+    """
+
+    _STOP = object()
+
+    def __init__(self, window: float = DB_WRITE_WINDOW_MS / 1000, max_batch: int = DB_WRITE_BATCH_SIZE,
+                 database_path: Optional[str] = None):
+        self.window = window
+        self.max_batch = max_batch
+        self.database_path = database_path
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.mutations = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self._commit_time = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Await `fn(conn, *args, **kwargs)` as one mutation of the next group commit."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        future: "Future[T]" = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Commit what is queued, then stop the writer; the next submit starts a new one."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(self._STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "mutations": self.mutations,
+                "failed": self.failed,
+                "largest_batch": self.largest_batch,
+                "avg_batch": round(self.mutations / self.batches, 2) if self.batches else None,
+                "avg_commit_ms": round(self._commit_time / self.batches * 1000, 3) if self.batches else None,
+            }
+
+    def _run(self) -> None:
+        conn = get_connection(self.database_path)
+        conn.isolation_level = None  # Transactions are managed explicitly below
+        try:
+            while True:
+                batch, stop = self._collect()
+                if batch:
+                    self._commit(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _collect(self):
+        """
+        Block for one mutation and take whatever else is already queued. Only when
+        others are queued too (that is, under concurrent load) keep the batch open
+        for the rest of the window, so a lone write never waits for company.
+        """
+        first = self._queue.get()
+        if first is self._STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                if len(batch) == 1:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _commit(self, conn: sqlite3.Connection, batch: list) -> None:
+        started = time.perf_counter()
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue  # The caller went away before its turn
+                conn.execute("SAVEPOINT mutation")
+                try:
+                    outcomes.append((future, fn(conn, *args, **kwargs), None))
+                    conn.execute("RELEASE mutation")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO mutation")
+                    conn.execute("RELEASE mutation")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT failed (e.g. busy past the timeout): nothing in the batch was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            outcomes = [
+                (future, None, e) for future, _, _, _ in batch
+                if future.running() or future.set_running_or_notify_cancel()
+            ]
+
+        failed = 0
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(error)
+        with self._lock:
+            self.batches += 1
+            self.mutations += len(batch)
+            self.failed += failed
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self._commit_time += time.perf_counter() - started
+
+
+write_queue = WriteQueue()
+
+
+async def run_write(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Await `fn(conn, *args, **kwargs)` on the group-commit writer.
+    Returns once the transaction holding the mutation has committed; if `fn`
+    raises, only its own changes are rolled back.
+    """
+    return await write_queue.run(fn, *args, **kwargs)
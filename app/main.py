@@ -1,11 +1,57 @@
+import logging
+import sqlite3
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from app.database import close_pool, db_executor, db_session, get_pool, write_queue
 from app.rate_limiter import limiter
-from app.routes import health_router, items_router, invoices_router
+from app.routes import health_router, items_router, invoices_router, jobs_router, reports_router
+from app.services.background_lease import background_lease
+from app.services.catalog import catalog
+from app.services.email_service import get_transport
+from app.services.invoice_numbers import invoice_numbers
+from app.services.outbox import outbox_workers
+from app.services.overdue import overdue_sweeper
+from app.services.pdf_renderer import pdf_renderer
+
+logger = logging.getLogger(__name__)
+
+
+def _start_background_loops():
+    outbox_workers.start()
+    overdue_sweeper.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Preload seed data so request paths do not query clients/products, and open
+    # the pooled connections so the first burst of requests does not pay for them
+    try:
+        with db_session() as conn:
+            catalog.load(conn)
+        get_pool().warm()
+    except sqlite3.Error as e:
+        logger.warning("Catalog preload skipped: %s", e)
+    pdf_renderer.start()
+    # Only one worker process runs the outbox and the sweeper
+    background_lease.start(_start_background_loops)
+    yield
+    background_lease.stop()
+    overdue_sweeper.stop()
+    outbox_workers.stop()
+    background_lease.release()
+    get_transport().close()
+    pdf_renderer.shutdown()
+    write_queue.shutdown()
+    db_executor.shutdown()
+    invoice_numbers.close()
+    close_pool()
+
 
-app = FastAPI(title="Backend Exercise API", version="1.0.0")
+app = FastAPI(title="Backend Exercise API", version="1.0.0", lifespan=lifespan)
 
 # Register Rate Limiter Exception Handler
 app.state.limiter = limiter
@@ -15,6 +61,8 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.include_router(health_router)
 app.include_router(items_router)
 app.include_router(invoices_router)
+app.include_router(jobs_router)
+app.include_router(reports_router)
 
 
 if __name__ == "__main__":
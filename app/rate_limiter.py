@@ -1,5 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.database import DATABASE_PATH
+
+# Counters live in their own SQLite file so every worker process shares them
+# without contending with invoice writes. memory:// keeps per-process counters.
+RATE_LIMIT_STORAGE_URI = os.getenv(
+    "RATE_LIMIT_STORAGE_URI", f"sqlite://{os.path.splitext(DATABASE_PATH)[0]}-ratelimit.db"
+)
+# Load tests and benchmarks turn the limits off; they are on unless disabled
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Expired windows are deleted once every this many increments per process
+RATE_LIMIT_PRUNE_EVERY = int(os.getenv("RATE_LIMIT_PRUNE_EVERY", "1000"))
+
+
+class SQLiteStorage(Storage):
+    """
+    `limits` storage backed by a SQLite file in WAL mode, selected with
+    ``sqlite://<path>`` (``sqlite:///abs/path.db`` for an absolute path).
+
+    Each fixed window is one row; a hit is a single upsert that restarts an
+    expired window or adds to the current one and returns the new count, so
+    concurrent workers cannot both slip under a limit.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str = "sqlite://ratelimit.db", wrap_exceptions: bool = False,
+                 prune_every: int = RATE_LIMIT_PRUNE_EVERY, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len("sqlite://"):]
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.increments = 0
+        self.incr_seconds = 0.0
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    expiry REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        started = time.perf_counter()
+        now = time.time()
+        count = self._connection().execute("""
+            INSERT INTO rate_limits (key, count, expiry) VALUES (:key, :amount, :now + :expiry)
+            ON CONFLICT (key) DO UPDATE SET
+                count = CASE WHEN expiry <= :now THEN excluded.count ELSE count + excluded.count END,
+                expiry = CASE WHEN expiry <= :now THEN excluded.expiry ELSE expiry END
+            RETURNING count
+        """, {"key": key, "amount": amount, "now": now, "expiry": expiry}).fetchone()[0]
+
+        with self._lock:
+            self.increments += 1
+            self.incr_seconds += time.perf_counter() - started
+            prune = self.prune_every > 0 and self.increments % self.prune_every == 0
+        if prune:
+            self._connection().execute("DELETE FROM rate_limits WHERE expiry <= ?", (now,))
+        return count
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection().execute(
+            "SELECT expiry FROM rate_limits WHERE key = ? AND expiry > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "storage": self.path,
+                "increments": self.increments,
+                "avg_incr_us": round(self.incr_seconds / self.increments * 1e6, 1) if self.increments else None,
+            }
+
+    def _connection(self) -> sqlite3.Connection:
+        # One autocommit connection per thread and process; each statement is
+        # its own transaction
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=5.0)
+            self._enable_wal(conn)
+            # Counters can lose the last few hits on power loss; that is fine
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _enable_wal(conn: sqlite3.Connection, attempts: int = 50) -> None:
+        # Workers that open a new counter file at the same moment race to switch
+        # it to WAL; the losers see "database is locked" and simply try again
+        for attempt in range(attempts):
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(0.01)
+
+
 # Initialize Limiter
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE_URI, enabled=RATE_LIMIT_ENABLED)
+# The storage instance built from RATE_LIMIT_STORAGE_URI, taken once through the
+# public strategy API (no in-memory fallback is configured, so this is it)
+rate_limit_storage: Storage = limiter.limiter.storage
+
+
+def rate_limit_stats() -> dict:
+    storage = rate_limit_storage
+    stats = storage.stats() if isinstance(storage, SQLiteStorage) else {"storage": RATE_LIMIT_STORAGE_URI}
+    return {"enabled": limiter.enabled, **stats}
@@ -1,5 +1,7 @@
 from app.routes.health import router as health_router
 from app.routes.items import router as items_router
 from app.routes.invoices import router as invoices_router
+from app.routes.jobs import router as jobs_router
+from app.routes.reports import router as reports_router
 
-__all__ = ["health_router", "items_router", "invoices_router"]
+__all__ = ["health_router", "items_router", "invoices_router", "jobs_router", "reports_router"]
@@ -1,5 +1,16 @@
 from fastapi import APIRouter
 
+from app.database import db_executor, get_pool, write_queue
+from app.rate_limiter import rate_limit_stats
+from app.services.background_lease import background_lease
+from app.services.catalog import catalog
+from app.services.email_service import get_transport
+from app.services.invoice_numbers import invoice_numbers
+from app.services.outbox import outbox_workers
+from app.services.overdue import overdue_sweeper
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_renderer import pdf_renderer
+
 router = APIRouter()
 
 
@@ -7,3 +18,22 @@ router = APIRouter()
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/health/stats")
+def health_stats():
+    """Runtime counters for the connection pool and caches."""
+    return {
+        "db_pool": get_pool().stats(),
+        "db_executor": db_executor.stats(),
+        "db_writer": write_queue.stats(),
+        "invoice_numbers": invoice_numbers.stats(),
+        "catalog": catalog.stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_render": pdf_renderer.stats(),
+        "outbox": outbox_workers.stats(),
+        "overdue_sweeper": overdue_sweeper.stats(),
+        "background_lease": background_lease.stats(),
+        "email": get_transport().stats(),
+        "rate_limit": rate_limit_stats(),
+    }
@@ -1,187 +1,201 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends, Request
-from fastapi.responses import StreamingResponse
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Literal, Optional, Union
 from datetime import date
+import asyncio
+import base64
+import binascii
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
 import time
-import io
 import math
-import sqlite3
-from app.database import get_db
-from app.schemas import InvoiceCreate, InvoiceResponse, PaginatedInvoiceResponse, InvoiceStatusUpdate, ClientResponse, ProductResponse, InvoiceItemResponse
-from app.services.pdf_generator import generate_invoice_pdf
-from app.services.email_service import send_invoice_email
+from app.database import db_session, run_in_db, run_write, write_queue
+from app.schemas import InvoiceCreate, InvoiceResponse, InvoiceSummaryResponse, PaginatedInvoiceResponse, PaginatedInvoiceSummaryResponse, InvoiceStatusUpdate, ClientResponse, ProductResponse, InvoiceItemResponse, InvoiceBatchCreate, InvoiceBatchResponse, SendInvoiceResponse
+from app.services.catalog import catalog
+from app.services.invoice_numbers import invoice_numbers, reserve_in
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_generator import PDF_TEMPLATE_VERSION
+from app.services.pdf_renderer import pdf_renderer, RenderQueueFull, RenderTimeout
+from app.services.email_service import OutgoingEmail, send_many
+from app.services import export, outbox, search_index
+from app.services.outbox import outbox_workers
 from app.rate_limiter import limiter
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+# How long an approximate total stays valid in cursor mode (seconds)
+INVOICE_COUNT_CACHE_TTL = float(os.getenv("INVOICE_COUNT_CACHE_TTL", "30"))
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
 @router.post("", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("10/minute")
-def create_invoice(request: Request, invoice_data: InvoiceCreate, conn: sqlite3.Connection = Depends(get_db)):
+async def create_invoice(request: Request, invoice_data: InvoiceCreate):
     try:
-        cursor = conn.cursor()
-
-        # 1. Validate Client
-        cursor.execute("SELECT * FROM clients WHERE id = ?", (invoice_data.client_id,))
-        client = cursor.fetchone()
-        if not client:
-            raise HTTPException(status_code=404, detail="Client not found")
-        
-        # 2. Validate Products and Calculate Total
-        total_amount = 0.0
-        invoice_items_data = []
-
-        for item in invoice_data.items:
-            cursor.execute("SELECT * FROM products WHERE id = ?", (item.product_id,))
-            product = cursor.fetchone()
-            if not product:
-                raise HTTPException(status_code=404, detail=f"Product with ID {item.product_id} not found")
-            
-            line_total = product['price'] * item.quantity
-            total_amount += line_total
-            invoice_items_data.append({
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "price": product['price'],
-                "line_total": line_total
-            })
-
-        # 3. Calculate Final Total
-        tax = invoice_data.tax_amount if invoice_data.tax_amount is not None else 0.0
-        final_total = total_amount + tax
-
-        # 4. Create Invoice Record
-        import uuid
-        invoice_no = f"INV-{uuid.uuid4().hex[:8].upper()}"
-        address_snapshot = client['address']
-
-        cursor.execute("""
-            INSERT INTO invoices (invoice_no, issue_date, due_date, client_id, address, tax, total, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            invoice_no,
-            invoice_data.issue_date.isoformat(),
-            invoice_data.due_date.isoformat(),
-            invoice_data.client_id,
-            address_snapshot,
-            tax,
-            final_total,
-            'DRAFT' # Default status
-        ))
-        invoice_id = cursor.lastrowid
-
-        # 5. Create Invoice Items
-        for item in invoice_data.items:
-            cursor.execute("""
-                INSERT INTO invoice_items (invoice_id, product_id, quantity)
-                VALUES (?, ?, ?)
-            """, (invoice_id, item.product_id, item.quantity))
-        
-        return _get_invoice_internal(conn, invoice_id)
+        invoice_nos = await _allocate_invoice_numbers([invoice_data])
+        invoice = await _write_numbered(_create_invoice, invoice_data, invoice_nos)
+        return _invoice_json(invoice, status_code=status.HTTP_201_CREATED)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@router.post("/batch", response_model=InvoiceBatchResponse)
+@limiter.limit("10/minute")
+async def create_invoices_batch(request: Request, batch: InvoiceBatchCreate):
+    """
+    Create many invoices in a single transaction.
+    Entries that reference unknown clients or products are reported and skipped.
+    """
+    try:
+        invoice_nos = await _allocate_invoice_numbers(batch.invoices)
+        results = await _write_numbered(
+            _insert_invoices, batch.invoices, invoice_nos,
+            used=lambda results: {result["invoice_no"] for result in results if "invoice_no" in result}
+        )
+        failed = sum(1 for result in results if result.get("error"))
+        return InvoiceBatchResponse(
+            created=len(results) - failed,
+            failed=failed,
+            results=results
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@router.get("", response_model=PaginatedInvoiceResponse)
+@router.get("", response_model=Union[PaginatedInvoiceResponse, PaginatedInvoiceSummaryResponse])
 @limiter.limit("100/minute")
-def list_invoices(
+async def list_invoices(
     request: Request,
     client_id: Optional[int] = None,
     status: Optional[str] = None,
     date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    conn: sqlite3.Connection = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous next_cursor; switches to keyset pagination"),
+    with_total: bool = Query(True, description="Set to false to skip counting matching invoices"),
+    fields: Optional[str] = Query(None, description="Comma-separated invoice fields to return, e.g. invoice_no,client,total,status"),
+    include: Optional[str] = Query(None, description="Comma-separated relations to embed: items, client")
 ):
+    """
+    Without `fields` or `include` every invoice is returned in full. With either one,
+    invoices use the sparse InvoiceSummaryResponse shape: `id` plus the requested
+    fields. The items query is only run when items are requested.
+    """
     try:
-        cursor = conn.cursor()
-        
-        # Build Query
-        query = "SELECT * FROM invoices"
-        count_query = "SELECT COUNT(*) FROM invoices"
-        params = []
-        conditions = []
-        
-        if client_id:
-            conditions.append("client_id = ?")
-            params.append(client_id)
-        if status:
-            conditions.append("status = ?")
-            params.append(status)
-        if date_from:
-            conditions.append("issue_date >= ?")
-            params.append(date_from.isoformat())
-        
-        if conditions:
-            where_clause = " WHERE " + " AND ".join(conditions)
-            query += where_clause
-            count_query += where_clause
-        
-        # Count total
-        cursor.execute(count_query, params)
-        total_items = cursor.fetchone()[0]
-        
-        # Pagination
-        offset = (page - 1) * page_size
-        query += " LIMIT ? OFFSET ?"
-        params.extend([page_size, offset])
-        
-        # Execute Main Query
-        cursor.execute(query, params)
-        invoices = cursor.fetchall()
-        
-        results = []
-        for invoice in invoices:
-            results.append(_get_invoice_internal(conn, invoice['id']))
-        
-        total_pages = math.ceil(total_items / page_size) if page_size > 0 else 0
-        
-        return PaginatedInvoiceResponse(
-            items=results,
-            total=total_items,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
-            
+        projection = _parse_projection(fields, include)
+        return _invoice_json(await run_in_db(
+            _list_invoices, client_id, status, date_from, date_to, page, page_size, cursor, with_total, projection
+        ))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@router.get("/search", response_model=PaginatedInvoiceResponse)
+@limiter.limit("100/minute")
+async def search_invoices(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words or fragments of the invoice number, client name or product names"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100),
+    sort: Literal["relevance", "newest"] = Query("relevance", description="newest skips ranking; fastest for broad terms"),
+    with_total: bool = Query(True, description="Set to false to skip counting every match")
+):
+    """
+    Full-text search, best matches first. Every term must occur in the invoice
+    number, client name or a product name; terms match anywhere inside words but
+    need at least 3 characters.
+    """
+    try:
+        match = _fts_query(q)
+        return _invoice_json(await run_in_db(_search_invoices, match, page, page_size, sort, with_total))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@router.get("/export")
+@limiter.limit("5/minute")
+def export_invoices(
+    request: Request,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """
+    Stream every matching invoice as NDJSON (one invoice with its items per line)
+    or CSV (one row per line item). Rows are read in keyset chunks, so memory use
+    does not depend on the size of the export.
+    """
+    conditions, params = _invoice_filters(client_id, status, date_from, date_to)
+    if export_format == "csv":
+        body, media_type = export.stream_csv(conditions, params, _hydrate_invoices), "text/csv"
+    else:
+        body, media_type = export.stream_ndjson(conditions, params, _hydrate_invoices), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=invoices.{export_format}"}
+    )
+
+@router.get("/export/pdf.zip")
+@limiter.limit("5/minute")
+async def export_invoice_pdfs(
+    request: Request,
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """
+    Stream a ZIP archive with the PDF of every matching invoice.
+    PDFs are rendered in parallel and written to the archive as they finish, in order.
+    """
+    conditions, params = _invoice_filters(client_id, status, date_from, date_to)
+    return StreamingResponse(
+        export.stream_pdf_zip(conditions, params, _hydrate_invoices),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=invoices.zip"}
+    )
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
-def get_invoice(invoice_id: int, conn: sqlite3.Connection = Depends(get_db)):
+async def get_invoice(request: Request, invoice_id: int):
+    """
+    Supports conditional requests: a matching If-None-Match is answered with 304
+    from the invoice row alone, without hydrating the invoice.
+    """
     try:
-        return _get_invoice_internal(conn, invoice_id)
+        validators, invoice = await run_in_db(_get_invoice_conditional, invoice_id, request.headers)
+        if invoice is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+        return _invoice_json(invoice, headers=validators)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.delete("/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_invoice(invoice_id: int, conn: sqlite3.Connection = Depends(get_db)):
+async def delete_invoice(invoice_id: int):
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM invoices WHERE id = ?", (invoice_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Invoice not found")
-
-        cursor.execute("DELETE FROM invoice_items WHERE invoice_id = ?", (invoice_id,))
-        cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+        await run_write(_delete_invoice, invoice_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.patch("/{invoice_id}/status", response_model=InvoiceResponse)
-def update_invoice_status(invoice_id: int, status_update: InvoiceStatusUpdate, conn: sqlite3.Connection = Depends(get_db)):
+async def update_invoice_status(invoice_id: int, status_update: InvoiceStatusUpdate):
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM invoices WHERE id = ?", (invoice_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Invoice not found")
-        
-        cursor.execute("UPDATE invoices SET status = ? WHERE id = ?", (status_update.status, invoice_id))
-        return _get_invoice_internal(conn, invoice_id)
+        return _invoice_json(await run_write(_update_invoice_status, invoice_id, status_update.status))
     except HTTPException:
         raise
     except Exception as e:
@@ -189,100 +203,554 @@ def update_invoice_status(invoice_id: int, status_update: InvoiceStatusUpdate, c
 
 @router.get("/{invoice_id}/pdf")
 @limiter.limit("5/minute")
-def get_invoice_pdf(request: Request, invoice_id: int, conn: sqlite3.Connection = Depends(get_db)):
+async def get_invoice_pdf(request: Request, invoice_id: int):
     try:
-        invoice_data = _get_invoice_internal_dict(conn, invoice_id)
-        pdf_bytes = generate_invoice_pdf(invoice_data)
-        
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes), 
+        validators, invoice_data = await run_in_db(_get_invoice_conditional, invoice_id, request.headers, PDF_ETAG_PREFIX)
+        if invoice_data is None:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+        pdf_bytes = await pdf_cache.aget_or_render(invoice_data, pdf_renderer.render)
+
+        return Response(
+            pdf_bytes,
             media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=invoice_{invoice_data['invoice_no']}.pdf"}
+            headers={
+                "Content-Disposition": f"attachment; filename=invoice_{invoice_data['invoice_no']}.pdf",
+                **validators
+            }
         )
     except HTTPException:
         raise
+    except (RenderQueueFull, RenderTimeout) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
 
-@router.post("/{invoice_id}/send")
+@router.post("/{invoice_id}/send", response_model=SendInvoiceResponse, status_code=status.HTTP_202_ACCEPTED)
 @limiter.limit("5/minute")
-def send_invoice(request: Request, invoice_id: int, conn: sqlite3.Connection = Depends(get_db)):
+async def send_invoice(request: Request, invoice_id: int):
+    """
+    Mark the invoice as SENT and queue the email in the same transaction.
+    Rendering and delivery happen in the outbox workers; poll GET /jobs/{job_id}.
+    """
     try:
-        cursor = conn.cursor()
-        invoice_data = _get_invoice_internal_dict(conn, invoice_id)
-        
-        # Generate PDF
-        pdf_bytes = generate_invoice_pdf(invoice_data)
-        
-        # Send Email (Mock)
-        to_email = "client@example.com" 
-        subject = f"Invoice {invoice_data['invoice_no']} from xAI Tutor"
-        body = f"Dear {invoice_data['client']['name']},\n\nPlease find attached your invoice.\n\nTotal: ${invoice_data['total']:.2f}"
-        
-        send_invoice_email(to_email, subject, body, pdf_bytes)
-        
-        # Update Status to SENT
-        cursor.execute("UPDATE invoices SET status = 'SENT' WHERE id = ?", (invoice_id,))
-        
-        return {"message": "Invoice sent successfully", "status": "SENT"}
+        job_id = await run_write(_mark_sent_and_enqueue, invoice_id)
+        # The job is committed by now, so workers can pick it up
+        outbox_workers.notify()
+
+        return SendInvoiceResponse(message="Invoice queued for sending", status="SENT", job_id=job_id, job_status="PENDING")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending invoice: {str(e)}")
 
+def _invoice_json(payload, status_code=status.HTTP_200_OK, headers=None):
+    """
+    Serialize invoice payloads in one pass with orjson.
+
+    `_hydrate_invoices` already produces exactly the shape of `InvoiceResponse`
+    (same keys, order and JSON types) from trusted database rows, so returning a
+    response directly skips re-validating it against `response_model`. The
+    decorators keep `response_model` for the OpenAPI schema.
+    """
+    return ORJSONResponse(payload, status_code=status_code, headers=headers)
+
+async def _allocate_invoice_numbers(invoices):
+    # Numbers come from this process's reserved block; reserving a new block
+    # commits on the allocator's own connection, before the write transaction
+    years = [invoice.issue_date.year for invoice in invoices]
+    invoice_nos = invoice_numbers.take(years)
+    if invoice_nos is None:
+        invoice_nos = await asyncio.to_thread(invoice_numbers.allocate, years)
+    return invoice_nos
+
+async def _write_numbered(fn, payload, invoice_nos, used=None):
+    """
+    Run `fn(conn, payload, invoice_nos)` on the group-commit writer, then give back
+    the numbers it did not use. That is decided by the writer's own future rather
+    than by this await: a request cancelled while its mutation runs must not hand
+    out numbers that are about to be committed.
+    """
+    future = write_queue.submit(fn, payload, invoice_nos)
+    future.add_done_callback(functools.partial(_release_unused_numbers, invoice_nos, used))
+    return await asyncio.wrap_future(future)
+
+def _release_unused_numbers(invoice_nos, used, future):
+    if future.cancelled():
+        unused = invoice_nos  # Dropped before the writer reached it; nothing was written
+    elif future.exception() is not None:
+        error = future.exception()
+        if isinstance(error, sqlite3.IntegrityError) and "invoice_no" in str(error):
+            return  # The number exists already; handing it out again would fail the same way
+        unused = invoice_nos  # The writer rolled the mutation back
+    else:
+        taken = used(future.result()) if used else set(invoice_nos)
+        unused = [invoice_no for invoice_no in invoice_nos if invoice_no not in taken]
+    if unused:
+        invoice_numbers.release(unused)
+
+# Route bodies below run on the database executor (see app.database.run_in_db);
+# mutations run on the group-commit writer (app.database.run_write)
+
+def _create_invoice(conn, invoice_data, invoice_nos=None):
+    result = _insert_invoices(conn, [invoice_data], invoice_nos)[0]
+    if result.get("error"):
+        raise HTTPException(status_code=404, detail=result["error"])
+    return _get_invoice_internal_dict(conn, result["id"])
+
+def _list_invoices(conn, client_id, status, date_from, date_to, page, page_size, cursor, with_total, projection=None):
+    db_cursor = conn.cursor()
+    conditions, params = _invoice_filters(client_id, status, date_from, date_to)
+    count_conditions, count_params = list(conditions), list(params)
+
+    # Keyset mode seeks past the last (issue_date, id) seen instead of skipping rows
+    if cursor is not None:
+        conditions.append("(issue_date, id) > (?, ?)")
+        params.extend(_decode_cursor(cursor))
+
+    query = "SELECT * FROM invoices"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY issue_date, id LIMIT ?"
+    params.append(page_size + 1)  # One extra row tells us whether there is a next page
+    if cursor is None:
+        query += " OFFSET ?"
+        params.append((page - 1) * page_size)
+
+    db_cursor.execute(query, params)
+    invoices = db_cursor.fetchall()
+    next_cursor = None
+    if len(invoices) > page_size:
+        invoices = invoices[:page_size]
+        next_cursor = _encode_cursor(invoices[-1])
+
+    # Page mode keeps the exact count; cursor mode serves a cached approximation
+    total_items = None
+    if with_total:
+        if cursor is None:
+            total_items = _count_invoices(conn, count_conditions, count_params)
+        else:
+            total_items = _approximate_invoice_count(conn, count_conditions, count_params)
+
+    if projection is None:
+        results = _hydrate_invoices(conn, invoices)
+    else:
+        results = _project_invoices(conn, invoices, projection)
+
+    total_pages = math.ceil(total_items / page_size) if total_items is not None else None
+
+    # Same keys and order as PaginatedInvoiceResponse (see _invoice_json)
+    return {
+        "items": results,
+        "total": total_items,
+        "page": page if cursor is None else None,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor
+    }
+
+def _search_invoices(conn, match, page, page_size, sort="relevance", with_total=True):
+    # Ranking scores every match; newest-first walks the index in rowid order and
+    # stops at the page
+    order = SEARCH_ORDER[sort]
+    rows = conn.execute(f"""
+        SELECT invoices.* FROM invoice_search
+        JOIN invoices ON invoices.id = invoice_search.rowid
+        WHERE invoice_search MATCH ?
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    """, (match, page_size, (page - 1) * page_size)).fetchall()
+
+    total_items = None
+    if with_total:
+        total_items = conn.execute(
+            "SELECT COUNT(*) FROM invoice_search WHERE invoice_search MATCH ?", (match,)
+        ).fetchone()[0]
+
+    return {
+        "items": _hydrate_invoices(conn, rows),
+        "total": total_items,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": math.ceil(total_items / page_size) if total_items is not None else None,
+        "next_cursor": None  # Ranked results are paged by page number only
+    }
+
+def _delete_invoice(conn, invoice_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM invoices WHERE id = ?", (invoice_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    # The invoice goes first (its items cascade), so the item delete triggers can
+    # tell that there is no search row left to recompute
+    cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+    cursor.execute("DELETE FROM invoice_items WHERE invoice_id = ?", (invoice_id,))
+
+def _update_invoice_status(conn, invoice_id, new_status):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM invoices WHERE id = ?", (invoice_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    cursor.execute("UPDATE invoices SET status = ? WHERE id = ?", (new_status, invoice_id))
+    return _get_invoice_internal_dict(conn, invoice_id)
+
+def _mark_sent_and_enqueue(conn, invoice_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM invoices WHERE id = ?", (invoice_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    # Update Status to SENT
+    cursor.execute("UPDATE invoices SET status = 'SENT' WHERE id = ?", (invoice_id,))
+    return outbox.enqueue(conn, SEND_INVOICE_JOB, invoice_id, {"to_email": "client@example.com"})
+
+
+SEND_INVOICE_JOB = "send_invoice"
+
+def _process_send_jobs(jobs):
+    # Outbox handler: render (or reuse) each PDF and email it
+    invoice_ids = list({job['invoice_id'] for job in jobs})
+    with db_session() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM invoices WHERE id IN ({_placeholders(invoice_ids)})", invoice_ids
+        ).fetchall()
+        invoices = {invoice['id']: invoice for invoice in _hydrate_invoices(conn, rows)}
+
+    errors = {}
+    emails = {}
+    for job in jobs:
+        invoice_data = invoices.get(job['invoice_id'])
+        if invoice_data is None:
+            errors[job['id']] = outbox.PermanentJobError("Invoice not found")
+            continue
+        try:
+            pdf_bytes = pdf_cache.get_or_render(invoice_data, pdf_renderer.render_sync)
+        except Exception as e:
+            errors[job['id']] = e
+            continue
+        emails[job['id']] = OutgoingEmail(
+            to_email=json.loads(job['payload'])["to_email"],
+            subject=f"Invoice {invoice_data['invoice_no']} from xAI Tutor",
+            body=f"Dear {invoice_data['client']['name']},\n\nPlease find attached your invoice.\n\nTotal: ${invoice_data['total']:.2f}",
+            attachment_bytes=pdf_bytes,
+            attachment_name=f"invoice_{invoice_data['invoice_no']}.pdf"
+        )
+
+    # One send_many call per batch so the transport can reuse its connections
+    for job_id, result in zip(emails, send_many(list(emails.values()))):
+        if not result.ok:
+            errors[job_id] = RuntimeError(result.error or "Email delivery failed")
+    return errors
+
+outbox_workers.register(SEND_INVOICE_JOB, _process_send_jobs)
 
-def _get_invoice_internal(conn, invoice_id):
-    # This returns Pydantic model
-    data = _get_invoice_internal_dict(conn, invoice_id)
-    return InvoiceResponse(**data)
 
 def _get_invoice_internal_dict(conn, invoice_id):
     # Helper to get dictionary data for both API response and PDF generation
+    return _hydrate_invoice_dict(conn, _fetch_invoice_row(conn, invoice_id))
+
+def _fetch_invoice_row(conn, invoice_id):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM invoices WHERE id = ?", (invoice_id,))
     invoice = cursor.fetchone()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+def _hydrate_invoice_dict(conn, invoice):
+    return _hydrate_invoices(conn, [invoice])[0]
+
+# Bump PDF_TEMPLATE_VERSION (part of the PDF ETag) whenever the layout changes
+INVOICE_ETAG_PREFIX = "inv"
+PDF_ETAG_PREFIX = f"pdf{PDF_TEMPLATE_VERSION}"
+
+def _get_invoice_conditional(conn, invoice_id, headers, etag_prefix=INVOICE_ETAG_PREFIX, hydrate=_hydrate_invoice_dict):
+    """
+    Return (validator headers, hydrated invoice), or (validator headers, None) when
+    the client's copy is still current. The ETag combines the invoice's version
+    (bumped by triggers on every change) with the catalog generation, since the
+    response embeds client and product details.
+    """
+    invoice = _fetch_invoice_row(conn, invoice_id)
+    etag = f'"{etag_prefix}-{invoice_id}-{invoice["version"]}-{catalog.generation(conn) or 0}"'
+    validators = {"ETag": etag}
+    if _is_not_modified(headers, etag):
+        return validators, None
+    return validators, hydrate(conn, invoice)
+
+def _is_not_modified(headers, etag):
+    # Only the ETag is a validator: the body also changes with the catalog and the
+    # PDF template, which no modification time would follow, so Last-Modified
+    # and If-Modified-Since are not used
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+# Upper bound on bound parameters per IN (...) query
+_IN_CHUNK_SIZE = 500
+
+def _insert_invoices(conn, invoices, invoice_nos=None):
+    """
+    Validate and insert invoices with set-based lookups and executemany.
+    `invoice_nos` gives the number for each input (from the block allocator);
+    without it numbers are taken from the sequence table in `conn`'s transaction.
+    Returns one result dict per input, in order: {"index", "id", "invoice_no"} on
+    success or {"index", "error"} when a client or product does not exist.
+    """
+    # Prices are stored with the items, so check the catalog generation inside
+    # this transaction rather than trusting a snapshot up to a second old
+    clients = catalog.get_clients(conn, {invoice.client_id for invoice in invoices}, fresh=True)
+    products = catalog.get_products(
+        conn, {item.product_id for invoice in invoices for item in invoice.items}, fresh=True
+    )
+
+    results = []
+    valid = []
+    for index, invoice_data in enumerate(invoices):
+        client = clients.get(invoice_data.client_id)
+        if not client:
+            results.append({"index": index, "error": "Client not found"})
+            continue
+        missing = next((item.product_id for item in invoice_data.items if item.product_id not in products), None)
+        if missing is not None:
+            results.append({"index": index, "error": f"Product with ID {missing} not found"})
+            continue
+        result = {"index": index}
+        results.append(result)
+        valid.append((result, invoice_data, client))
 
-    cursor.execute("SELECT * FROM clients WHERE id = ?", (invoice['client_id'],))
-    client = cursor.fetchone()
+    if invoice_nos is None:
+        numbers = reserve_in(conn, [invoice_data.issue_date.year for _, invoice_data, _ in valid])
+    else:
+        numbers = [invoice_nos[result["index"]] for result, _, _ in valid]
 
-    cursor.execute("""
-        SELECT ii.*, p.name as product_name, p.price as product_price 
-        FROM invoice_items ii
-        JOIN products p ON ii.product_id = p.id
-        WHERE ii.invoice_id = ?
-    """, (invoice_id,))
+    headers = []
+    pending_items = []
+    for (result, invoice_data, client), invoice_no in zip(valid, numbers):
+        total_amount = sum(products[item.product_id]['price'] * item.quantity for item in invoice_data.items)
+        tax = invoice_data.tax_amount if invoice_data.tax_amount is not None else 0.0
+        headers.append((
+            invoice_no,
+            invoice_data.issue_date.isoformat(),
+            invoice_data.due_date.isoformat(),
+            invoice_data.client_id,
+            client['address'],  # Address snapshot
+            tax,
+            total_amount + tax,
+            'DRAFT'  # Default status
+        ))
+        pending_items.append((invoice_no, invoice_data.items))
+        result["invoice_no"] = invoice_no
+
+    if not headers:
+        return results
+
+    conn.executemany("""
+        INSERT INTO invoices (invoice_no, issue_date, due_date, client_id, address, tax, total, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, headers)
+
+    # Map the generated invoice numbers back to their new ids (UNIQUE index lookup)
+    ids_by_no = {}
+    invoice_nos = [header[0] for header in headers]
+    for start in range(0, len(invoice_nos), _IN_CHUNK_SIZE):
+        chunk = invoice_nos[start:start + _IN_CHUNK_SIZE]
+        cursor = conn.execute(
+            f"SELECT id, invoice_no FROM invoices WHERE invoice_no IN ({_placeholders(chunk)})", chunk
+        )
+        ids_by_no.update((row['invoice_no'], row['id']) for row in cursor.fetchall())
+
+    # Prices are snapshotted, so later product price changes do not alter issued invoices
+    conn.executemany("""
+        INSERT INTO invoice_items (invoice_id, product_id, quantity, unit_price, line_total)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (
+            ids_by_no[invoice_no], item.product_id, item.quantity,
+            products[item.product_id]['price'], products[item.product_id]['price'] * item.quantity
+        )
+        for invoice_no, items in pending_items
+        for item in items
+    ])
+    search_index.index_invoices(conn, list(ids_by_no.values()))
+
+    for result in results:
+        if "invoice_no" in result:
+            result["id"] = ids_by_no[result["invoice_no"]]
+    return results
+
+def _invoice_filters(client_id=None, status=None, date_from=None, date_to=None):
+    # Shared WHERE conditions for endpoints that filter invoices
+    conditions = []
+    params = []
+    if client_id:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if date_from:
+        conditions.append("issue_date >= ?")
+        params.append(date_from.isoformat())
+    if date_to:
+        conditions.append("issue_date <= ?")
+        params.append(date_to.isoformat())
+    return conditions, params
+
+def _count_invoices(conn, conditions, params):
+    query = "SELECT COUNT(*) FROM invoices"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return conn.execute(query, params).fetchone()[0]
+
+def _approximate_invoice_count(conn, conditions, params):
+    # Counts are cached per filter set for a short TTL, so paging through with a
+    # cursor does not re-count the whole table on every request.
+    key = (tuple(conditions), tuple(params))
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    total = _count_invoices(conn, conditions, params)
+    with _count_cache_lock:
+        if len(_count_cache) >= 1024:
+            _count_cache.clear()
+        _count_cache[key] = (now + INVOICE_COUNT_CACHE_TTL, total)
+    return total
+
+def _encode_cursor(invoice):
+    raw = json.dumps([invoice['issue_date'], invoice['id']], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        issue_date, invoice_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(issue_date, str) or not isinstance(invoice_id, int):
+            raise ValueError("unexpected cursor payload")
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return issue_date, invoice_id
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
+
+# The trigram tokenizer cannot match anything shorter
+FTS_MIN_TERM_LENGTH = 3
+SEARCH_ORDER = {
+    "relevance": "invoice_search.rank, invoice_search.rowid",
+    "newest": "invoice_search.rowid DESC",
+}
+
+# Sparse fieldsets: header columns of InvoiceSummaryResponse and embeddable relations
+SUMMARY_FIELDS = ("invoice_no", "issue_date", "due_date", "client_id", "tax", "total", "address_snapshot", "status")
+SUMMARY_RELATIONS = ("client", "items")
+
+def _parse_projection(fields, include):
+    """
+    Turn ?fields= and ?include= into (header fields, relations), or None for the
+    full InvoiceResponse. Relations may also be named in `fields`.
+    """
+    if fields is None and include is None:
+        return None
+    requested = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    relations = [name.strip() for name in (include or "").split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SUMMARY_FIELDS + SUMMARY_RELATIONS]
+    unknown += [name for name in relations if name not in SUMMARY_RELATIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    header = [name for name in SUMMARY_FIELDS if name in requested] if fields is not None else list(SUMMARY_FIELDS)
+    embedded = {name for name in SUMMARY_RELATIONS if name in requested or name in relations}
+    return header, embedded
+
+def _project_invoices(conn, invoices, projection):
+    header, embedded = projection
+    wanted = [name for name in InvoiceSummaryResponse.model_fields if name in header or name in embedded]
+    if "items" in embedded:
+        hydrated = {invoice["id"]: invoice for invoice in _hydrate_invoices(conn, invoices)}
+    else:
+        hydrated = None  # No items query at all
+    clients = catalog.get_clients(conn, {row['client_id'] for row in invoices}) if "client" in embedded else {}
+
+    results = []
+    for row in invoices:
+        values = {
+            "invoice_no": row['invoice_no'],
+            "issue_date": row['issue_date'],
+            "due_date": row['due_date'],
+            "client_id": row['client_id'],
+            "client": clients.get(row['client_id']),
+            "items": hydrated[row['id']]["items"] if hydrated else None,
+            "tax": row['tax'],
+            "total": row['total'],
+            "address_snapshot": row['address'],
+            "status": row['status'] if row['status'] else "DRAFT",
+        }
+        # Keys follow InvoiceSummaryResponse order; unrequested ones are omitted
+        results.append({"id": row['id'], **{name: values[name] for name in wanted}})
+    return results
+
+def _fts_query(text):
+    """
+    Build a safe FTS5 MATCH expression: every term quoted (so operators and
+    punctuation in user input are literal) and all of them required.
+    """
+    terms = [term for term in re.findall(r"\w+", text) if len(term) >= FTS_MIN_TERM_LENGTH]
+    if not terms:
+        raise HTTPException(
+            status_code=400, detail=f"Search terms must be at least {FTS_MIN_TERM_LENGTH} characters long"
+        )
+    return " AND ".join(f'"{term}"' for term in terms)
+
+def _hydrate_invoices(conn, invoices):
+    """
+    Build response dicts for a page of invoice rows with a single extra query for
+    all their items. Prices and line totals are the snapshots stored on each item;
+    client and product details come from the in-process catalog cache.
+    """
+    if not invoices:
+        return []
+
+    clients = catalog.get_clients(conn, {invoice['client_id'] for invoice in invoices})
+
+    invoice_ids = [invoice['id'] for invoice in invoices]
+    cursor = conn.execute(f"""
+        SELECT id, invoice_id, product_id, quantity, unit_price, line_total
+        FROM invoice_items
+        WHERE invoice_id IN ({_placeholders(invoice_ids)})
+        ORDER BY invoice_id, id
+    """, invoice_ids)
     items = cursor.fetchall()
+    products = catalog.get_products(conn, {item['product_id'] for item in items})
 
-    items_response = []
+    items_by_invoice = {invoice_id: [] for invoice_id in invoice_ids}
     for item in items:
-        line_total = item['quantity'] * item['product_price']
-        items_response.append({
+        product = products[item['product_id']]
+        items_by_invoice[item['invoice_id']].append({
             "id": item['id'],
-            "product": {
-                "id": item['product_id'],
-                "name": item['product_name'],
-                "price": item['product_price']
-            },
+            "product": {"id": product['id'], "name": product['name'], "price": item['unit_price']},
             "quantity": item['quantity'],
-            "line_total": line_total
+            "unit_price": item['unit_price'],
+            "line_total": item['line_total']
         })
 
-    return {
-        "id": invoice['id'],
-        "invoice_no": invoice['invoice_no'],
-        "issue_date": invoice['issue_date'],
-        "due_date": invoice['due_date'],
-        "client": {
-            "id": client['id'],
-            "name": client['name'],
-            "address": client['address'],
-            "company_reg_no": client['company_reg_no']
-        },
-        "items": items_response,
-        "tax": invoice['tax'],
-        "total": invoice['total'],
-        "address_snapshot": invoice['address'],
-        "status": invoice['status'] if invoice['status'] else "DRAFT"
-    }
+    results = []
+    for invoice in invoices:
+        client = clients[invoice['client_id']]
+        results.append({
+            "id": invoice['id'],
+            "invoice_no": invoice['invoice_no'],
+            "issue_date": invoice['issue_date'],
+            "due_date": invoice['due_date'],
+            "client": client,
+            "items": items_by_invoice[invoice['id']],
+            "tax": invoice['tax'],
+            "total": invoice['total'],
+            "address_snapshot": invoice['address'],
+            "status": invoice['status'] if invoice['status'] else "DRAFT"
+        })
+    return results
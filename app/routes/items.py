@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import run_in_db
 
 router = APIRouter(prefix="/items", tags=["items"])
 
@@ -20,36 +20,25 @@ class ItemResponse(BaseModel):
 
 
 @router.get("")
-def list_items():
+async def list_items():
     """
     List all items from the database.
     Uses raw SQL query (no ORM).
     """
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM items ORDER BY id")
-            rows = cursor.fetchall()
-            items = [{"id": row["id"], "name": row["name"]} for row in rows]
-            return {"items": items}
+        return await run_in_db(_list_items)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @router.get("/{item_id}")
-def get_item(item_id: int):
+async def get_item(item_id: int):
     """
     Get a single item by ID.
     Uses raw SQL query (no ORM).
     """
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM items WHERE id = ?", (item_id,))
-            row = cursor.fetchone()
-            if row is None:
-                raise HTTPException(status_code=404, detail="Item not found")
-            return {"id": row["id"], "name": row["name"]}
+        return await run_in_db(_get_item, item_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -57,37 +46,25 @@ def get_item(item_id: int):
 
 
 @router.post("", status_code=201)
-def create_item(item: ItemCreate):
+async def create_item(item: ItemCreate):
     """
     Create a new item.
     Uses raw SQL query (no ORM).
     """
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO items (name) VALUES (?)", (item.name,))
-            item_id = cursor.lastrowid
-            return {"id": item_id, "name": item.name}
+        return await run_in_db(_create_item, item.name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @router.put("/{item_id}")
-def update_item(item_id: int, item: ItemUpdate):
+async def update_item(item_id: int, item: ItemUpdate):
     """
     Update an existing item.
     Uses raw SQL query (no ORM).
     """
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            # Check if item exists
-            cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
-            if cursor.fetchone() is None:
-                raise HTTPException(status_code=404, detail="Item not found")
-            # Update the item
-            cursor.execute("UPDATE items SET name = ? WHERE id = ?", (item.name, item_id))
-            return {"id": item_id, "name": item.name}
+        return await run_in_db(_update_item, item_id, item.name)
     except HTTPException:
         raise
     except Exception as e:
@@ -95,22 +72,60 @@ def update_item(item_id: int, item: ItemUpdate):
 
 
 @router.delete("/{item_id}", status_code=204)
-def delete_item(item_id: int):
+async def delete_item(item_id: int):
     """
     Delete an item.
     Uses raw SQL query (no ORM).
     """
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            # Check if item exists
-            cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
-            if cursor.fetchone() is None:
-                raise HTTPException(status_code=404, detail="Item not found")
-            # Delete the item
-            cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
-            return None
+        await run_in_db(_delete_item, item_id)
+        return None
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+def _list_items(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM items ORDER BY id")
+    rows = cursor.fetchall()
+    items = [{"id": row["id"], "name": row["name"]} for row in rows]
+    return {"items": items}
+
+
+def _get_item(conn, item_id: int):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM items WHERE id = ?", (item_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"id": row["id"], "name": row["name"]}
+
+
+def _create_item(conn, name: str):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO items (name) VALUES (?)", (name,))
+    item_id = cursor.lastrowid
+    return {"id": item_id, "name": name}
+
+
+def _update_item(conn, item_id: int, name: str):
+    cursor = conn.cursor()
+    # Check if item exists
+    cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
+    if cursor.fetchone() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    # Update the item
+    cursor.execute("UPDATE items SET name = ? WHERE id = ?", (name, item_id))
+    return {"id": item_id, "name": name}
+
+
+def _delete_item(conn, item_id: int):
+    cursor = conn.cursor()
+    # Check if item exists
+    cursor.execute("SELECT id FROM items WHERE id = ?", (item_id,))
+    if cursor.fetchone() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    # Delete the item
+    cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+
+from app.database import run_in_db
+from app.schemas import JobResponse
+from app.services.outbox import get_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: int):
+    """Status of a background job, e.g. the one returned by POST /invoices/{id}/send."""
+    try:
+        job = await run_in_db(get_job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobResponse(**{field: job[field] for field in JobResponse.model_fields})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -0,0 +1,52 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.database import run_in_db
+from app.rate_limiter import limiter
+from app.schemas import RevenueReportResponse, RevenueRow
+from app.services.catalog import catalog
+from app.services.reports import revenue_report
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+@router.get("/revenue", response_model=RevenueReportResponse)
+@limiter.limit("100/minute")
+async def get_revenue_report(
+    request: Request,
+    group_by: List[Literal["client", "month", "status"]] = Query(["client", "month", "status"]),
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    month_from: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month (YYYY-MM), inclusive"),
+    month_to: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month (YYYY-MM), inclusive"),
+):
+    """
+    Invoice count, tax and revenue grouped by any of client, month and status.
+    Reads the incrementally maintained rollup table, never the invoices themselves.
+    """
+    try:
+        return await run_in_db(_revenue_report, group_by, client_id, status, month_from, month_to)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+def _revenue_report(conn, group_by, client_id, status, month_from, month_to):
+    group_by = list(dict.fromkeys(group_by))
+    rows = revenue_report(conn, group_by, client_id, status, month_from, month_to)
+    if "client" in group_by:
+        clients = catalog.get_clients(conn, {row["client_id"] for row in rows})
+        for row in rows:
+            client = clients.get(row["client_id"])
+            row["client_name"] = client["name"] if client else None
+    return RevenueReportResponse(
+        group_by=group_by,
+        rows=[RevenueRow(**row) for row in rows],
+        invoice_count=sum(row["invoice_count"] for row in rows),
+        tax=round(sum(row["tax"] for row in rows), 2),
+        total=round(sum(row["total"] for row in rows), 2),
+    )
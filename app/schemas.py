@@ -19,6 +19,9 @@ class InvoiceCreate(BaseModel):
             raise ValueError('due_date must be greater than or equal to issue_date')
         return self
 
+class InvoiceBatchCreate(BaseModel):
+    invoices: List[InvoiceCreate] = Field(..., min_items=1, max_items=1000, description="Between 1 and 1000 invoices")
+
 class InvoiceStatusUpdate(BaseModel):
     status: Literal['DRAFT', 'SENT', 'PAID', 'OVERDUE']
 
@@ -37,6 +40,7 @@ class InvoiceItemResponse(BaseModel):
     id: int
     product: ProductResponse
     quantity: int
+    unit_price: float
     line_total: float
 
 class InvoiceResponse(BaseModel):
@@ -56,7 +60,74 @@ class InvoiceResponse(BaseModel):
 
 class PaginatedInvoiceResponse(BaseModel):
     items: List[InvoiceResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching invoices; null when with_total=false")
+    page: Optional[int] = Field(None, description="Page number; null in cursor mode")
+    page_size: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= to fetch the next page; null on the last page")
+
+class InvoiceSummaryResponse(BaseModel):
+    """Sparse invoice returned when ?fields= or ?include= is used; unrequested fields are omitted."""
+    id: int
+    invoice_no: Optional[str] = None
+    issue_date: Optional[date] = None
+    due_date: Optional[date] = None
+    client_id: Optional[int] = None
+    client: Optional[ClientResponse] = None
+    items: Optional[List[InvoiceItemResponse]] = None
+    tax: Optional[float] = None
+    total: Optional[float] = None
+    address_snapshot: Optional[str] = None
+    status: Optional[str] = None
+
+class PaginatedInvoiceSummaryResponse(BaseModel):
+    items: List[InvoiceSummaryResponse]
+    total: Optional[int] = None
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class InvoiceBatchResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    invoice_no: Optional[str] = None
+    error: Optional[str] = None
+
+class InvoiceBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[InvoiceBatchResult]
+
+class SendInvoiceResponse(BaseModel):
+    message: str
+    status: str
+    job_id: int
+    job_status: str
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    invoice_id: Optional[int] = None
+    status: Literal['PENDING', 'PROCESSING', 'DONE', 'FAILED']
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class RevenueRow(BaseModel):
+    client_id: Optional[int] = None
+    client_name: Optional[str] = None
+    month: Optional[str] = Field(None, description="YYYY-MM of the issue date")
+    status: Optional[str] = None
+    invoice_count: int
+    tax: float
+    total: float
+
+class RevenueReportResponse(BaseModel):
+    group_by: List[str]
+    rows: List[RevenueRow]
+    invoice_count: int
+    tax: float
+    total: float
@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where serve.py workers are not used
+    fcntl = None
+
+from app.database import DATABASE_PATH
+
+# Lock file electing the one worker process that runs the background loops
+BACKGROUND_LOCK_PATH = os.getenv(
+    "BACKGROUND_LOCK_PATH", f"{os.path.splitext(DATABASE_PATH)[0]}-background.lock"
+)
+# Seconds between attempts of the other workers to take over the lease
+BACKGROUND_LEASE_RETRY = float(os.getenv("BACKGROUND_LEASE_RETRY", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLease:
+    """
+    Elects a single worker process to run the background loops (outbox workers,
+    overdue sweeper) under `serve.py --workers N`.
+
+    The lease is an exclusive `flock` on a lock file next to the database. The
+    kernel drops it when the holder exits, so when that worker dies or is
+    restarted, one of the others takes over on its next retry.
+    """
+
+    def __init__(self, path: str = BACKGROUND_LOCK_PATH, retry_interval: float = BACKGROUND_LEASE_RETRY):
+        self.path = path
+        self.retry_interval = retry_interval
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lease if no other process holds it."""
+        with self._lock:
+            if self._file is not None:
+                return True
+            lock_file = open(self.path, "a")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    return False
+            self._file = lock_file
+            return True
+
+    def start(self, on_acquire: Callable[[], None]) -> None:
+        """Call `on_acquire` once this process holds the lease, now or after a takeover."""
+        if self.try_acquire():
+            on_acquire()
+            return
+        if self.retry_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._retry, args=(on_acquire,), name="background-lease", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop waiting for the lease; the caller stops its loops, then calls release()."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._stop.clear()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()  # Closing the file drops the flock
+                self._file = None
+
+    def stats(self) -> dict:
+        return {"held": self.held, "path": self.path}
+
+    def _retry(self, on_acquire: Callable[[], None]) -> None:
+        while not self._stop.wait(self.retry_interval):
+            if self.try_acquire():
+                logger.info("Took over the background lease; starting background loops")
+                on_acquire()
+                return
+
+
+background_lease = BackgroundLease()
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Minimum seconds between generation checks against the database
+CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "1.0"))
+
+_CLIENT_COLUMNS = ("id", "name", "address", "company_reg_no")
+_PRODUCT_COLUMNS = ("id", "name", "price")
+
+
+class CatalogCache:
+    """
+    In-memory copy of the clients and products seed tables.
+
+    The whole catalog is loaded at once and kept until the `catalog_generation`
+    counter (bumped by triggers on both tables) moves, or `invalidate()` is called.
+    Lookups are plain dict reads; ids missing from the snapshot fall back to SQLite.
+    Reads check the counter at most every `check_interval` seconds; writes pass
+    `fresh=True` to check it in their own transaction, since they store prices.
+    """
+
+    def __init__(self, check_interval: float = CATALOG_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._clients: Dict[int, dict] = {}
+        self._products: Dict[int, dict] = {}
+        self._generation: Optional[int] = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def load(self, conn: sqlite3.Connection) -> None:
+        """Bulk load both tables and remember the generation they belong to."""
+        generation = self._read_generation(conn)
+        clients = {row["id"]: _as_dict(row, _CLIENT_COLUMNS) for row in conn.execute("SELECT * FROM clients")}
+        products = {row["id"]: _as_dict(row, _PRODUCT_COLUMNS) for row in conn.execute("SELECT * FROM products")}
+        with self._lock:
+            self._clients = clients
+            self._products = products
+            self._generation = generation
+            self._loaded = True
+            self._checked_at = time.monotonic()
+            self.reloads += 1
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup."""
+        with self._lock:
+            self._loaded = False
+
+    def get_clients(self, conn: sqlite3.Connection, ids: Iterable[int], fresh: bool = False) -> Dict[int, dict]:
+        return self._lookup(conn, "clients", ids, fresh)
+
+    def get_products(self, conn: sqlite3.Connection, ids: Iterable[int], fresh: bool = False) -> Dict[int, dict]:
+        return self._lookup(conn, "products", ids, fresh)
+
+    def get_client(self, conn: sqlite3.Connection, client_id: int) -> Optional[dict]:
+        return self.get_clients(conn, [client_id]).get(client_id)
+
+    def get_product(self, conn: sqlite3.Connection, product_id: int) -> Optional[dict]:
+        return self.get_products(conn, [product_id]).get(product_id)
+
+    def generation(self, conn: sqlite3.Connection) -> Optional[int]:
+        """Generation of the current snapshot; changes whenever a client or product does."""
+        self._ensure_fresh(conn)
+        with self._lock:
+            return self._generation
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "clients": len(self._clients),
+                "products": len(self._products),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+    def _lookup(self, conn, table, ids, fresh=False) -> Dict[int, dict]:
+        self._ensure_fresh(conn, force_check=fresh)
+        cached = self._clients if table == "clients" else self._products
+        found = {}
+        missing = []
+        for item_id in set(ids):
+            row = cached.get(item_id)
+            if row is None:
+                missing.append(item_id)
+            else:
+                found[item_id] = row
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            # Unknown ids are either invalid input or rows newer than the snapshot
+            columns = _CLIENT_COLUMNS if table == "clients" else _PRODUCT_COLUMNS
+            placeholders = ", ".join("?" for _ in missing)
+            rows = conn.execute(f"SELECT * FROM {table} WHERE id IN ({placeholders})", missing).fetchall()
+            with self._lock:
+                for row in rows:
+                    found[row["id"]] = cached[row["id"]] = _as_dict(row, columns)
+        return found
+
+    def _ensure_fresh(self, conn, force_check: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded and not force_check and now - self._checked_at < self.check_interval:
+                return
+            loaded, known = self._loaded, self._generation
+        generation = self._read_generation(conn)
+        if not loaded or generation != known:
+            self.load(conn)
+        else:
+            with self._lock:
+                self._checked_at = now
+
+    @staticmethod
+    def _read_generation(conn) -> Optional[int]:
+        try:
+            row = conn.execute("SELECT generation FROM catalog_generation WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return None  # Database predates the catalog_generation migration
+        return row[0] if row else None
+
+
+def _as_dict(row, columns) -> dict:
+    return {column: row[column] for column in columns}
+
+
+catalog = CatalogCache()
@@ -1,12 +1,289 @@
-def send_invoice_email(to_email: str, subject: str, body: str, attachment_bytes: bytes) -> bool:
+import os
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import List, Optional
+
+EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "mock")  # mock | smtp
+EMAIL_FROM = os.getenv("EMAIL_FROM", "invoices@example.com")
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+# Idle connections older than this are checked with NOOP before reuse
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+
+
+@dataclass
+class OutgoingEmail:
+    to_email: str
+    subject: str
+    body: str
+    attachment_bytes: Optional[bytes] = None
+    attachment_name: str = "invoice.pdf"
+
+
+@dataclass
+class SendResult:
+    to_email: str
+    ok: bool
+    elapsed_ms: float
+    error: Optional[str] = None
+
+
+def build_message(email: OutgoingEmail, sender: str = EMAIL_FROM) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = email.to_email
+    message["Subject"] = email.subject
+    message.set_content(email.body)
+    if email.attachment_bytes is not None:
+        message.add_attachment(
+            email.attachment_bytes, maintype="application", subtype="pdf", filename=email.attachment_name
+        )
+    return message
+
+
+class EmailTransport:
+    """Base class for mail transports. Subclasses implement `_deliver`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self._total_ms = 0.0
+
+    def send(self, email: OutgoingEmail) -> SendResult:
+        return self.send_many([email])[0]
+
+    def send_many(self, emails: List[OutgoingEmail]) -> List[SendResult]:
+        return [self._timed(self._deliver, email) for email in emails]
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            delivered = self.sent + self.failed
+            return {
+                "transport": type(self).__name__,
+                "sent": self.sent,
+                "failed": self.failed,
+                "avg_ms": round(self._total_ms / delivered, 3) if delivered else None,
+            }
+
+    def _deliver(self, email: OutgoingEmail) -> None:
+        raise NotImplementedError
+
+    def _timed(self, deliver, email: OutgoingEmail, *args) -> SendResult:
+        started = time.perf_counter()
+        try:
+            deliver(email, *args)
+        except Exception as e:
+            result = SendResult(email.to_email, False, (time.perf_counter() - started) * 1000, str(e))
+        else:
+            result = SendResult(email.to_email, True, (time.perf_counter() - started) * 1000)
+        with self._lock:
+            if result.ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self._total_ms += result.elapsed_ms
+        return result
+
+
+class MockTransport(EmailTransport):
     """
     Mock email sender.
     In a real app, this would use SMTP or an API like SendGrid/SES.
     """
-    print(f"--- [MOCK EMAIL SERVICE] ---")
-    print(f"To: {to_email}")
-    print(f"Subject: {subject}")
-    print(f"Body: {body}")
-    print(f"Attachment Size: {len(attachment_bytes)} bytes")
-    print("----------------------------")
-    return True
+
+    def _deliver(self, email: OutgoingEmail) -> None:
+        print(f"--- [MOCK EMAIL SERVICE] ---")
+        print(f"To: {email.to_email}")
+        print(f"Subject: {email.subject}")
+        print(f"Body: {email.body}")
+        print(f"Attachment Size: {len(email.attachment_bytes or b'')} bytes")
+        print("----------------------------")
+
+
+class SMTPTransport(EmailTransport):
+    """
+    SMTP transport with a pool of persistent connections.
+
+    Connections are opened lazily (up to `pool_size`), reused across messages and
+    re-opened once if the server dropped them. `send_many` spreads a batch over the
+    pool and sends each share back to back on one connection, so a batch of
+    hundreds of invoices pays the connect/EHLO/AUTH cost at most `pool_size` times.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, username: Optional[str] = SMTP_USERNAME,
+                 password: Optional[str] = SMTP_PASSWORD, starttls: bool = SMTP_STARTTLS,
+                 timeout: float = SMTP_TIMEOUT, pool_size: int = SMTP_POOL_SIZE, sender: str = EMAIL_FROM):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.sender = sender
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._opened = 0
+        self.connects = 0
+
+    def send_many(self, emails: List[OutgoingEmail]) -> List[SendResult]:
+        if len(emails) <= 1 or self.pool_size <= 1:
+            return self._send_on_one_connection(emails)
+        shares = min(self.pool_size, len(emails))
+        groups = [list(range(start, len(emails), shares)) for start in range(shares)]
+        results: List[Optional[SendResult]] = [None] * len(emails)
+        with ThreadPoolExecutor(max_workers=shares, thread_name_prefix="smtp-send") as executor:
+            for group, group_results in zip(groups, executor.map(
+                lambda indexes: self._send_on_one_connection([emails[i] for i in indexes]), groups
+            )):
+                for index, result in zip(group, group_results):
+                    results[index] = result
+        return results
+
+    def close(self) -> None:
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+            self._quit(smtp)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({"connects": self.connects, "idle_connections": self._idle.qsize(), "pool_size": self.pool_size})
+        return stats
+
+    def _send_on_one_connection(self, emails: List[OutgoingEmail]) -> List[SendResult]:
+        try:
+            holder = [self._acquire()]
+        except queue.Empty:
+            error = TimeoutError("No SMTP connection available")
+            return [self._timed(_raise, email, error) for email in emails]
+        try:
+            return [self._timed(self._deliver_on, email, holder) for email in emails]
+        finally:
+            self._release(holder[0])
+
+    def _deliver_on(self, email: OutgoingEmail, holder: list) -> None:
+        message = build_message(email, self.sender)
+        if holder[0] is not None:
+            try:
+                holder[0].send_message(message)
+                return
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._quit(holder[0])
+                holder[0] = None
+        # No usable connection: reconnect once in place and retry the message
+        holder[0] = self._connect()
+        holder[0].send_message(message)
+
+    def _acquire(self) -> Optional[smtplib.SMTP]:
+        """Check out a pooled connection, opening one while under `pool_size`."""
+        try:
+            smtp, idle_since = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                open_new = self._opened < self.pool_size
+                if open_new:
+                    self._opened += 1
+            if open_new:
+                try:
+                    return self._connect()
+                except Exception:
+                    return None  # Counted as open; _deliver_on retries the connect
+            smtp, idle_since = self._idle.get(timeout=self.timeout)
+        if time.monotonic() - idle_since > SMTP_IDLE_CHECK_SECONDS and not self._alive(smtp):
+            self._quit(smtp)
+            return None
+        return smtp
+
+    def _release(self, smtp: Optional[smtplib.SMTP]) -> None:
+        if smtp is None:
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put((smtp, time.monotonic()))
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except Exception:
+            self._quit(smtp)
+            raise
+        with self._lock:
+            self.connects += 1
+        return smtp
+
+    @staticmethod
+    def _alive(smtp: smtplib.SMTP) -> bool:
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+def _raise(email: OutgoingEmail, error: Exception) -> None:
+    raise error
+
+
+def create_transport(name: str = EMAIL_TRANSPORT) -> EmailTransport:
+    if name == "smtp":
+        return SMTPTransport()
+    if name == "mock":
+        return MockTransport()
+    raise ValueError(f"Unknown EMAIL_TRANSPORT '{name}'")
+
+
+_transport: Optional[EmailTransport] = None
+
+
+def get_transport() -> EmailTransport:
+    global _transport
+    if _transport is None:
+        _transport = create_transport()
+    return _transport
+
+
+def set_transport(transport: Optional[EmailTransport]) -> None:
+    """Swap the process-wide transport (closing the previous one)."""
+    global _transport
+    if _transport is not None and _transport is not transport:
+        _transport.close()
+    _transport = transport
+
+
+def send_invoice_email(to_email: str, subject: str, body: str, attachment_bytes: bytes) -> bool:
+    """Send one invoice email through the configured transport."""
+    return get_transport().send(OutgoingEmail(to_email, subject, body, attachment_bytes)).ok
+
+
+def send_many(emails: List[OutgoingEmail]) -> List[SendResult]:
+    """Send a batch of emails, reusing transport connections across the batch."""
+    return get_transport().send_many(emails)
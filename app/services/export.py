@@ -0,0 +1,201 @@
+"""
+Streaming exports of invoices as NDJSON, CSV or a ZIP archive of PDFs.
+
+Invoices are read in keyset chunks of `EXPORT_CHUNK_SIZE` ordered by
+(issue_date, id), so memory use does not depend on the size of the export.
+Callers pass the filter `conditions`/`params` built for the invoices table and
+a `hydrate(conn, rows)` function that turns a chunk of invoice rows into
+response dicts.
+"""
+
+import asyncio
+import collections
+import csv
+import io
+import logging
+import os
+import weakref
+import zipfile
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from app.database import db_session, run_in_db
+from app.services.pdf_cache import pdf_cache, pdf_cache_key
+from app.services.pdf_renderer import pdf_renderer
+
+logger = logging.getLogger(__name__)
+
+# Invoices hydrated per database round trip while exporting
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+# Share of the render queue that all running PDF exports together may occupy, so
+# ordinary GET /invoices/{id}/pdf calls still find room
+EXPORT_RENDER_SHARE = float(os.getenv("EXPORT_RENDER_SHARE", "0.5"))
+
+CSV_COLUMNS = [
+    "invoice_id", "invoice_no", "issue_date", "due_date", "status", "client_id", "client_name",
+    "address_snapshot", "tax", "total", "item_id", "product_id", "product_name", "unit_price",
+    "quantity", "line_total",
+]
+
+Hydrate = Callable[..., List[dict]]
+
+
+def select_chunk(conn, conditions: Sequence[str], params: Sequence, after: Optional[tuple],
+                 hydrate: Hydrate) -> Tuple[List[dict], Optional[tuple]]:
+    """One keyset page of the export and the key to continue after (None when done)."""
+    conditions = list(conditions)
+    params = list(params)
+    if after is not None:
+        conditions.append("(issue_date, id) > (?, ?)")
+        params.extend(after)
+    query = "SELECT * FROM invoices"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY issue_date, id LIMIT ?"
+    params.append(EXPORT_CHUNK_SIZE)
+    invoices = conn.execute(query, params).fetchall()
+    if not invoices:
+        return [], None
+    rows = hydrate(conn, invoices)
+    last = invoices[-1]
+    return rows, (last['issue_date'], last['id'])
+
+
+def _iter_chunks(conditions, params, hydrate) -> Iterator[List[dict]]:
+    after = None
+    while True:
+        # Each chunk is read on a short-lived pooled connection (dependency
+        # connections are released before a streamed body is sent)
+        with db_session() as conn:
+            invoices, after = select_chunk(conn, conditions, params, after, hydrate)
+        if invoices:
+            yield invoices
+        if after is None:
+            return
+
+
+def stream_ndjson(conditions: Sequence[str], params: Sequence, hydrate: Hydrate) -> Iterator[bytes]:
+    """One invoice with its items per line."""
+    for invoices in _iter_chunks(conditions, params, hydrate):
+        yield b"".join(orjson.dumps(invoice) + b"\n" for invoice in invoices)
+
+
+def stream_csv(conditions: Sequence[str], params: Sequence, hydrate: Hydrate) -> Iterator[str]:
+    """A header row, then one row per line item."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for invoices in _iter_chunks(conditions, params, hydrate):
+        for invoice in invoices:
+            header = [
+                invoice['id'], invoice['invoice_no'], invoice['issue_date'], invoice['due_date'],
+                invoice['status'], invoice['client']['id'], invoice['client']['name'],
+                invoice['address_snapshot'], invoice['tax'], invoice['total'],
+            ]
+            writer.writerows(
+                header + [
+                    item['id'], item['product']['id'], item['product']['name'], item['unit_price'],
+                    item['quantity'], item['line_total'],
+                ]
+                for item in invoice['items']
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ZipStream:
+    # Write-only sink for zipfile; the buffered bytes are handed out with drain()
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _RenderSlots:
+    # One semaphore per event loop (asyncio primitives cannot be shared between
+    # loops); a server process runs a single loop, like its render queue
+    def __init__(self):
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(pdf_renderer.queue_size * EXPORT_RENDER_SHARE))
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+_render_slots = _RenderSlots()
+
+
+async def render_pdf_bytes(invoice_data: dict) -> bytes:
+    """Reuse cached renderings, but do not flood the cache with one-off exports."""
+    pdf_bytes = await run_in_threadpool(pdf_cache.get, pdf_cache_key(invoice_data))
+    if pdf_bytes is not None:
+        return pdf_bytes
+    async with _render_slots.semaphore():
+        return await pdf_renderer.render(invoice_data)
+
+
+async def stream_pdf_zip(conditions: Sequence[str], params: Sequence, hydrate: Hydrate) -> AsyncIterator[bytes]:
+    """
+    A ZIP archive with one PDF per invoice, written in export order.
+
+    Renders are pipelined through a small window, so memory stays bounded by
+    window * PDF size no matter how many invoices match. The response has
+    already started when a render fails, so the archive gets an
+    `invoice_<no>.pdf.error.txt` entry in place of that PDF and stays complete.
+    """
+    window = max(1, min(pdf_renderer.workers * 2, _render_slots.limit))
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+    in_flight = collections.deque()
+    after = None
+    try:
+        while True:
+            invoices, after = await run_in_db(select_chunk, conditions, params, after, hydrate)
+            for invoice_data in invoices:
+                in_flight.append((invoice_data, asyncio.ensure_future(render_pdf_bytes(invoice_data))))
+                if len(in_flight) >= window:
+                    yield await _write_zip_entry(archive, sink, *in_flight.popleft())
+            if after is None:
+                break
+        while in_flight:
+            yield await _write_zip_entry(archive, sink, *in_flight.popleft())
+        archive.close()
+        yield sink.drain()
+    finally:
+        for _, task in in_flight:
+            task.cancel()
+
+
+async def _write_zip_entry(archive, sink, invoice_data, task):
+    name = f"invoice_{invoice_data['invoice_no']}.pdf"
+    try:
+        data = await task
+    except Exception as e:
+        # RenderQueueFull, RenderTimeout or a crashed worker
+        logger.warning("PDF export could not render %s: %r", invoice_data['invoice_no'], e)
+        name, data = f"{name}.error.txt", f"Rendering failed: {e!r}\n".encode()
+    # Deflating is CPU work; keep it off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, archive.writestr, name, data)
+    return sink.drain()
@@ -0,0 +1,180 @@
+"""
+Sequential, per-year invoice numbers: INV-2026-000123.
+
+`invoice_sequences` holds the next free number of each year. A process never
+takes numbers from it one at a time on the request path: it reserves a block of
+`block_size` numbers in one short transaction on its own connection, committed
+before (and independently of) the write transaction that uses them, and hands
+numbers out of that block from memory. Numbers that end up unused (a rejected
+invoice, a rolled-back mutation) are released back and reused first, lowest
+first; on shutdown the unused tail of the last block is returned to the table
+when no other process has reserved after it. Numbers are therefore unique and
+nearly gap-free, but with several workers they are not strictly in creation
+order across workers; a block size of 1 gives a strict sequence.
+"""
+
+import heapq
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from app.database import get_connection
+
+INVOICE_NO_BLOCK_SIZE = int(os.getenv("INVOICE_NO_BLOCK_SIZE", "100"))
+
+_RESERVE = """
+    INSERT INTO invoice_sequences (year, next_value) VALUES (:year, 1 + :count)
+    ON CONFLICT (year) DO UPDATE SET next_value = next_value + :count
+    RETURNING next_value
+"""
+
+
+def format_invoice_no(year: int, number: int) -> str:
+    return f"INV-{year}-{number:06d}"
+
+
+def parse_invoice_no(invoice_no: str) -> Optional[tuple]:
+    """(year, number) of a sequential invoice number, or None for any other format."""
+    parts = invoice_no.split("-")
+    if len(parts) != 3 or parts[0] != "INV" or not (parts[1].isdigit() and parts[2].isdigit()):
+        return None
+    return int(parts[1]), int(parts[2])
+
+
+def reserve_in(conn: sqlite3.Connection, years: List[int]) -> List[str]:
+    """
+    Take numbers for `years` straight from the sequence table in the caller's
+    transaction, so they are given back if it rolls back. For scripts and bulk
+    loads; request paths use the block allocator.
+    """
+    counts: Dict[int, int] = {}
+    for year in years:
+        counts[year] = counts.get(year, 0) + 1
+    next_by_year = {}
+    for year, count in counts.items():
+        end = conn.execute(_RESERVE, {"year": year, "count": count}).fetchone()[0]
+        next_by_year[year] = end - count
+    numbers = []
+    for year in years:
+        numbers.append(format_invoice_no(year, next_by_year[year]))
+        next_by_year[year] += 1
+    return numbers
+
+
+class InvoiceNumberAllocator:
+    """Per-process block allocator over `invoice_sequences`."""
+
+    def __init__(self, block_size: int = INVOICE_NO_BLOCK_SIZE, database_path: Optional[str] = None):
+        self.block_size = block_size
+        self.database_path = database_path
+        self._lock = threading.Lock()
+        self._reserve_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # year -> [next unused, end of block (exclusive)]
+        self._blocks: Dict[int, List[int]] = {}
+        # year -> min-heap of released numbers
+        self._released: Dict[int, List[int]] = {}
+        self.blocks_reserved = 0
+        self.allocated = 0
+        self.released = 0
+        self.reused = 0
+
+    def take(self, years: List[int]) -> Optional[List[str]]:
+        """Numbers for `years` from memory only, or None if a block must be reserved first."""
+        with self._lock:
+            needed: Dict[int, int] = {}
+            for year in years:
+                needed[year] = needed.get(year, 0) + 1
+            if any(self._available(year) < count for year, count in needed.items()):
+                return None
+            numbers = [format_invoice_no(year, self._pop(year)) for year in years]
+            self.allocated += len(numbers)
+            return numbers
+
+    def allocate(self, years: List[int]) -> List[str]:
+        """Numbers for `years`, reserving new blocks as needed (blocking)."""
+        while True:
+            numbers = self.take(years)
+            if numbers is not None:
+                return numbers
+            with self._reserve_lock:
+                with self._lock:
+                    short = {}
+                    for year in years:
+                        short[year] = short.get(year, 0) + 1
+                    short = {year: count - self._available(year) for year, count in short.items()}
+                for year, count in short.items():
+                    if count > 0:
+                        self._reserve_block(year, max(count, self.block_size))
+
+    def release(self, invoice_nos: Iterable[str]) -> None:
+        """Give back numbers that were allocated but never committed."""
+        with self._lock:
+            for invoice_no in invoice_nos:
+                parsed = parse_invoice_no(invoice_no)
+                if parsed is None:
+                    continue
+                year, number = parsed
+                heapq.heappush(self._released.setdefault(year, []), number)
+                self.released += 1
+
+    def close(self) -> None:
+        """Return the unused tail of each block if nobody reserved after it, then disconnect."""
+        with self._reserve_lock, self._lock:
+            if self._conn is not None:
+                for year, (next_value, end) in self._blocks.items():
+                    start = next_value
+                    released = set(self._released.get(year, ()))
+                    while start - 1 in released:
+                        start -= 1
+                    if start < end:
+                        self._conn.execute(
+                            "UPDATE invoice_sequences SET next_value = ? WHERE year = ? AND next_value = ?",
+                            (start, year, end)
+                        )
+                self._conn.close()
+                self._conn = None
+            self._blocks.clear()
+            self._released.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "block_size": self.block_size,
+                "blocks_reserved": self.blocks_reserved,
+                "allocated": self.allocated,
+                "released": self.released,
+                "reused": self.reused,
+                "available": {str(year): self._available(year) for year in sorted(self._blocks)},
+            }
+
+    def _available(self, year: int) -> int:
+        block = self._blocks.get(year)
+        return len(self._released.get(year, ())) + (block[1] - block[0] if block else 0)
+
+    def _pop(self, year: int) -> int:
+        released = self._released.get(year)
+        if released:
+            self.reused += 1
+            return heapq.heappop(released)
+        block = self._blocks[year]
+        block[0] += 1
+        return block[0] - 1
+
+    def _reserve_block(self, year: int, count: int) -> None:
+        if self._conn is None:
+            self._conn = get_connection(self.database_path)
+            self._conn.isolation_level = None  # Every reservation commits on its own
+        end = self._conn.execute(_RESERVE, {"year": year, "count": count}).fetchone()[0]
+        with self._lock:
+            block = self._blocks.get(year)
+            if block and block[0] < block[1]:
+                # Numbers left in the old block are kept for reuse
+                for number in range(block[0], block[1]):
+                    heapq.heappush(self._released.setdefault(year, []), number)
+            self._blocks[year] = [end - count, end]
+            self.blocks_reserved += 1
+
+
+invoice_numbers = InvoiceNumberAllocator()
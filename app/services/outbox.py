@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.database import db_session
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2.0"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+# How long a claimed job may run before another worker can reclaim it
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+
+logger = logging.getLogger(__name__)
+
+# A handler receives a batch of claimed rows of one kind and returns the error
+# for each failed job id (jobs that are not in the result succeeded).
+Handler = Callable[[List[sqlite3.Row]], Dict[int, Exception]]
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying cannot fix; the job is failed immediately."""
+
+
+def enqueue(conn: sqlite3.Connection, kind: str, invoice_id: Optional[int] = None,
+            payload: Optional[dict] = None, max_attempts: int = OUTBOX_MAX_ATTEMPTS) -> int:
+    """Insert a job using the caller's connection, so it commits with the caller's transaction."""
+    cursor = conn.execute("""
+        INSERT INTO outbox (kind, invoice_id, payload, max_attempts, available_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (kind, invoice_id, json.dumps(payload or {}), max_attempts, time.time()))
+    return cursor.lastrowid
+
+
+def get_job(conn: sqlite3.Connection, job_id: int) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM outbox WHERE id = ?", (job_id,)).fetchone()
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff before retry number `attempts + 1`."""
+    return min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+
+
+class OutboxWorkerPool:
+    """
+    Background threads that drain the `outbox` table.
+
+    Jobs are claimed in batches with a single UPDATE ... RETURNING, which is atomic
+    across threads and processes. A claim takes a lease on the job by moving its
+    `available_at` forward, so work lost in a crash is picked up again once the
+    lease expires. Failed jobs are retried with exponential backoff until
+    `max_attempts`, after which they are marked FAILED.
+    """
+
+    def __init__(self, workers: int = OUTBOX_WORKERS, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, Handler] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"outbox-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self.notify()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after a job has been committed."""
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def drain_once(self) -> int:
+        """Claim and process one batch on the calling thread; returns the batch size."""
+        jobs = self._claim()
+        if jobs:
+            self._process(jobs)
+        return len(jobs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "batches": self.batches,
+                "succeeded": self.succeeded,
+                "retried": self.retried,
+                "failed": self.failed,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.drain_once()
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+                processed = 0
+            if not processed:
+                with self._wakeup:
+                    if not self._stop.is_set():
+                        self._wakeup.wait(self.poll_interval)
+
+    def _claim(self) -> List[sqlite3.Row]:
+        now = time.time()
+        with db_session() as conn:
+            return conn.execute("""
+                UPDATE outbox
+                SET status = 'PROCESSING',
+                    attempts = attempts + 1,
+                    available_at = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM outbox
+                    WHERE status IN ('PENDING', 'PROCESSING') AND available_at <= ?
+                    ORDER BY available_at
+                    LIMIT ?
+                )
+                RETURNING *
+            """, (now + OUTBOX_LEASE_SECONDS, now, self.batch_size)).fetchall()
+
+    def _process(self, jobs: List[sqlite3.Row]) -> None:
+        by_kind: Dict[str, List[sqlite3.Row]] = {}
+        for job in jobs:
+            by_kind.setdefault(job["kind"], []).append(job)
+
+        errors: Dict[int, Exception] = {}
+        for kind, batch in by_kind.items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                errors.update((job["id"], PermanentJobError(f"No handler for job kind '{kind}'")) for job in batch)
+                continue
+            try:
+                errors.update(handler(batch))
+            except Exception as e:
+                logger.exception("Outbox handler for '%s' failed", kind)
+                errors.update((job["id"], e) for job in batch)
+
+        self._record(jobs, errors)
+
+    def _record(self, jobs: List[sqlite3.Row], errors: Dict[int, Exception]) -> None:
+        done, retry, failed = [], [], []
+        now = time.time()
+        for job in jobs:
+            error = errors.get(job["id"])
+            if error is None:
+                done.append((job["id"],))
+            elif isinstance(error, PermanentJobError) or job["attempts"] >= job["max_attempts"]:
+                failed.append((str(error), job["id"]))
+            else:
+                retry.append((now + backoff_delay(job["attempts"]), str(error), job["id"]))
+
+        with db_session() as conn:
+            conn.executemany("""
+                UPDATE outbox SET status = 'DONE', last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, done)
+            conn.executemany("""
+                UPDATE outbox SET status = 'PENDING', available_at = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, retry)
+            conn.executemany("""
+                UPDATE outbox SET status = 'FAILED', last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, failed)
+
+        with self._lock:
+            self.batches += 1
+            self.succeeded += len(done)
+            self.retried += len(retry)
+            self.failed += len(failed)
+
+
+outbox_workers = OutboxWorkerPool()
@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from app.database import db_session
+
+# Seconds between sweeps; 0 disables the background thread (sweep_once still works)
+OVERDUE_SWEEP_INTERVAL = float(os.getenv("OVERDUE_SWEEP_INTERVAL", "300"))
+OVERDUE_SWEEP_CHUNK_SIZE = int(os.getenv("OVERDUE_SWEEP_CHUNK_SIZE", "500"))
+# Pause between chunks so queued writers get the write lock
+OVERDUE_SWEEP_CHUNK_PAUSE = float(os.getenv("OVERDUE_SWEEP_CHUNK_PAUSE", "0.01"))
+
+logger = logging.getLogger(__name__)
+
+
+class OverdueSweeper:
+    """
+    Background thread that moves SENT invoices past their due date to OVERDUE.
+
+    Each sweep updates at most `chunk_size` invoices per transaction, found through
+    the (status, due_date) index, and pauses between chunks, so the write lock is
+    only ever held briefly.
+    """
+
+    def __init__(self, interval: float = OVERDUE_SWEEP_INTERVAL, chunk_size: int = OVERDUE_SWEEP_CHUNK_SIZE,
+                 chunk_pause: float = OVERDUE_SWEEP_CHUNK_PAUSE):
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.touched = 0
+        self.last_run: Optional[dict] = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="overdue-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._stop.clear()
+
+    def sweep_once(self, today: Optional[date] = None) -> dict:
+        """Mark every SENT invoice due before `today` as OVERDUE; returns the run summary."""
+        cutoff = (today or date.today()).isoformat()
+        started = time.perf_counter()
+        touched = 0
+        chunks = 0
+        while True:
+            with db_session() as conn:
+                updated = conn.execute("""
+                    UPDATE invoices SET status = 'OVERDUE'
+                    WHERE id IN (
+                        SELECT id FROM invoices
+                        WHERE status = 'SENT' AND due_date < ?
+                        LIMIT ?
+                    )
+                """, (cutoff, self.chunk_size)).rowcount
+            chunks += 1
+            touched += updated
+            # A short chunk means nothing is left; stop() also ends a sweep early
+            if updated < self.chunk_size or self._stop.wait(self.chunk_pause):
+                break
+
+        run = {
+            "touched": touched,
+            "chunks": chunks,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            "cutoff": cutoff,
+        }
+        with self._lock:
+            self.runs += 1
+            self.touched += touched
+            self.last_run = run
+        if touched:
+            logger.info("Marked %d invoices OVERDUE in %.1f ms", touched, run["elapsed_ms"])
+        return run
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "running": self._thread is not None,
+                "runs": self.runs,
+                "touched": self.touched,
+                "last_run": self.last_run,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sweep_once()
+            except Exception:
+                logger.exception("Overdue sweep failed")
+            self._stop.wait(self.interval)
+
+
+overdue_sweeper = OverdueSweeper()
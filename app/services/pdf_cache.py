@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.pdf_generator import PDF_TEMPLATE_VERSION
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "invoice_pdf_cache"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def pdf_cache_key(invoice_data: dict) -> str:
+    """Content hash of everything that ends up in the rendered PDF."""
+    payload = json.dumps(
+        {"template": PDF_TEMPLATE_VERSION, "invoice": invoice_data},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PdfCache:
+    """
+    Disk-backed, content-addressed cache of rendered invoice PDFs.
+
+    Entries are keyed by `pdf_cache_key`, so any change to an invoice (status,
+    items, client details...) produces a new key. The previous entry of the same
+    invoice is dropped when its replacement is stored, and the total size on
+    disk is kept under `max_bytes` by evicting the least recently used files.
+
+    Hits return the file's bytes, read when the entry is looked up, never its
+    path: another request (or another worker sharing the directory) may replace
+    or evict the file at any moment, and an open file survives its deletion.
+    """
+
+    def __init__(self, directory: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU first
+        self._keys_by_invoice = {}
+        self._size = 0
+        self._scanned = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Contents of the cached PDF for `key`, or None on a miss."""
+        self._scan()
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                if key in self._entries:
+                    self._size -= self._entries.pop(key)
+            return None
+        try:
+            os.utime(path)  # Keep LRU order across restarts
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = len(pdf_bytes)
+                self._size += len(pdf_bytes)
+        return pdf_bytes
+
+    def put(self, key: str, pdf_bytes: bytes, invoice_id: Optional[int] = None) -> str:
+        """Store a rendered PDF atomically and evict old entries if needed."""
+        self._scan()
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+
+        stale = []
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)
+            self._entries[key] = len(pdf_bytes)
+            self._size += len(pdf_bytes)
+            if invoice_id is not None:
+                previous = self._keys_by_invoice.get(invoice_id)
+                self._keys_by_invoice[invoice_id] = key
+                if previous and previous != key and previous in self._entries:
+                    self._size -= self._entries.pop(previous)
+                    stale.append(previous)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                evicted, size = self._entries.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                stale.append(evicted)
+        for stale_key in stale:
+            self._remove(stale_key)
+        return path
+
+    def get_or_render(self, invoice_data: dict, render: Callable[[dict], bytes]) -> bytes:
+        """The PDF for `invoice_data`, rendering it only on a miss."""
+        key = pdf_cache_key(invoice_data)
+        pdf_bytes = self.get(key)
+        if pdf_bytes is None:
+            pdf_bytes = render(invoice_data)
+            self.put(key, pdf_bytes, invoice_id=invoice_data.get("id"))
+        return pdf_bytes
+
+    async def aget_or_render(self, invoice_data: dict, render: Callable[[dict], Awaitable[bytes]]) -> bytes:
+        """Async variant of `get_or_render` for renderers that must be awaited."""
+        key = pdf_cache_key(invoice_data)
+        pdf_bytes = await run_in_threadpool(self.get, key)
+        if pdf_bytes is None:
+            pdf_bytes = await render(invoice_data)
+            await run_in_threadpool(self.put, key, pdf_bytes, invoice_data.get("id"))
+        return pdf_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._keys_by_invoice.clear()
+            self._size = 0
+        for key in keys:
+            self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def _scan(self) -> None:
+        # Rebuild the LRU index from files left by a previous run, oldest first
+        if self._scanned:
+            return
+        found = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".pdf"):
+                        stat = os.stat(os.path.join(root, name))
+                        found.append((stat.st_mtime, name[:-4], stat.st_size))
+        found.sort()
+        with self._lock:
+            if self._scanned:
+                return
+            for _, key, size in found:
+                self._entries[key] = size
+                self._size += size
+            self._scanned = True
+
+
+pdf_cache = PdfCache()
@@ -1,6 +1,9 @@
 from fpdf import FPDF
 import io
 
+# Bump whenever the layout below changes so cached PDFs are re-rendered
+PDF_TEMPLATE_VERSION = "1"
+
 class InvoicePDF(FPDF):
     def header(self):
         self.set_font('Arial', 'B', 20)
@@ -50,7 +53,7 @@ def generate_invoice_pdf(invoice_data: dict) -> bytes:
     for item in invoice_data['items']:
         product_name = item['product']['name']
         quantity = str(item['quantity'])
-        price = f"{item['product']['price']:.2f}"
+        price = f"{item['unit_price']:.2f}"
         total = f"{item['line_total']:.2f}"
         
         pdf.cell(80, 10, product_name, 1)
@@ -0,0 +1,204 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.services.pdf_generator import generate_invoice_pdf
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_RENDER_QUEUE_SIZE = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "64"))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "30"))
+
+_LATENCY_SAMPLES = 512
+
+_WARMUP_INVOICE = {
+    "invoice_no": "WARMUP",
+    "issue_date": "2000-01-01",
+    "due_date": "2000-01-01",
+    "status": "DRAFT",
+    "client": {"name": "Warmup", "address": "Warmup", "company_reg_no": "Warmup"},
+    "items": [{"product": {"name": "Warmup", "price": 1.0}, "quantity": 1, "unit_price": 1.0, "line_total": 1.0}],
+    "tax": 0.0,
+    "total": 1.0,
+}
+
+
+class RenderQueueFull(Exception):
+    """Raised when too many renders are already queued."""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within the configured timeout."""
+
+
+def _warm_worker():
+    # Import FPDF and load the core fonts once per process, not per request
+    generate_invoice_pdf(_WARMUP_INVOICE)
+
+
+def _noop():
+    return None
+
+
+class PdfRenderService:
+    """
+    Renders invoice PDFs in a pool of worker processes so CPU-bound FPDF work
+    does not hold the GIL of the API process.
+
+    At most `queue_size` renders may be pending at once, counting renders whose
+    caller timed out but which a worker has not finished; further requests are
+    rejected with `RenderQueueFull`. With `workers=0` renders run inline on the
+    threadpool instead, which is handy for tests and tiny deployments.
+    """
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, queue_size: int = PDF_RENDER_QUEUE_SIZE,
+                 timeout: float = PDF_RENDER_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self.rendered = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        """Start the worker processes and warm them up in the background."""
+        with self._lock:
+            if self._executor is not None or self.workers <= 0:
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),  # Forking a threaded server is unsafe
+                initializer=_warm_worker,
+            )
+            # Processes are spawned on demand; one task per worker starts them all now
+            for _ in range(self.workers):
+                self._executor.submit(_noop)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, invoice_data: dict) -> bytes:
+        """Render a PDF without blocking the event loop."""
+        self._reserve()
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                try:
+                    pdf_bytes = await run_in_threadpool(generate_invoice_pdf, invoice_data)
+                finally:
+                    self._release()
+            else:
+                future = self._submit(invoice_data)
+                try:
+                    pdf_bytes = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise RenderTimeout(f"PDF rendering took longer than {self.timeout}s")
+        except RenderTimeout:
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        self._record(started)
+        return pdf_bytes
+
+    def render_sync(self, invoice_data: dict) -> bytes:
+        """Blocking variant for callers running on their own threads."""
+        self._reserve()
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                try:
+                    pdf_bytes = generate_invoice_pdf(invoice_data)
+                finally:
+                    self._release()
+            else:
+                future = self._submit(invoice_data)
+                try:
+                    pdf_bytes = future.result(timeout=self.timeout)
+                except TimeoutError:
+                    future.cancel()  # Drops it if it has not started yet
+                    with self._lock:
+                        self.timeouts += 1
+                    raise RenderTimeout(f"PDF rendering took longer than {self.timeout}s")
+        except RenderTimeout:
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        self._record(started)
+        return pdf_bytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self._pending,
+                "rendered": self.rendered,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "latency_ms": {
+                    "p50": _percentile(latencies, 0.50),
+                    "p95": _percentile(latencies, 0.95),
+                    "max": round(latencies[-1], 3) if latencies else None,
+                },
+            }
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self.rejected += 1
+                raise RenderQueueFull("Too many PDF renders queued, try again later")
+            self._pending += 1
+
+    def _submit(self, invoice_data: dict) -> "Future[bytes]":
+        # The slot is held until the worker is done with the render (or it is
+        # cancelled before starting), not just until the caller stops waiting:
+        # a render that timed out still occupies a worker
+        try:
+            self.start()
+            future = self._executor.submit(generate_invoice_pdf, invoice_data)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, started: float) -> None:
+        with self._lock:
+            self.rendered += 1
+            self._latencies.append((time.perf_counter() - started) * 1000)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+pdf_renderer = PdfRenderService()
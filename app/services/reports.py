@@ -0,0 +1,141 @@
+"""
+Revenue reporting on top of the `revenue_rollup` table.
+
+Triggers on `invoices` keep one row per (client_id, month, status) up to date, so
+reports aggregate a few hundred rollup rows instead of scanning every invoice.
+`rebuild` and `check` recompute the rollup from scratch:
+
+    python -m app.services.reports check    # compare rollup against invoices
+    python -m app.services.reports rebuild  # recompute rollup, then check it
+"""
+
+import argparse
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from app.database import db_session
+
+GROUP_COLUMNS = {"client": "client_id", "month": "month", "status": "status"}
+
+# Sums are maintained incrementally in floating point; differences below half a
+# cent are rounding noise, not drift
+TOLERANCE = 0.005
+
+_FROM_INVOICES = """
+    SELECT client_id, substr(issue_date, 1, 7) AS month, COALESCE(status, 'DRAFT') AS status,
+           COUNT(*) AS invoice_count, COALESCE(SUM(tax), 0) AS tax, COALESCE(SUM(total), 0) AS total
+    FROM invoices
+    GROUP BY 1, 2, 3
+"""
+
+
+def revenue_report(conn: sqlite3.Connection, group_by: Iterable[str] = ("client", "month", "status"),
+                   client_id: Optional[int] = None, status: Optional[str] = None,
+                   month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[dict]:
+    """Aggregate the rollup by any subset of client, month and status."""
+    columns = [GROUP_COLUMNS[name] for name in dict.fromkeys(group_by)]
+    conditions, params = [], []
+    if client_id is not None:
+        conditions.append("client_id = ?")
+        params.append(client_id)
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if month_from:
+        conditions.append("month >= ?")
+        params.append(month_from)
+    if month_to:
+        conditions.append("month <= ?")
+        params.append(month_to)
+
+    select = columns + ["SUM(invoice_count) AS invoice_count", "SUM(tax) AS tax", "SUM(total) AS total"]
+    query = f"SELECT {', '.join(select)} FROM revenue_rollup"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if columns:
+        query += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+
+    rows = []
+    for row in conn.execute(query, params).fetchall():
+        if row["invoice_count"] is None:
+            continue  # Ungrouped aggregate over no rows
+        rows.append({
+            **{column: row[column] for column in columns},
+            "invoice_count": row["invoice_count"],
+            "tax": round(row["tax"], 2),
+            "total": round(row["total"], 2),
+        })
+    return rows
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """Recompute the rollup from `invoices` in the caller's transaction; returns the row count."""
+    conn.execute("DELETE FROM revenue_rollup")
+    cursor = conn.execute(f"""
+        INSERT INTO revenue_rollup (client_id, month, status, invoice_count, tax, total)
+        {_FROM_INVOICES}
+    """)
+    return cursor.rowcount
+
+
+def check(conn: sqlite3.Connection) -> List[dict]:
+    """Buckets where the rollup disagrees with a fresh aggregate of `invoices`."""
+    expected = _by_bucket(conn.execute(_FROM_INVOICES).fetchall())
+    actual = _by_bucket(conn.execute(
+        "SELECT client_id, month, status, invoice_count, tax, total FROM revenue_rollup"
+    ).fetchall())
+
+    mismatches = []
+    for bucket in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(bucket), actual.get(bucket)
+        if (
+            want is None or have is None
+            or want["invoice_count"] != have["invoice_count"]
+            or abs(want["tax"] - have["tax"]) > TOLERANCE
+            or abs(want["total"] - have["total"]) > TOLERANCE
+        ):
+            client_id, month, status = bucket
+            mismatches.append({
+                "client_id": client_id,
+                "month": month,
+                "status": status,
+                "expected": want,
+                "actual": have,
+            })
+    return mismatches
+
+
+def _by_bucket(rows) -> Dict[tuple, dict]:
+    return {
+        (row["client_id"], row["month"], row["status"]): {
+            "invoice_count": row["invoice_count"], "tax": row["tax"], "total": row["total"]
+        }
+        for row in rows
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the revenue rollup table")
+    parser.add_argument("action", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    with db_session() as conn:
+        if args.action == "rebuild":
+            # Compare the incremental result with a fresh aggregate before replacing it
+            drift = check(conn)
+            rows = rebuild(conn)
+            print(f"Rebuilt revenue_rollup: {rows} rows ({len(drift)} buckets had drifted).")
+        mismatches = check(conn)
+
+    for mismatch in mismatches:
+        print(f"Mismatch {mismatch['client_id']}/{mismatch['month']}/{mismatch['status']}: "
+              f"expected {mismatch['expected']}, rollup has {mismatch['actual']}")
+    if mismatches:
+        return 1
+    print("revenue_rollup matches invoices.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
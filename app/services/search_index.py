@@ -0,0 +1,97 @@
+"""
+Maintenance of the `invoice_search` FTS5 index.
+
+`_insert_invoices` indexes new invoices once per batch with `index_invoices`;
+triggers keep the index in sync on updates and deletes. Invoices inserted any
+other way (seed scripts, migrations, manual SQL) are not indexed until a
+backfill picks them up:
+
+    python -m app.services.search_index check     # list unindexed and stale rows
+    python -m app.services.search_index backfill  # index what check reports
+    python -m app.services.search_index rebuild   # reindex every invoice
+"""
+
+import argparse
+import sqlite3
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from app.database import db_session
+
+# Upper bound on bound parameters per IN (...) query
+CHUNK_SIZE = 500
+
+_INDEX_ROWS = """
+    INSERT INTO invoice_search (rowid, invoice_no, client_name, product_names)
+    SELECT invoices.id, invoices.invoice_no, COALESCE(clients.name, ''), (
+        SELECT COALESCE(group_concat(name, ' '), '') FROM (
+            SELECT DISTINCT products.name FROM invoice_items
+            JOIN products ON products.id = invoice_items.product_id
+            WHERE invoice_items.invoice_id = invoices.id
+        )
+    )
+    FROM invoices LEFT JOIN clients ON clients.id = invoices.client_id
+"""
+
+
+def index_invoices(conn: sqlite3.Connection, invoice_ids: Sequence[int]) -> None:
+    """Add invoices to the index, once each and after their items exist."""
+    for start in range(0, len(invoice_ids), CHUNK_SIZE):
+        chunk = list(invoice_ids[start:start + CHUNK_SIZE])
+        placeholders = ", ".join("?" * len(chunk))
+        conn.execute(f"{_INDEX_ROWS} WHERE invoices.id IN ({placeholders})", chunk)
+
+
+def check(conn: sqlite3.Connection) -> Dict[str, List[int]]:
+    """Invoice ids missing from the index, and index rows whose invoice is gone."""
+    missing = conn.execute(
+        "SELECT id FROM invoices WHERE id NOT IN (SELECT rowid FROM invoice_search) ORDER BY id"
+    ).fetchall()
+    stale = conn.execute(
+        "SELECT rowid FROM invoice_search WHERE rowid NOT IN (SELECT id FROM invoices) ORDER BY rowid"
+    ).fetchall()
+    return {"missing": [row[0] for row in missing], "stale": [row[0] for row in stale]}
+
+
+def backfill(conn: sqlite3.Connection) -> Dict[str, List[int]]:
+    """Index the missing invoices and drop stale rows in the caller's transaction."""
+    drift = check(conn)
+    index_invoices(conn, drift["missing"])
+    for start in range(0, len(drift["stale"]), CHUNK_SIZE):
+        chunk = drift["stale"][start:start + CHUNK_SIZE]
+        conn.execute(f"DELETE FROM invoice_search WHERE rowid IN ({', '.join('?' * len(chunk))})", chunk)
+    return drift
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """Reindex every invoice from scratch in the caller's transaction; returns the row count."""
+    conn.execute("DELETE FROM invoice_search")
+    return conn.execute(_INDEX_ROWS).rowcount
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the invoice_search index")
+    parser.add_argument("action", choices=["check", "backfill", "rebuild"])
+    args = parser.parse_args(argv)
+
+    with db_session() as conn:
+        if args.action == "backfill":
+            drift = backfill(conn)
+            print(f"Indexed {len(drift['missing'])} invoices, removed {len(drift['stale'])} stale rows.")
+        elif args.action == "rebuild":
+            rows = rebuild(conn)
+            print(f"Rebuilt invoice_search: {rows} rows.")
+        drift = check(conn)
+
+    if drift["missing"]:
+        print(f"Not indexed: {len(drift['missing'])} invoices (first ids {drift['missing'][:10]})")
+    if drift["stale"]:
+        print(f"Stale: {len(drift['stale'])} rows for deleted invoices (first ids {drift['stale'][:10]})")
+    if drift["missing"] or drift["stale"]:
+        return 1
+    print("invoice_search covers every invoice.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
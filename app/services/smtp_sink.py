@@ -0,0 +1,109 @@
+import socketserver
+import threading
+from email import message_from_bytes, policy
+from typing import List, Tuple
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    # Just enough of RFC 5321 for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT
+
+    def handle(self):
+        sink = self.server.sink
+        with sink._lock:
+            sink.connections += 1
+        self._reply("220 localhost sink ready")
+        mail_from, rcpt_to = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("ascii", "replace").strip()
+            verb = command[:4].upper()
+            if verb == "EHLO":
+                self._reply("250-localhost\r\n250-8BITMIME\r\n250 SIZE 52428800")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command.split(":", 1)[1].strip(), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(command.split(":", 1)[1].strip())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                sink._store(mail_from, rcpt_to, self._read_data())
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK queued")
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]  # Undo dot-stuffing
+            lines.append(line)
+        return b"".join(lines)
+
+    def _reply(self, text: str) -> None:
+        self.wfile.write(text.encode("ascii") + b"\r\n")
+        self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPSink:
+    """
+    In-process SMTP server that accepts every message and keeps it in memory.
+    Use it in tests to exercise the real SMTP transport without a mail server.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._thread = None
+        self._lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> "LocalSMTPSink":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def received(self) -> List:
+        """Parsed `email.message.EmailMessage` objects, in arrival order."""
+        with self._lock:
+            return [message_from_bytes(raw, policy=policy.default) for _, _, raw in self.messages]
+
+    def _store(self, mail_from, rcpt_to, raw: bytes) -> None:
+        with self._lock:
+            self.messages.append((mail_from, list(rcpt_to), raw))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
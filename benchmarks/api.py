@@ -0,0 +1,252 @@
+"""
+Load test: latency and throughput of the invoice HTTP API.
+
+Seeds a database with `--invoices` invoices (10k to 1M; an existing database is
+only topped up), starts `python serve.py` on a local port with rate limiting
+turned off, and drives each scenario over real HTTP at each concurrency level
+for a fixed duration:
+
+    get      GET  /invoices/{id}
+    list     GET  /invoices?client_id=...&page_size=20
+    pdf      GET  /invoices/{id}/pdf      (random ids, so mostly cache misses)
+    create   POST /invoices
+    send     POST /invoices/{id}/send
+
+Every (scenario, concurrency) pair is printed as one JSON line with rps, p50 and
+p99. `--output` also writes the whole run, with the commit and settings it ran
+under, to a file that `python -m benchmarks.compare` checks against another run.
+
+Usage:
+    python -m benchmarks.api [--invoices 10000] [--scenarios get list pdf create send]
+                             [--concurrency 1 16 64] [--duration 10] [--warmup 2]
+                             [--workers 1] [--clients 2] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway database unless one is given explicitly, with a
+# cold PDF cache and without the per-client limits the server would enforce
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="invoice-bench-"), "bench.db"))
+os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp(prefix="invoice-bench-pdf-"))
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+import migrate  # noqa: E402
+from app.database import DATABASE_PATH, close_pool, db_session  # noqa: E402
+from app.services.invoice_numbers import reserve_in  # noqa: E402
+from app.services.search_index import index_invoices  # noqa: E402
+from benchmarks.workers import free_port, start_server  # noqa: E402
+from serve import available_cores  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["get", "list", "pdf", "create", "send"]
+EXPECTED_STATUS = {"get": 200, "list": 200, "pdf": 200, "create": 201, "send": 202}
+ISSUE_YEARS = range(2020, 2026)
+STATUSES = ["DRAFT", "SENT", "PAID", "OVERDUE"]
+
+
+def seed(count: int, clients: int = 500, products: int = 200, chunk_size: int = 10000) -> dict:
+    """Top the database up to `count` invoices; returns the id ranges to draw requests from."""
+    migrate.run_migrations("upgrade")
+    rng = random.Random(42)
+    with db_session() as conn:
+        existing_clients = conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO clients (name, address, company_reg_no) VALUES (?, ?, ?)",
+            [(f"Bench Client {n}", f"{n} Bench St", f"REG-B{n}") for n in range(existing_clients, clients)]
+        )
+        existing_products = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO products (name, price) VALUES (?, ?)",
+            [(f"Bench Product {n}", round(rng.uniform(1, 500), 2)) for n in range(existing_products, products)]
+        )
+        client_rows = conn.execute("SELECT id, address FROM clients").fetchall()
+        prices = dict(conn.execute("SELECT id, price FROM products").fetchall())
+        existing = conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0]
+
+    product_ids = list(prices)
+    for start in range(existing, count, chunk_size):
+        with db_session() as conn:
+            first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM invoices").fetchone()[0]
+            size = min(chunk_size, count - start)
+            years = [rng.choice(ISSUE_YEARS) for _ in range(size)]
+            invoice_nos = reserve_in(conn, years)
+            headers, items = [], []
+            for offset, (year, invoice_no) in enumerate(zip(years, invoice_nos)):
+                invoice_id = first_id + offset
+                client = rng.choice(client_rows)
+                total = 0.0
+                for product_id in rng.sample(product_ids, rng.randint(1, 5)):
+                    quantity = rng.randint(1, 10)
+                    line_total = prices[product_id] * quantity
+                    total += line_total
+                    items.append((invoice_id, product_id, quantity, prices[product_id], line_total))
+                month = rng.randint(1, 12)
+                headers.append((
+                    invoice_id, invoice_no, f"{year}-{month:02d}-01", f"{year}-{month:02d}-28",
+                    client["id"], client["address"], 0.0, total, rng.choice(STATUSES)
+                ))
+            conn.executemany("""
+                INSERT INTO invoices (id, invoice_no, issue_date, due_date, client_id, address, tax, total, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, headers)
+            conn.executemany(
+                "INSERT INTO invoice_items (invoice_id, product_id, quantity, unit_price, line_total) "
+                "VALUES (?, ?, ?, ?, ?)",
+                items
+            )
+            index_invoices(conn, [header[0] for header in headers])
+
+    with db_session() as conn:
+        return {
+            "invoice_ids": tuple(conn.execute("SELECT MIN(id), MAX(id) FROM invoices").fetchone()),
+            "client_ids": [row[0] for row in conn.execute("SELECT id FROM clients")],
+            "product_ids": product_ids,
+        }
+
+
+def make_request(client: httpx.AsyncClient, scenario: str, data: dict, rng: random.Random):
+    invoice_id = rng.randint(*data["invoice_ids"])
+    if scenario == "get":
+        return client.get(f"/invoices/{invoice_id}")
+    if scenario == "list":
+        return client.get("/invoices", params={"client_id": rng.choice(data["client_ids"]), "page_size": 20})
+    if scenario == "pdf":
+        return client.get(f"/invoices/{invoice_id}/pdf")
+    if scenario == "send":
+        return client.post(f"/invoices/{invoice_id}/send")
+    return client.post("/invoices", json={
+        "client_id": rng.choice(data["client_ids"]),
+        "issue_date": "2026-01-15",
+        "due_date": "2026-02-15",
+        "items": [
+            {"product_id": product_id, "quantity": rng.randint(1, 10)}
+            for product_id in rng.sample(data["product_ids"], rng.randint(1, 5))
+        ],
+    })
+
+
+def drive(port: int, scenario: str, data: dict, concurrency: int, duration: float, warmup: float,
+          seed_value: int) -> dict:
+    """One load-generator process: `concurrency` connections for `warmup` + `duration` seconds."""
+    async def run():
+        rng = random.Random(seed_value)
+        latencies = []
+        errors = 0
+        measure_from = time.perf_counter() + warmup
+        deadline = measure_from + duration
+
+        async def worker(client):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await make_request(client, scenario, data, rng)
+                    failed = response.status_code != EXPECTED_STATUS[scenario]
+                except httpx.HTTPError:
+                    failed = True
+                if started >= measure_from:
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    errors += failed
+
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return {"latencies": latencies, "errors": errors}
+
+    return asyncio.run(run())
+
+
+def run_level(port: int, scenario: str, concurrency: int, data: dict, args) -> dict:
+    clients = max(1, min(args.clients, concurrency))
+    per_client = max(1, concurrency // clients)
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        parts = pool.starmap(drive, [
+            (port, scenario, data, per_client, args.duration, args.warmup, n) for n in range(clients)
+        ])
+
+    latencies = sorted(latency for part in parts for latency in part["latencies"])
+    if not latencies:
+        raise RuntimeError(f"no {scenario} request completed within {args.duration}s")
+    return {
+        "scenario": scenario,
+        "concurrency": per_client * clients,
+        "requests": len(latencies),
+        "errors": sum(part["errors"] for part in parts),
+        "rps": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    started = time.perf_counter()
+    data = seed(args.invoices)
+    close_pool()
+    print(json.dumps({"seeded": args.invoices, "seconds": round(time.perf_counter() - started, 1)}))
+
+    meta = {
+        "commit": git_commit(),
+        "invoices": args.invoices,
+        "workers": args.workers,
+        "duration": args.duration,
+        "cores": available_cores(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "database": DATABASE_PATH,
+    }
+    results = []
+    port = free_port()
+    server = start_server(args.workers, port)
+    try:
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                result = run_level(port, scenario, concurrency, data, args)
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API latency and throughput per endpoint")
+    parser.add_argument("--invoices", type=int, default=10000, help="Invoices in the database")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS, help="Endpoints to drive")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="Open connections")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before each level")
+    parser.add_argument("--workers", type=int, default=1, help="serve.py worker processes")
+    parser.add_argument("--clients", type=int, default=2, help="Load-generator processes")
+    parser.add_argument("--output", help="Write the run as JSON for benchmarks.compare")
+    main(parser.parse_args())
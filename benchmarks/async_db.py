@@ -0,0 +1,128 @@
+"""
+Benchmark: sync (threadpool) vs async (database executor) invoice reads.
+
+Both variants serve GET /invoices/{id} through the same query helper. The sync
+variant is a plain `def` handler that checks a connection out with `db_session()`,
+so Starlette runs it on its threadpool. The async variant awaits `run_in_db`.
+The pool is sized to the threadpool (40 threads), so sync requests wait for a
+thread rather than for a connection, and both variants wait instead of being
+turned away. Requests are driven in-process with httpx at increasing concurrency.
+
+Usage:
+    python -m benchmarks.async_db [--invoices 200] [--requests 2000] [--concurrency 10 100 1000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway database unless one is given explicitly
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="invoice-bench-"), "bench.db"))
+# One connection per Starlette threadpool thread (anyio's default limit); the
+# database executor gets as many threads
+os.environ.setdefault("DB_POOL_SIZE", "40")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import migrate  # noqa: E402
+from app.database import close_pool, db_executor, db_session, run_in_db  # noqa: E402
+from app.routes.invoices import _get_invoice_internal_dict, _insert_invoices  # noqa: E402
+from app.schemas import InvoiceCreate, InvoiceItemCreate  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/invoices/{invoice_id}")
+    def get_invoice_sync(invoice_id: int):
+        with db_session() as conn:
+            return _get_invoice_internal_dict(conn, invoice_id)
+
+    @app.get("/async/invoices/{invoice_id}")
+    async def get_invoice_async(invoice_id: int):
+        return await run_in_db(_get_invoice_internal_dict, invoice_id)
+
+    return app
+
+
+def seed(count: int):
+    migrate.run_migrations("upgrade")
+    with db_session() as conn:
+        results = _insert_invoices(conn, [
+            InvoiceCreate(
+                client_id=1,
+                issue_date=date(2024, 1, 1),
+                due_date=date(2024, 2, 1),
+                items=[InvoiceItemCreate(product_id=1, quantity=n % 5 + 1)]
+            )
+            for n in range(count)
+        ])
+    return [result["id"] for result in results]
+
+
+async def run_level(app, variant, invoice_ids, total, concurrency):
+    latencies = []
+    errors = 0
+    peak_threads = threading.active_count()
+    pending = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors, peak_threads
+        for _ in pending:
+            invoice_id = random.choice(invoice_ids)
+            started = time.perf_counter()
+            response = await client.get(f"/{variant}/invoices/{invoice_id}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+            peak_threads = max(peak_threads, threading.active_count())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "variant": variant,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+        "peak_threads": peak_threads,
+    }
+
+
+async def main(args):
+    invoice_ids = seed(args.invoices)
+    app = build_app()
+    results = []
+    for concurrency in args.concurrency:
+        for variant in ("sync", "async"):
+            result = await run_level(app, variant, invoice_ids, args.requests, concurrency)
+            results.append(result)
+            print(json.dumps(result))
+    db_executor.shutdown()
+    close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sync and async database access paths")
+    parser.add_argument("--invoices", type=int, default=200, help="Invoices to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per variant and level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 1000])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Compare two `benchmarks.api --output` runs and flag regressions.
+
+Results are matched on (scenario, concurrency). A pair regresses when the
+candidate's throughput drops, or its p50 or p99 latency rises, by more than the
+threshold. p99 is noisier than p50, so it has its own (looser) threshold. One
+JSON line is printed per pair; the exit status is 1 when anything regressed, so
+the script can gate a CI job.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+                                 [--p99-threshold 0.25]
+"""
+
+import argparse
+import json
+import sys
+
+# Settings that must match for the numbers to be comparable
+COMPARABLE = ("invoices", "workers", "duration", "cores")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(baseline: float, candidate: float) -> float:
+    return round(candidate / baseline - 1, 3) if baseline else None
+
+
+def compare(baseline: dict, candidate: dict, threshold: float, p99_threshold: float) -> list:
+    candidates = {(result["scenario"], result["concurrency"]): result for result in candidate["results"]}
+    rows = []
+    for base in baseline["results"]:
+        key = (base["scenario"], base["concurrency"])
+        if key not in candidates:
+            continue
+        new = candidates[key]
+        row = {
+            "scenario": base["scenario"],
+            "concurrency": base["concurrency"],
+            "rps": change(base["rps"], new["rps"]),
+            "p50_ms": change(base["p50_ms"], new["p50_ms"]),
+            "p99_ms": change(base["p99_ms"], new["p99_ms"]),
+        }
+        reasons = []
+        if row["rps"] is not None and row["rps"] < -threshold:
+            reasons.append("rps")
+        if row["p50_ms"] is not None and row["p50_ms"] > threshold:
+            reasons.append("p50_ms")
+        if row["p99_ms"] is not None and row["p99_ms"] > p99_threshold:
+            reasons.append("p99_ms")
+        if new["errors"] > base["errors"]:
+            reasons.append("errors")
+        row["regressed"] = reasons
+        rows.append(row)
+    return rows
+
+
+def main(args) -> int:
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for setting in COMPARABLE:
+        if baseline["meta"].get(setting) != candidate["meta"].get(setting):
+            print(f"warning: runs differ in {setting}: {baseline['meta'].get(setting)} vs "
+                  f"{candidate['meta'].get(setting)}", file=sys.stderr)
+
+    rows = compare(baseline, candidate, args.threshold, args.p99_threshold)
+    for row in rows:
+        print(json.dumps(row))
+    regressed = [row for row in rows if row["regressed"]]
+    print(json.dumps({
+        "baseline": baseline["meta"].get("commit"),
+        "candidate": candidate["meta"].get("commit"),
+        "compared": len(rows),
+        "regressions": len(regressed),
+    }))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag throughput and latency regressions between two runs")
+    parser.add_argument("baseline", help="Results file of the reference commit")
+    parser.add_argument("candidate", help="Results file of the commit under test")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed rps drop / p50 rise (fraction)")
+    parser.add_argument("--p99-threshold", type=float, default=0.25, help="Allowed p99 rise (fraction)")
+    sys.exit(main(parser.parse_args()))
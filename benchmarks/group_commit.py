@@ -0,0 +1,164 @@
+"""
+Benchmark: invoice creation throughput, one transaction per request vs group commit.
+
+Both variants create invoices through the same `_create_invoice` helper. The
+"per_request" variant awaits `run_in_db`, so every request runs its own write
+transaction on a pooled connection and waits on SQLite's busy handler while
+another thread holds the write lock. The "group_commit" variant awaits
+`run_write`, which queues the mutation for the single writer thread.
+
+"http" drives the two variants in-process with httpx, so request handling on
+the event loop is part of the cost. "threads" calls them from plain threads
+(`db_session` vs `write_queue.submit`) to isolate the database side.
+
+Usage:
+    python -m benchmarks.group_commit [--requests 2000] [--concurrency 1 8 64] [--window-ms 2]
+                                      [--mode http threads]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway database unless one is given explicitly
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="invoice-bench-"), "bench.db"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import migrate  # noqa: E402
+from app.database import close_pool, db_executor, db_session, run_in_db, run_write, write_queue  # noqa: E402
+from app.routes.invoices import _create_invoice  # noqa: E402
+from app.schemas import InvoiceCreate  # noqa: E402
+
+PAYLOAD = {
+    "client_id": 1,
+    "issue_date": "2024-01-01",
+    "due_date": "2024-01-31",
+    "items": [{"product_id": 1, "quantity": 2}],
+}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/per_request/invoices", status_code=201)
+    async def create_per_request(invoice_data: InvoiceCreate):
+        return await run_in_db(_create_invoice, invoice_data)
+
+    @app.post("/group_commit/invoices", status_code=201)
+    async def create_group_commit(invoice_data: InvoiceCreate):
+        return await run_write(_create_invoice, invoice_data)
+
+    return app
+
+
+def _summary(mode, variant, total, concurrency, elapsed, latencies, errors):
+    latencies.sort()
+    return {
+        "mode": mode,
+        "variant": variant,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+    }
+
+
+def run_threads(variant, total, concurrency):
+    invoice_data = InvoiceCreate(**PAYLOAD)
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    pending = iter(range(total))
+
+    def create():
+        if variant == "per_request":
+            with db_session() as conn:
+                _create_invoice(conn, invoice_data)
+        else:
+            write_queue.submit(_create_invoice, invoice_data).result()
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                if next(pending, None) is None:
+                    return
+            started = time.perf_counter()
+            try:
+                create()
+            except Exception:
+                with lock:
+                    errors += 1
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _summary("threads", variant, total, concurrency, time.perf_counter() - started, latencies, errors)
+
+
+async def run_level(app, variant, total, concurrency):
+    latencies = []
+    errors = 0
+    pending = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            response = await client.post(f"/{variant}/invoices", json=PAYLOAD)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 201
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return _summary("http", variant, total, concurrency, elapsed, latencies, errors)
+
+
+async def main(args):
+    migrate.run_migrations("upgrade")
+    write_queue.window = args.window_ms / 1000
+    app = build_app()
+    results = []
+    for mode in args.mode:
+        for concurrency in args.concurrency:
+            for variant in ("per_request", "group_commit"):
+                if mode == "http":
+                    result = await run_level(app, variant, args.requests, concurrency)
+                else:
+                    result = run_threads(variant, args.requests, concurrency)
+                results.append(result)
+                print(json.dumps(result))
+    print(json.dumps({"write_queue": write_queue.stats()}))
+    write_queue.shutdown()
+    db_executor.shutdown()
+    close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-request write transactions with group commit")
+    parser.add_argument("--requests", type=int, default=2000, help="Invoices to create per variant and level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--window-ms", type=float, default=2.0, help="Group-commit window")
+    parser.add_argument("--mode", nargs="+", choices=["http", "threads"], default=["http", "threads"])
+    asyncio.run(main(parser.parse_args()))
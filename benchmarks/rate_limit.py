@@ -0,0 +1,103 @@
+"""
+Benchmark: per-request cost of the rate-limit check, by storage backend.
+
+"storage" times one limits hit (fixed window) straight against the storage.
+"request" times GET requests to a minimal limited endpoint, driven in-process
+with httpx, and reports the overhead over the same endpoint with the limiter
+disabled. Backends: memory:// (per process) and the shared sqlite:// file.
+
+Usage:
+    python -m benchmarks.rate_limit [--hits 20000] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The app's own limiter is not exercised; keep it from creating its counter file
+os.environ.setdefault("RATE_LIMIT_STORAGE_URI", "memory://")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import FixedWindowRateLimiter  # noqa: E402
+from slowapi import Limiter  # noqa: E402
+from slowapi.util import get_remote_address  # noqa: E402
+
+# Registers the sqlite:// scheme; imported by name so the local `app` stays free
+importlib.import_module("app.rate_limiter")
+
+BACKENDS = {
+    "memory": "memory://",
+    "sqlite": "sqlite://" + os.path.join(tempfile.mkdtemp(prefix="ratelimit-bench-"), "ratelimit.db"),
+}
+
+
+def bench_storage(uri: str, hits: int) -> float:
+    strategy = FixedWindowRateLimiter(storage_from_string(uri))
+    item = parse(f"{hits * 2}/minute")
+    strategy.hit(item, "bench")  # Warm up
+    started = time.perf_counter()
+    for _ in range(hits):
+        strategy.hit(item, "bench")
+    return (time.perf_counter() - started) / hits
+
+
+def build_app(uri: str, enabled: bool) -> FastAPI:
+    limiter = Limiter(key_func=get_remote_address, storage_uri=uri, enabled=enabled)
+    app = FastAPI()
+    app.state.limiter = limiter
+
+    @app.get("/limited")
+    @limiter.limit("1000000/minute")
+    async def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+async def bench_requests(app: FastAPI, total: int) -> list:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/limited")  # Warm up
+        for _ in range(total):
+            started = time.perf_counter()
+            response = await client.get("/limited")
+            latencies.append((time.perf_counter() - started) * 1e6)
+            response.raise_for_status()
+    return latencies
+
+
+async def main(args):
+    baseline = statistics.median(await bench_requests(build_app("memory://", enabled=False), args.requests))
+    results = []
+    for name, uri in BACKENDS.items():
+        latencies = await bench_requests(build_app(uri, enabled=True), args.requests)
+        latencies.sort()
+        result = {
+            "backend": name,
+            "storage_hit_us": round(bench_storage(uri, args.hits) * 1e6, 2),
+            "request_p50_us": round(statistics.median(latencies), 1),
+            "request_p99_us": round(latencies[int(0.99 * (len(latencies) - 1))], 1),
+            "overhead_p50_us": round(statistics.median(latencies) - baseline, 1),
+        }
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure rate-limit check overhead per request")
+    parser.add_argument("--hits", type=int, default=20000, help="Storage-level hits per backend")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per backend")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,155 @@
+"""
+Benchmark: invoice search latency, FTS5 index vs LIKE scan.
+
+Seeds a throwaway database with synthetic invoices (the insert triggers fill the
+search index), then times the first page of results for a few query shapes:
+an invoice-number fragment, a client word, a product word and a two-term query.
+"fts" is the /invoices/search helper (ranked page plus total count), also timed
+without the count and with sort=newest; "like" is the substring scan a search
+endpoint would need without the index.
+
+Usage:
+    python -m benchmarks.search [--invoices 1000000] [--repeat 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway database unless one is given explicitly
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="invoice-bench-"), "bench.db"))
+
+import migrate  # noqa: E402
+from app.database import close_pool, db_session  # noqa: E402
+from app.routes.invoices import _fts_query, _search_invoices  # noqa: E402
+from app.services.invoice_numbers import format_invoice_no  # noqa: E402
+from app.services.search_index import index_invoices  # noqa: E402
+
+WORDS = [
+    "Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Tyrell", "Cyberdyne", "Soylent", "Hooli",
+    "Vandelay", "Wonka", "Gringotts", "Oscorp", "Monarch", "Nakatomi", "Massive", "Dynamic", "Pied", "Piper",
+]
+KINDS = ["Consulting", "Licence", "Support", "Hosting", "Training", "Audit", "Design", "Widget", "Gadget", "Sprocket"]
+
+LIKE_QUERY = """
+    SELECT invoices.* FROM invoices
+    JOIN clients ON clients.id = invoices.client_id
+    WHERE invoices.invoice_no LIKE :pattern
+       OR clients.name LIKE :pattern
+       OR EXISTS (
+           SELECT 1 FROM invoice_items ii JOIN products p ON p.id = ii.product_id
+           WHERE ii.invoice_id = invoices.id AND p.name LIKE :pattern
+       )
+    ORDER BY invoices.id
+    LIMIT :limit
+"""
+
+
+def seed(count: int, chunk_size: int = 10000):
+    migrate.run_migrations("upgrade")
+    rng = random.Random(42)
+    with db_session() as conn:
+        client_ids = [
+            conn.execute(
+                "INSERT INTO clients (name, address, company_reg_no) VALUES (?, '1 Bench St', ?)",
+                (f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}", f"REG-{n}")
+            ).lastrowid
+            for n in range(500)
+        ]
+        product_ids = [
+            conn.execute(
+                "INSERT INTO products (name, price) VALUES (?, ?)",
+                (f"{rng.choice(WORDS)} {rng.choice(KINDS)} {n}", round(rng.uniform(1, 500), 2))
+            ).lastrowid
+            for n in range(200)
+        ]
+
+    for start in range(0, count, chunk_size):
+        with db_session() as conn:
+            invoice_ids = []
+            for n in range(start, min(start + chunk_size, count)):
+                invoice_id = conn.execute("""
+                    INSERT INTO invoices (invoice_no, issue_date, due_date, client_id, address, tax, total)
+                    VALUES (?, '2024-01-01', '2024-01-31', ?, '1 Bench St', 0, 0)
+                """, (format_invoice_no(2024, n + 1), rng.choice(client_ids))).lastrowid
+                conn.executemany(
+                    "INSERT INTO invoice_items (invoice_id, product_id, quantity, unit_price, line_total) "
+                    "VALUES (?, ?, 1, 0, 0)",
+                    [(invoice_id, product_id) for product_id in rng.sample(product_ids, rng.randint(1, 3))]
+                )
+                invoice_ids.append(invoice_id)
+            index_invoices(conn, invoice_ids)
+    with db_session() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO invoice_sequences (year, next_value) VALUES (2024, ?)", (count + 1,)
+        )
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # Warm up
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+    }
+
+
+def main(args):
+    started = time.perf_counter()
+    seed(args.invoices)
+    print(json.dumps({"seeded": args.invoices, "seconds": round(time.perf_counter() - started, 1)}))
+
+    queries = {
+        "invoice_no_fragment": f"{args.invoices // 2:06d}",
+        "client_word": "Nakatomi",
+        "product_word": "Sprocket",
+        "two_terms": "Nakatomi Sprocket",
+    }
+    results = []
+    with db_session() as conn:
+        for shape, q in queries.items():
+            match = _fts_query(q)
+            pattern = f"%{q.split()[0]}%"
+            result = {
+                "query": shape,
+                "q": q,
+                "matches": conn.execute(
+                    "SELECT COUNT(*) FROM invoice_search WHERE invoice_search MATCH ?", (match,)
+                ).fetchone()[0],
+                "fts": measure(lambda: _search_invoices(conn, match, 1, 10), args.repeat),
+                "fts_without_total": measure(
+                    lambda: _search_invoices(conn, match, 1, 10, with_total=False), args.repeat
+                ),
+                "fts_newest_without_total": measure(
+                    lambda: _search_invoices(conn, match, 1, 10, "newest", False), args.repeat
+                ),
+            }
+            if args.like:
+                # Single-term LIKE only; the scan cost dominates either way
+                result["like"] = measure(
+                    lambda: conn.execute(LIKE_QUERY, {"pattern": pattern, "limit": 10}).fetchall(), args.repeat
+                )
+            results.append(result)
+            print(json.dumps(result))
+    close_pool()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure invoice search latency")
+    parser.add_argument("--invoices", type=int, default=100000, help="Invoices to seed")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per query")
+    parser.add_argument("--no-like", dest="like", action="store_false", help="Skip the LIKE scan baseline")
+    main(parser.parse_args())
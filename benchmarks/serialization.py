@@ -0,0 +1,114 @@
+"""
+Microbenchmark: per-invoice serialization cost of a page of invoices.
+
+"before" is the previous path: hydrated dicts -> InvoiceResponse models ->
+FastAPI's response_model validation and jsonable_encoder -> JSONResponse.
+"after" is the fast path: hydrated dicts -> ORJSONResponse in one pass.
+No database is involved; pages are built from synthetic hydrated invoices.
+
+Usage:
+    python -m benchmarks.serialization [--page-sizes 10 100 1000] [--items 5] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.routes.invoices import _invoice_json  # noqa: E402
+from app.schemas import InvoiceResponse, PaginatedInvoiceResponse  # noqa: E402
+
+CLIENT = {"id": 1, "name": "Acme Corp", "address": "1 Main St", "company_reg_no": "REG-001"}
+
+
+def make_invoice(invoice_id: int, items: int) -> dict:
+    lines = [
+        {
+            "id": invoice_id * 100 + n,
+            "product": {"id": n + 1, "name": f"Product {n + 1}", "price": 9.99 + n},
+            "quantity": n + 1,
+            "unit_price": 9.99 + n,
+            "line_total": (9.99 + n) * (n + 1),
+        }
+        for n in range(items)
+    ]
+    return {
+        "id": invoice_id,
+        "invoice_no": f"INV-{invoice_id:08X}",
+        "issue_date": "2024-01-01",
+        "due_date": "2024-01-31",
+        "client": CLIENT,
+        "items": lines,
+        "tax": 1.5,
+        "total": sum(line["line_total"] for line in lines) + 1.5,
+        "address_snapshot": CLIENT["address"],
+        "status": "SENT",
+    }
+
+
+def make_page(size: int, items: int) -> dict:
+    return {
+        "items": [make_invoice(n + 1, items) for n in range(size)],
+        "total": size,
+        "page": 1,
+        "page_size": size,
+        "total_pages": 1,
+        "next_cursor": None,
+    }
+
+
+_FIELD = create_response_field(name="Response_list_invoices", type_=PaginatedInvoiceResponse)
+_LOOP = asyncio.new_event_loop()
+
+
+def before(page: dict) -> bytes:
+    model = PaginatedInvoiceResponse(**{**page, "items": [InvoiceResponse(**data) for data in page["items"]]})
+    content = _LOOP.run_until_complete(serialize_response(field=_FIELD, response_content=model, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def after(page: dict) -> bytes:
+    return _invoice_json(page).body
+
+
+def measure(fn, page: dict, repeat: int) -> float:
+    fn(page)  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(page)
+    return (time.perf_counter() - started) / repeat
+
+
+def main(args):
+    results = []
+    for size in args.page_sizes:
+        page = make_page(size, args.items)
+        assert json.loads(before(page)) == json.loads(after(page)), "wire formats differ"
+        old = measure(before, page, args.repeat)
+        new = measure(after, page, args.repeat)
+        result = {
+            "page_size": size,
+            "items_per_invoice": args.items,
+            "before_us_per_invoice": round(old / size * 1e6, 2),
+            "after_us_per_invoice": round(new / size * 1e6, 2),
+            "speedup": round(old / new, 1),
+        }
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare invoice response serialization paths")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--items", type=int, default=5, help="Line items per invoice")
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
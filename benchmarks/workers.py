@@ -0,0 +1,135 @@
+"""
+Load test: throughput of `serve.py` as the worker count grows.
+
+Seeds a throwaway database, then for each worker count starts `python serve.py
+--workers N` on a local port and drives GET /invoices/{id} over real HTTP from
+several load-generator processes for a fixed duration. Throughput only scales
+while there are idle cores left for the extra workers (and for the load
+generators themselves), so run it on a machine with at least 4 cores.
+
+Usage:
+    python -m benchmarks.workers [--workers 1 2 4] [--invoices 1000] [--duration 10]
+                                 [--concurrency 64] [--clients 4]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway database unless one is given explicitly
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(prefix="invoice-bench-"), "bench.db"))
+
+import httpx  # noqa: E402
+
+from benchmarks.async_db import seed  # noqa: E402
+from serve import available_cores  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            # Give the remaining workers time to finish their lifespan warmup
+            time.sleep(1 + 0.25 * workers)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def drive(port: int, invoice_ids: list, concurrency: int, duration: float) -> dict:
+    """One load-generator process: `concurrency` connections for `duration` seconds."""
+    async def run():
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker(client):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f"/invoices/{random.choice(invoice_ids)}")
+                    errors += response.status_code != 200
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return {"latencies": latencies, "errors": errors}
+
+    return asyncio.run(run())
+
+
+def run_level(workers: int, invoice_ids: list, args) -> dict:
+    port = free_port()
+    server = start_server(workers, port)
+    try:
+        per_client = max(1, args.concurrency // args.clients)
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            parts = pool.starmap(drive, [(port, invoice_ids, per_client, args.duration)] * args.clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = sorted(latency for part in parts for latency in part["latencies"])
+    return {
+        "workers": workers,
+        "concurrency": per_client * args.clients,
+        "requests": len(latencies),
+        "errors": sum(part["errors"] for part in parts),
+        "rps": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+    }
+
+
+def main(args):
+    invoice_ids = seed(args.invoices)
+    results = []
+    for workers in args.workers:
+        result = run_level(workers, invoice_ids, args)
+        if results:
+            result["speedup"] = round(result["rps"] / results[0]["rps"], 2)
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+if __name__ == "__main__":
+    cores = available_cores()
+    parser = argparse.ArgumentParser(description="Measure throughput against the worker count")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, max(1, cores // 2), cores}), help="Worker counts to compare")
+    parser.add_argument("--invoices", type=int, default=1000, help="Invoices to seed")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="Open connections across all clients")
+    parser.add_argument("--clients", type=int, default=4, help="Load-generator processes")
+    main(parser.parse_args())
@@ -0,0 +1,77 @@
+"""
+Migration: Add secondary indexes for invoice access paths
+Version: 004
+Description: Adds composite and covering indexes for the invoice list filters, keyset
+pagination and item hydration, then refreshes planner statistics with ANALYZE.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+INDEXES = [
+    # Default listing order and keyset seek on (issue_date, id)
+    ("idx_invoices_issue_date_id", "invoices (issue_date, id)"),
+    # client_id / status filters, still ordered for keyset pagination
+    ("idx_invoices_client_issue_date", "invoices (client_id, issue_date, id)"),
+    ("idx_invoices_status_issue_date", "invoices (status, issue_date, id)"),
+    # Item hydration by invoice_id without touching the table (covering)
+    ("idx_invoice_items_invoice", "invoice_items (invoice_id, product_id, quantity)"),
+    # Foreign key checks when products change
+    ("idx_invoice_items_product", "invoice_items (product_id)"),
+]
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("004_add_invoice_indexes",))
+    if cursor.fetchone():
+        print("Migration 004_add_invoice_indexes already applied. Skipping.")
+        conn.close()
+        return
+
+    for name, definition in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("004_add_invoice_indexes",))
+
+    conn.commit()
+
+    # Refresh planner statistics so the new indexes are picked up
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    print("Migration 004_add_invoice_indexes applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for name, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("004_add_invoice_indexes",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 004_add_invoice_indexes reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,81 @@
+"""
+Migration: Add catalog generation counter
+Version: 005
+Description: Adds a single-row catalog_generation table and triggers that bump it whenever
+clients or products change, so in-process catalog caches know when to reload.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+CATALOG_TABLES = ("clients", "products")
+EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("005_add_catalog_generation",))
+    if cursor.fetchone():
+        print("Migration 005_add_catalog_generation already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO catalog_generation (id, generation) VALUES (1, 1)")
+
+    for table in CATALOG_TABLES:
+        for event in EVENTS:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog_generation
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE catalog_generation SET generation = generation + 1 WHERE id = 1;
+                END
+            """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("005_add_catalog_generation",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 005_add_catalog_generation applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for table in CATALOG_TABLES:
+        for event in EVENTS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{event.lower()}_catalog_generation")
+    cursor.execute("DROP TABLE IF EXISTS catalog_generation")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("005_add_catalog_generation",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 005_add_catalog_generation reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,77 @@
+"""
+Migration: Create outbox table
+Version: 006
+Description: Adds the transactional outbox used to hand work (such as sending invoices)
+to background workers, with retry bookkeeping and a claim index.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("006_create_outbox",))
+    if cursor.fetchone():
+        print("Migration 006_create_outbox already applied. Skipping.")
+        conn.close()
+        return
+
+    # status: PENDING -> PROCESSING -> DONE | FAILED (back to PENDING on a retry).
+    # available_at is a unix timestamp: when a PENDING job may run next, or when the
+    # lease of a PROCESSING job expires and another worker may reclaim it.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            invoice_id INTEGER,
+            payload TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 5,
+            available_at REAL NOT NULL,
+            last_error TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status_available ON outbox (status, available_at)")
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("006_create_outbox",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 006_create_outbox applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TABLE IF EXISTS outbox")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("006_create_outbox",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 006_create_outbox reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
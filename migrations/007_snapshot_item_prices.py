@@ -0,0 +1,107 @@
+"""
+Migration: Snapshot unit price and line total on invoice items
+Version: 007
+Description: Adds unit_price and line_total columns to invoice_items, backfills them in
+chunks from the current product prices and extends the covering hydration index, so
+reads no longer depend on (or change with) the products table.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+# Rows updated per transaction while backfilling, so writers are never blocked for long
+BACKFILL_CHUNK_SIZE = 5000
+
+HYDRATION_INDEX = "idx_invoice_items_invoice"
+HYDRATION_COLUMNS = "invoice_id, product_id, quantity, unit_price, line_total"
+# Definition from 004, restored on downgrade
+PREVIOUS_HYDRATION_COLUMNS = "invoice_id, product_id, quantity"
+
+def backfill(conn, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Fill missing snapshots in id ranges of `chunk_size`, committing after each one."""
+    updated = 0
+    last_id = 0
+    while True:
+        upper = conn.execute("""
+            SELECT MAX(id) FROM (
+                SELECT id FROM invoice_items WHERE id > ? ORDER BY id LIMIT ?
+            )
+        """, (last_id, chunk_size)).fetchone()[0]
+        if upper is None:
+            return updated
+        cursor = conn.execute("""
+            UPDATE invoice_items
+            SET unit_price = (SELECT price FROM products WHERE products.id = invoice_items.product_id),
+                line_total = quantity * (SELECT price FROM products WHERE products.id = invoice_items.product_id)
+            WHERE id > ? AND id <= ? AND unit_price IS NULL
+        """, (last_id, upper))
+        conn.commit()
+        updated += cursor.rowcount
+        last_id = upper
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("007_snapshot_item_prices",))
+    if cursor.fetchone():
+        print("Migration 007_snapshot_item_prices already applied. Skipping.")
+        conn.close()
+        return
+
+    # Columns may already exist if a previous run was interrupted mid-backfill
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(invoice_items)")}
+    if "unit_price" not in columns:
+        cursor.execute("ALTER TABLE invoice_items ADD COLUMN unit_price REAL")
+    if "line_total" not in columns:
+        cursor.execute("ALTER TABLE invoice_items ADD COLUMN line_total REAL")
+    conn.commit()
+
+    backfill(conn)
+
+    cursor.execute(f"DROP INDEX IF EXISTS {HYDRATION_INDEX}")
+    cursor.execute(f"CREATE INDEX {HYDRATION_INDEX} ON invoice_items ({HYDRATION_COLUMNS})")
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("007_snapshot_item_prices",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 007_snapshot_item_prices applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute(f"DROP INDEX IF EXISTS {HYDRATION_INDEX}")
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(invoice_items)")}
+    if "line_total" in columns:
+        cursor.execute("ALTER TABLE invoice_items DROP COLUMN line_total")
+    if "unit_price" in columns:
+        cursor.execute("ALTER TABLE invoice_items DROP COLUMN unit_price")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {HYDRATION_INDEX} ON invoice_items ({PREVIOUS_HYDRATION_COLUMNS})")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("007_snapshot_item_prices",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 007_snapshot_item_prices reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
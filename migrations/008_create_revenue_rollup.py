@@ -0,0 +1,133 @@
+"""
+Migration: Create revenue rollup table
+Version: 008
+Description: Adds revenue_rollup, one row per (client_id, month, status) with invoice
+count, tax and total, kept up to date by triggers on invoices, and fills it from the
+existing invoices.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+TRIGGERS = ("trg_invoices_insert_rollup", "trg_invoices_delete_rollup", "trg_invoices_update_rollup")
+
+# Bucket of an invoice row; `ref` is NEW or OLD
+def _bucket(ref):
+    return f"{ref}.client_id, substr({ref}.issue_date, 1, 7), COALESCE({ref}.status, 'DRAFT')"
+
+def _add(ref):
+    return f"""
+        INSERT INTO revenue_rollup (client_id, month, status, invoice_count, tax, total)
+        VALUES ({_bucket(ref)}, 1, COALESCE({ref}.tax, 0), COALESCE({ref}.total, 0))
+        ON CONFLICT (client_id, month, status) DO UPDATE SET
+            invoice_count = invoice_count + 1,
+            tax = tax + excluded.tax,
+            total = total + excluded.total;
+    """
+
+def _subtract(ref):
+    return f"""
+        UPDATE revenue_rollup SET
+            invoice_count = invoice_count - 1,
+            tax = tax - COALESCE({ref}.tax, 0),
+            total = total - COALESCE({ref}.total, 0)
+        WHERE (client_id, month, status) = ({_bucket(ref)});
+        DELETE FROM revenue_rollup
+        WHERE (client_id, month, status) = ({_bucket(ref)}) AND invoice_count <= 0;
+    """
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("008_create_revenue_rollup",))
+    if cursor.fetchone():
+        print("Migration 008_create_revenue_rollup already applied. Skipping.")
+        conn.close()
+        return
+
+    # month is the 'YYYY-MM' prefix of issue_date
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS revenue_rollup (
+            client_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            status TEXT NOT NULL,
+            invoice_count INTEGER NOT NULL DEFAULT 0,
+            tax REAL NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (client_id, month, status)
+        ) WITHOUT ROWID
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_insert_rollup
+        AFTER INSERT ON invoices
+        BEGIN
+            {_add("NEW")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_delete_rollup
+        AFTER DELETE ON invoices
+        BEGIN
+            {_subtract("OLD")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_update_rollup
+        AFTER UPDATE OF client_id, issue_date, status, tax, total ON invoices
+        BEGIN
+            {_subtract("OLD")}
+            {_add("NEW")}
+        END
+    """)
+
+    # Seed from the invoices that already exist
+    cursor.execute("DELETE FROM revenue_rollup")
+    cursor.execute("""
+        INSERT INTO revenue_rollup (client_id, month, status, invoice_count, tax, total)
+        SELECT client_id, substr(issue_date, 1, 7), COALESCE(status, 'DRAFT'),
+               COUNT(*), COALESCE(SUM(tax), 0), COALESCE(SUM(total), 0)
+        FROM invoices
+        GROUP BY 1, 2, 3
+    """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("008_create_revenue_rollup",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 008_create_revenue_rollup applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS revenue_rollup")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("008_create_revenue_rollup",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 008_create_revenue_rollup reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,59 @@
+"""
+Migration: Add index for the overdue sweeper
+Version: 009
+Description: Adds an index on invoices (status, due_date) so the overdue sweeper can
+find SENT invoices past their due date without scanning the table.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("009_add_overdue_index",))
+    if cursor.fetchone():
+        print("Migration 009_add_overdue_index already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_status_due_date ON invoices (status, due_date)")
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("009_add_overdue_index",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 009_add_overdue_index applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP INDEX IF EXISTS idx_invoices_status_due_date")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("009_add_overdue_index",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 009_add_overdue_index reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,78 @@
+"""
+Migration: Add invoice version counter
+Version: 010
+Description: Adds invoices.version, bumped by a trigger on every mutation, to drive ETag
+headers.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+TRIGGERS = ("trg_invoices_update_version",)
+
+# Every column a mutation can change; version itself is excluded so
+# the bump does not re-fire the trigger
+VERSIONED_COLUMNS = "invoice_no, issue_date, due_date, client_id, address, tax, total, status"
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("010_add_invoice_versions",))
+    if cursor.fetchone():
+        print("Migration 010_add_invoice_versions already applied. Skipping.")
+        conn.close()
+        return
+
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(invoices)")}
+    if "version" not in columns:
+        cursor.execute("ALTER TABLE invoices ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_update_version
+        AFTER UPDATE OF {VERSIONED_COLUMNS} ON invoices
+        BEGIN
+            UPDATE invoices SET version = OLD.version + 1 WHERE id = NEW.id;
+        END
+    """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("010_add_invoice_versions",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 010_add_invoice_versions applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(invoices)")}
+    if "version" in columns:
+        cursor.execute("ALTER TABLE invoices DROP COLUMN version")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("010_add_invoice_versions",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 010_add_invoice_versions reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
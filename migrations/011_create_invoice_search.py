@@ -0,0 +1,161 @@
+"""
+Migration: Create invoice full-text search index
+Version: 011
+Description: Adds the invoice_search FTS5 table (invoice number, client name and product
+names, keyed by invoice id), triggers on invoices, invoice_items, clients and products
+that keep it in sync, and indexes the existing invoices.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+TRIGGERS = (
+    "trg_invoices_insert_search",
+    "trg_invoices_delete_search",
+    "trg_invoices_update_search",
+    "trg_invoice_items_insert_search",
+    "trg_invoice_items_delete_search",
+    "trg_invoice_items_update_search",
+    "trg_clients_update_search",
+    "trg_products_update_search",
+)
+
+# Distinct product names on one invoice, space separated
+def _product_names(invoice_id):
+    return f"""(
+        SELECT COALESCE(group_concat(name, ' '), '') FROM (
+            SELECT DISTINCT p.name FROM invoice_items ii
+            JOIN products p ON p.id = ii.product_id
+            WHERE ii.invoice_id = {invoice_id}
+        )
+    )"""
+
+def _client_name(client_id):
+    return f"COALESCE((SELECT name FROM clients WHERE id = {client_id}), '')"
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("011_create_invoice_search",))
+    if cursor.fetchone():
+        print("Migration 011_create_invoice_search already applied. Skipping.")
+        conn.close()
+        return
+
+    # The trigram tokenizer matches any substring of 3+ characters, so fragments of
+    # invoice numbers ("3F2A" in "INV-93F2A1C0") match as well as words in names
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS invoice_search USING fts5(
+            invoice_no, client_name, product_names,
+            tokenize = 'trigram'
+        )
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_insert_search
+        AFTER INSERT ON invoices
+        BEGIN
+            INSERT INTO invoice_search (rowid, invoice_no, client_name, product_names)
+            VALUES (NEW.id, NEW.invoice_no, {_client_name("NEW.client_id")}, {_product_names("NEW.id")});
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_delete_search
+        AFTER DELETE ON invoices
+        BEGIN
+            DELETE FROM invoice_search WHERE rowid = OLD.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_update_search
+        AFTER UPDATE OF invoice_no, client_id ON invoices
+        BEGIN
+            UPDATE invoice_search
+            SET invoice_no = NEW.invoice_no, client_name = {_client_name("NEW.client_id")}
+            WHERE rowid = NEW.id;
+        END
+    """)
+    for event, ref in (("insert", "NEW"), ("delete", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_invoice_items_{event}_search
+            AFTER {event.upper()} ON invoice_items
+            BEGIN
+                UPDATE invoice_search SET product_names = {_product_names(f"{ref}.invoice_id")}
+                WHERE rowid = {ref}.invoice_id;
+            END
+        """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoice_items_update_search
+        AFTER UPDATE OF invoice_id, product_id ON invoice_items
+        BEGIN
+            UPDATE invoice_search SET product_names = {_product_names("OLD.invoice_id")}
+            WHERE rowid = OLD.invoice_id;
+            UPDATE invoice_search SET product_names = {_product_names("NEW.invoice_id")}
+            WHERE rowid = NEW.invoice_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_clients_update_search
+        AFTER UPDATE OF name ON clients
+        BEGIN
+            UPDATE invoice_search SET client_name = NEW.name
+            WHERE rowid IN (SELECT id FROM invoices WHERE client_id = NEW.id);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_search
+        AFTER UPDATE OF name ON products
+        BEGIN
+            UPDATE invoice_search SET product_names = {_product_names("invoice_search.rowid")}
+            WHERE rowid IN (SELECT invoice_id FROM invoice_items WHERE product_id = NEW.id);
+        END
+    """)
+
+    # Index the invoices that already exist
+    cursor.execute("DELETE FROM invoice_search")
+    cursor.execute(f"""
+        INSERT INTO invoice_search (rowid, invoice_no, client_name, product_names)
+        SELECT id, invoice_no, {_client_name("invoices.client_id")}, {_product_names("invoices.id")}
+        FROM invoices
+    """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("011_create_invoice_search",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 011_create_invoice_search applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS invoice_search")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("011_create_invoice_search",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 011_create_invoice_search reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,74 @@
+"""
+Migration: Create per-year invoice number sequences
+Version: 012
+Description: Adds invoice_sequences, the next free invoice number for each issue year
+(invoice numbers are INV-YYYY-NNNNNN), and starts each year after any invoice that
+already uses that format.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("012_create_invoice_sequences",))
+    if cursor.fetchone():
+        print("Migration 012_create_invoice_sequences already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS invoice_sequences (
+            year INTEGER PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    """)
+
+    # Continue after sequential numbers that already exist (e.g. after a downgrade)
+    cursor.execute("""
+        INSERT OR IGNORE INTO invoice_sequences (year, next_value)
+        SELECT CAST(substr(invoice_no, 5, 4) AS INTEGER), MAX(CAST(substr(invoice_no, 10) AS INTEGER)) + 1
+        FROM invoices
+        WHERE invoice_no GLOB 'INV-[0-9][0-9][0-9][0-9]-[0-9]*'
+        GROUP BY 1
+    """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("012_create_invoice_sequences",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 012_create_invoice_sequences applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TABLE IF EXISTS invoice_sequences")
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("012_create_invoice_sequences",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 012_create_invoice_sequences reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,114 @@
+"""
+Migration: Index new invoices for search once per batch
+Version: 013
+Description: Drops the invoice_search insert triggers on invoices and invoice_items. The
+item trigger rebuilt an invoice's product_names (and rewrote its FTS row) once per item;
+_insert_invoices now indexes each batch of new invoices with one INSERT ... SELECT after
+its items are written. Invoices inserted any other way are picked up by
+`python -m app.services.search_index backfill`. The item delete trigger now skips the
+recompute when the invoice itself is already gone. Deletes, renames and item updates
+keep their triggers.
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import DATABASE_PATH
+
+# Distinct product names on one invoice, space separated
+def _product_names(invoice_id):
+    return f"""(
+        SELECT COALESCE(group_concat(name, ' '), '') FROM (
+            SELECT DISTINCT p.name FROM invoice_items ii
+            JOIN products p ON p.id = ii.product_id
+            WHERE ii.invoice_id = {invoice_id}
+        )
+    )"""
+
+def _client_name(client_id):
+    return f"COALESCE((SELECT name FROM clients WHERE id = {client_id}), '')"
+
+def upgrade():
+    """Apply the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    # Check if migration applied
+    cursor.execute("SELECT 1 FROM _migrations WHERE name = ?", ("013_index_search_per_batch",))
+    if cursor.fetchone():
+        print("Migration 013_index_search_per_batch already applied. Skipping.")
+        conn.close()
+        return
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_invoices_insert_search")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_invoice_items_insert_search")
+    # Deleting an invoice deletes its items: recomputing product_names for a row
+    # that is gone would run once per item for nothing
+    cursor.execute("DROP TRIGGER IF EXISTS trg_invoice_items_delete_search")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_invoice_items_delete_search
+        AFTER DELETE ON invoice_items
+        WHEN EXISTS (SELECT 1 FROM invoices WHERE id = OLD.invoice_id)
+        BEGIN
+            UPDATE invoice_search SET product_names = {_product_names("OLD.invoice_id")}
+            WHERE rowid = OLD.invoice_id;
+        END
+    """)
+
+    # Record migration
+    cursor.execute("INSERT INTO _migrations (name) VALUES (?)", ("013_index_search_per_batch",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 013_index_search_per_batch applied successfully.")
+
+def downgrade():
+    """Revert the migration."""
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_invoice_items_delete_search")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_invoice_items_delete_search
+        AFTER DELETE ON invoice_items
+        BEGIN
+            UPDATE invoice_search SET product_names = {_product_names("OLD.invoice_id")}
+            WHERE rowid = OLD.invoice_id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoices_insert_search
+        AFTER INSERT ON invoices
+        BEGIN
+            INSERT INTO invoice_search (rowid, invoice_no, client_name, product_names)
+            VALUES (NEW.id, NEW.invoice_no, {_client_name("NEW.client_id")}, {_product_names("NEW.id")});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_invoice_items_insert_search
+        AFTER INSERT ON invoice_items
+        BEGIN
+            UPDATE invoice_search SET product_names = {_product_names("NEW.invoice_id")}
+            WHERE rowid = NEW.invoice_id;
+        END
+    """)
+
+    cursor.execute("DELETE FROM _migrations WHERE name = ?", ("013_index_search_per_batch",))
+
+    conn.commit()
+    conn.close()
+    print("Migration 013_index_search_per_batch reverted successfully.")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["upgrade", "downgrade"])
+    args = parser.parse_args()
+    if args.action == "upgrade":
+        upgrade()
+    elif args.action == "downgrade":
+        downgrade()
@@ -0,0 +1,86 @@
+"""
+Production entry point: migrate once, then serve with several uvicorn workers.
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+The parent process applies pending migrations and puts the database (and the
+rate-limit counter file) in WAL mode before any worker starts, so workers never
+race each other over schema changes or the journal mode switch. Each worker then
+warms itself up in the app lifespan: it preloads the catalog, opens its pooled
+connections and starts its PDF render processes.
+
+The outbox workers and the overdue sweeper run in one worker only, the holder of
+the lock file at BACKGROUND_LOCK_PATH; another worker takes over if it exits.
+The PDF cache size bound is kept per worker, so its shared directory can grow to
+N x PDF_CACHE_MAX_BYTES.
+"""
+
+import argparse
+import os
+import sqlite3
+from typing import List, Optional
+
+import uvicorn
+
+from app.database import DATABASE_PATH, DB_JOURNAL_MODE
+from migrate import run_migrations
+
+APP = "app.main:app"
+
+
+def available_cores() -> int:
+    """Cores this process may run on (honours CPU affinity and container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set, otherwise one worker per available core."""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "0")) or available_cores())
+
+
+def configure_worker_env(workers: int) -> None:
+    """
+    Size per-process pools for `workers` processes; explicit settings win.
+    Workers inherit this environment when uvicorn spawns them.
+    """
+    cores = available_cores()
+    # Keep PDF render processes across all workers near the core count
+    os.environ.setdefault("PDF_RENDER_WORKERS", str(max(1, min(4, cores // workers))))
+
+
+def prepare_database(migrate: bool = True) -> None:
+    """Apply migrations and switch to WAL once, before any worker opens the file."""
+    if migrate:
+        run_migrations("upgrade")
+    # Importing the limiter creates its counter file (in WAL mode) up front
+    import app.rate_limiter  # noqa: F401
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    try:
+        conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the API with multiple uvicorn workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY or one per core). "
+                             "Each one bounds its own PDF cache, so disk use can reach "
+                             "N x PDF_CACHE_MAX_BYTES")
+    parser.add_argument("--no-migrate", dest="migrate", action="store_false",
+                        help="Skip migrations (they were applied by a separate release step)")
+    args = parser.parse_args(argv)
+
+    configure_worker_env(args.workers)
+    prepare_database(migrate=args.migrate)
+    uvicorn.run(APP, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
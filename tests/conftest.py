@@ -2,23 +2,46 @@ import pytest
 from fastapi.testclient import TestClient
 import sqlite3
 import os
+import shutil
 import sys
+import tempfile
 
 # Add parent directory to path to allow importing app
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Use a separate test database file. Must be set before `app` is imported so
+# the connection pool points at it.
+TEST_DB_PATH = "test_invoicing.db"
+os.environ["DATABASE_PATH"] = TEST_DB_PATH
+os.environ["PDF_CACHE_DIR"] = tempfile.mkdtemp(prefix="test_pdf_cache_")
+# Render inline; the process pool has its own tests
+os.environ["PDF_RENDER_WORKERS"] = "0"
+os.environ["OUTBOX_POLL_INTERVAL"] = "0.05"
+# Tests sweep explicitly so invoices do not change status behind their back
+os.environ["OVERDUE_SWEEP_INTERVAL"] = "0"
+RATE_LIMIT_DIR = tempfile.mkdtemp(prefix="test_ratelimit_")
+os.environ["RATE_LIMIT_STORAGE_URI"] = "sqlite://" + os.path.join(RATE_LIMIT_DIR, "ratelimit.db")
+BACKGROUND_LOCK_DIR = tempfile.mkdtemp(prefix="test_background_")
+os.environ["BACKGROUND_LOCK_PATH"] = os.path.join(BACKGROUND_LOCK_DIR, "background.lock")
+
 from app.main import app
-from app.database import get_db, DATABASE_PATH
+from app.database import close_pool
+from migrate import run_migrations
 
-# Use a separate test database file
-TEST_DB_PATH = "test_invoicing.db"
+# Schema created by hand in `test_db`; later migrations are applied on top of it
+BASELINE_MIGRATIONS = ("001_create_items_table", "002_create_invoicing_tables", "003_add_status_column")
+
+
+def _remove_db_files(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
 
 @pytest.fixture(scope="session")
 def test_db():
     """Create a temporary test database and apply migrations."""
     # Remove existing test db if any
-    if os.path.exists(TEST_DB_PATH):
-        os.remove(TEST_DB_PATH)
+    _remove_db_files(TEST_DB_PATH)
     
     # Create tables manually or via migration script logic
     # For simplicity in tests, we'll execute the CREATE statements directly here
@@ -76,37 +99,69 @@ def test_db():
     # Seed Data
     cursor.execute("INSERT INTO clients (name, address, company_reg_no) VALUES ('Test Client', '123 Test St', 'REG-TEST')")
     cursor.execute("INSERT INTO products (name, price) VALUES ('Test Product', 10.0)")
+
+    # Mark the migrations mimicked above as applied and run the remaining ones
+    cursor.execute("""
+        CREATE TABLE _migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.executemany("INSERT INTO _migrations (name) VALUES (?)", [(name,) for name in BASELINE_MIGRATIONS])
     
     conn.commit()
     conn.close()
+
+    run_migrations("upgrade")
     
     yield TEST_DB_PATH
     
     # Cleanup
-    if os.path.exists(TEST_DB_PATH):
-        os.remove(TEST_DB_PATH)
+    close_pool()
+    _remove_db_files(TEST_DB_PATH)
+    shutil.rmtree(os.environ["PDF_CACHE_DIR"], ignore_errors=True)
+    shutil.rmtree(RATE_LIMIT_DIR, ignore_errors=True)
+    shutil.rmtree(BACKGROUND_LOCK_DIR, ignore_errors=True)
 
 @pytest.fixture(scope="function")
 def client(test_db):
     """
-    Override the get_db dependency to use the test database.
+    Test client backed by the pooled connections to the test database.
     """
-    def override_get_db():
-        conn = sqlite3.connect(test_db)
-        # Enable foreign keys
-        conn.execute("PRAGMA foreign_keys = ON")
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-            conn.commit()
-        finally:
-            conn.close()
-    
-    app.dependency_overrides[get_db] = override_get_db
-    
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
+
+@pytest.fixture
+def create_invoice(client):
+    """
+    Factory that creates an invoice through the API and returns its JSON body.
+
+    Defaults to one unit of the seeded product for the seeded client; pass
+    `product_ids` (and optionally matching `quantities`) for other items and any
+    other payload field as a keyword. `status` is applied with a PATCH after
+    creation, and `expected_status` is asserted on the create response.
+    """
+    def create(issue_date="2023-01-01", due_date="2023-01-31", client_id=1, product_ids=(1,),
+               quantities=None, status=None, expected_status=201, **fields):
+        quantities = quantities or [1] * len(product_ids)
+        response = client.post("/invoices", json={
+            "client_id": client_id,
+            "issue_date": issue_date,
+            "due_date": due_date,
+            "items": [
+                {"product_id": product_id, "quantity": quantity}
+                for product_id, quantity in zip(product_ids, quantities, strict=True)
+            ],
+            **fields,
+        })
+        assert response.status_code == expected_status, response.text
+        invoice = response.json()
+        if status:
+            updated = client.patch(f"/invoices/{invoice['id']}/status", json={"status": status})
+            assert updated.status_code == 200, updated.text
+        return invoice
+    return create
 
 @pytest.fixture(autouse=True)
 def disable_rate_limiting():
@@ -123,3 +178,26 @@ def disable_rate_limiting():
     
     # Restore limits (default valid state)
     limiter.enabled = True
+
+@pytest.fixture
+def sql_trace(monkeypatch):
+    """
+    Record every SQL statement executed through the connection pool and the writer.
+    Both are recycled so that all connections they open are traced.
+    """
+    import app.database as database
+
+    statements = []
+    original_get_connection = database.get_connection
+
+    def traced_get_connection(*args, **kwargs):
+        conn = original_get_connection(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    close_pool()
+    database.write_queue.shutdown()
+    monkeypatch.setattr(database, "get_connection", traced_get_connection)
+    yield statements
+    close_pool()
+    database.write_queue.shutdown()
@@ -0,0 +1,59 @@
+"""
+Helpers for asserting that SQL statements use indexes.
+
+Statements are captured at runtime (see the `sql_trace` fixture) so dynamically
+built queries are checked exactly as the routers execute them.
+"""
+
+import re
+import sqlite3
+
+# Tables that grow with usage; a full scan of any of them is a regression
+HOT_TABLES = ("invoices", "invoice_items", "outbox")
+
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_KEYWORDS = {"where", "join", "on", "left", "inner", "cross", "order", "group", "limit", "set", "values", "using"}
+
+
+def explain(conn: sqlite3.Connection, sql: str):
+    """Return the `EXPLAIN QUERY PLAN` detail lines for a statement."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+def _table_aliases(sql: str):
+    # The plan names tables by their alias when one is used (e.g. "SCAN ii")
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def table_scans(conn: sqlite3.Connection, sql: str, tables=HOT_TABLES):
+    """Plan lines where one of `tables` is read without any index."""
+    aliases = _table_aliases(sql)
+    scans = []
+    for detail in explain(conn, sql):
+        match = _SCAN.match(detail)
+        if not match or "INDEX" in match.group(2):
+            continue
+        if aliases.get(match.group(1), match.group(1)) in tables:
+            scans.append(detail)
+    return scans
+
+
+def assert_no_table_scans(conn: sqlite3.Connection, statements, tables=HOT_TABLES):
+    """Fail if any captured statement falls back to a full scan of a hot table."""
+    offenders = {}
+    for sql in dict.fromkeys(statements):
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            continue
+        scans = table_scans(conn, sql, tables)
+        if scans:
+            offenders[sql.strip()] = scans
+    assert not offenders, "Full table scans on hot tables:\n" + "\n".join(
+        f"{sql}\n    -> {', '.join(scans)}" for sql, scans in offenders.items()
+    )
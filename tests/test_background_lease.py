@@ -0,0 +1,48 @@
+import os
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.background_lease import BackgroundLease, background_lease
+
+
+def test_one_holder_at_a_time_and_takeover(tmp_path):
+    path = str(tmp_path / "background.lock")
+    leader, follower = BackgroundLease(path), BackgroundLease(path, retry_interval=0.02)
+    started = threading.Event()
+    try:
+        leader.start(lambda: None)
+        assert leader.held
+
+        follower.start(started.set)
+        assert not follower.held
+        assert not started.wait(0.1)
+
+        # The follower takes over once the leader is gone
+        leader.release()
+        assert started.wait(5)
+        assert follower.held
+        assert not leader.try_acquire()
+    finally:
+        follower.stop()
+        follower.release()
+        leader.release()
+
+
+def test_background_loops_run_in_the_lease_holder_only(test_db):
+    other_worker = BackgroundLease(os.environ["BACKGROUND_LOCK_PATH"])
+    assert other_worker.try_acquire()
+    try:
+        with TestClient(app) as client:
+            stats = client.get("/health/stats").json()
+            assert stats["background_lease"]["held"] is False
+            assert stats["outbox"]["workers"] == 0
+    finally:
+        other_worker.release()
+
+    with TestClient(app) as client:
+        stats = client.get("/health/stats").json()
+        assert stats["background_lease"]["held"] is True
+        assert stats["outbox"]["workers"] > 0
+    assert not background_lease.held
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from app.services.catalog import CatalogCache
+
+
+@pytest.fixture
+def conn(test_db):
+    conn = sqlite3.connect(test_db)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+def test_preload_serves_lookups_from_memory(conn):
+    cache = CatalogCache(check_interval=60)
+    cache.load(conn)
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    assert cache.get_product(conn, 1)["price"] == 10.0
+    assert cache.get_client(conn, 1)["name"] == "Test Client"
+    assert statements == []
+    assert cache.stats()["hits"] == 2
+
+
+def test_unknown_ids_count_as_misses(conn):
+    cache = CatalogCache(check_interval=60)
+    cache.load(conn)
+    assert cache.get_products(conn, [1, 999]).keys() == {1}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_generation_trigger_invalidates_cache(conn):
+    cache = CatalogCache(check_interval=0)
+    cache.load(conn)
+    generation = cache.stats()["generation"]
+
+    conn.execute("UPDATE products SET price = 12.5 WHERE id = 1")
+    assert cache.get_product(conn, 1)["price"] == 12.5
+    stats = cache.stats()
+    assert stats["generation"] == generation + 1
+    assert stats["reloads"] == 2
+
+
+def test_fresh_lookup_checks_generation_every_time(conn):
+    cache = CatalogCache(check_interval=60)
+    cache.load(conn)
+    conn.execute("UPDATE products SET price = 13.5 WHERE id = 1")
+    assert cache.get_product(conn, 1)["price"] != 13.5  # Within the read interval
+    assert cache.get_products(conn, [1], fresh=True)[1]["price"] == 13.5
+
+
+def test_explicit_invalidate_reloads(conn):
+    cache = CatalogCache(check_interval=60)
+    cache.load(conn)
+    cache.invalidate()
+    cache.get_product(conn, 1)
+    assert cache.stats()["reloads"] == 2
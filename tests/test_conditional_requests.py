@@ -0,0 +1,90 @@
+from fastapi import status
+
+from app.database import db_session
+from app.services.catalog import catalog
+from app.services.pdf_renderer import pdf_renderer
+
+
+def _item_queries(sql_trace):
+    return [s for s in sql_trace if "invoice_items" in s]
+
+
+def test_get_invoice_etag_and_304(client, create_invoice, sql_trace):
+    invoice = create_invoice()
+
+    first = client.get(f"/invoices/{invoice['id']}")
+    etag = first.headers["etag"]
+    assert first.status_code == status.HTTP_200_OK
+    assert etag.startswith('"') and not etag.startswith("W/")
+    # No modification time covers catalog or template changes, so there is none to send
+    assert "last-modified" not in first.headers
+
+    sql_trace.clear()
+    cached = client.get(f"/invoices/{invoice['id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    # Answered from the invoice row alone
+    assert _item_queries(sql_trace) == []
+
+    assert client.get(f"/invoices/{invoice['id']}", headers={"If-None-Match": '"other", ' + etag}).status_code == 304
+    assert client.get(f"/invoices/{invoice['id']}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_mutation_changes_etag(client, create_invoice):
+    invoice = create_invoice()
+    etag = client.get(f"/invoices/{invoice['id']}").headers["etag"]
+
+    client.patch(f"/invoices/{invoice['id']}/status", json={"status": "PAID"})
+
+    response = client.get(f"/invoices/{invoice['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "PAID"
+    assert response.headers["etag"] != etag
+
+
+def test_catalog_change_is_not_hidden_by_if_modified_since(client, create_invoice):
+    invoice = create_invoice()
+    first = client.get(f"/invoices/{invoice['id']}")
+    future = "Fri, 01 Jan 2100 00:00:00 GMT"
+    assert client.get(f"/invoices/{invoice['id']}", headers={"If-Modified-Since": future}).status_code == 200
+
+    try:
+        with db_session() as conn:
+            conn.execute("UPDATE clients SET name = 'Renamed Client' WHERE id = 1")
+        catalog.invalidate()
+        renamed = client.get(f"/invoices/{invoice['id']}", headers={"If-None-Match": first.headers["etag"]})
+        assert renamed.status_code == status.HTTP_200_OK
+        assert renamed.json()["client"]["name"] == "Renamed Client"
+    finally:
+        with db_session() as conn:
+            conn.execute("UPDATE clients SET name = 'Test Client' WHERE id = 1")
+        catalog.invalidate()
+
+
+def test_missing_invoice_is_404_not_304(client):
+    response = client.get("/invoices/999999", headers={"If-None-Match": "*"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_pdf_304_skips_hydration_and_rendering(client, create_invoice, sql_trace, monkeypatch):
+    renders = []
+    original = pdf_renderer.render
+
+    async def counting_render(invoice_data):
+        renders.append(invoice_data["id"])
+        return await original(invoice_data)
+
+    monkeypatch.setattr(pdf_renderer, "render", counting_render)
+    invoice = create_invoice()
+
+    first = client.get(f"/invoices/{invoice['id']}/pdf")
+    etag = first.headers["etag"]
+    assert first.status_code == status.HTTP_200_OK
+    assert etag.startswith('"pdf')
+
+    sql_trace.clear()
+    cached = client.get(f"/invoices/{invoice['id']}/pdf", headers={"If-None-Match": etag})
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert _item_queries(sql_trace) == []
+    assert renders == [invoice["id"]]
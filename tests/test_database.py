@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.database import ConnectionPool, DatabaseExecutor, PoolTimeout, WriteQueue, db_session
+
+
+@pytest.fixture
+def pool(test_db):
+    pool = ConnectionPool(test_db, max_size=2, timeout=0.05)
+    yield pool
+    pool.close()
+
+
+def test_connection_pragmas(pool):
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    stats = pool.stats()
+    assert stats["opened"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 0
+
+
+def test_pool_is_bounded(pool):
+    a = pool.acquire()
+    b = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    stats = pool.stats()
+    assert stats["opened"] == 2
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+
+
+def test_waiter_gets_released_connection(pool):
+    pool.timeout = 2
+    a = pool.acquire()
+    b = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(a)
+    waiter.join()
+    assert got == [a]
+    pool.release(a)
+    pool.release(b)
+
+
+def test_release_rolls_back_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO products (name, price) VALUES ('Uncommitted', 1.0)")
+    pool.release(conn)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM products WHERE name = 'Uncommitted'").fetchone()[0] == 0
+
+
+def test_pool_stats_endpoint(client):
+    client.get("/invoices")
+    response = client.get("/health/stats")
+    assert response.status_code == 200
+    stats = response.json()["db_pool"]
+    assert stats["checkouts"] >= 1
+    assert {"waits", "timeouts", "in_use", "opened"} <= stats.keys()
+    assert response.json()["db_executor"]["completed"] >= 1
+
+
+def _count_products(conn, name):
+    return conn.execute("SELECT COUNT(*) FROM products WHERE name = ?", (name,)).fetchone()[0]
+
+
+def test_run_in_db_commits_and_rolls_back(test_db):
+    executor = DatabaseExecutor(threads=2)
+
+    def insert(conn, name, fail=False):
+        conn.execute("INSERT INTO products (name, price) VALUES (?, 1.0)", (name,))
+        if fail:
+            raise ValueError("boom")
+        return threading.current_thread().name
+
+    async def scenario():
+        thread_name = await executor.run(insert, "Executor Committed")
+        with pytest.raises(ValueError):
+            await executor.run(insert, "Executor Rolled Back", fail=True)
+        return thread_name
+
+    try:
+        assert asyncio.run(scenario()).startswith("db")
+    finally:
+        executor.shutdown()
+    with db_session() as conn:
+        assert _count_products(conn, "Executor Committed") == 1
+        assert _count_products(conn, "Executor Rolled Back") == 0
+    assert executor.stats()["completed"] == 1
+    assert executor.stats()["failed"] == 1
+
+
+def test_db_executor_queues_many_requests_on_few_threads(test_db):
+    executor = DatabaseExecutor(threads=2)
+    threads = set()
+
+    def read(conn, n):
+        threads.add(threading.current_thread().name)
+        return conn.execute("SELECT ?", (n,)).fetchone()[0]
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run(read, n) for n in range(1000)))
+
+    try:
+        assert asyncio.run(scenario()) == list(range(1000))
+    finally:
+        executor.shutdown()
+    assert len(threads) <= 2
+    assert executor.stats() == {"threads": 2, "queued": 0, "running": 0, "completed": 1000, "failed": 0}
+
+
+def test_write_queue_groups_concurrent_mutations(test_db):
+    writer = WriteQueue(window=0.05, database_path=test_db)
+    release = threading.Event()
+
+    def hold(conn):
+        release.wait(5)
+
+    def insert(conn, name, fail=False):
+        conn.execute("INSERT INTO products (name, price) VALUES (?, 1.0)", (name,))
+        if fail:
+            raise ValueError("boom")
+        return name
+
+    try:
+        # Keep the writer busy so the next mutations queue up and share one transaction
+        first = writer.submit(hold)
+        time.sleep(0.05)
+        futures = [writer.submit(insert, f"Grouped {n}") for n in range(4)]
+        failing = writer.submit(insert, "Grouped Rolled Back", fail=True)
+        release.set()
+
+        first.result(5)
+        assert [future.result(5) for future in futures] == [f"Grouped {n}" for n in range(4)]
+        with pytest.raises(ValueError):
+            failing.result(5)
+    finally:
+        writer.shutdown()
+
+    # Only the failing mutation was rolled back
+    with db_session() as conn:
+        assert sum(_count_products(conn, f"Grouped {n}") for n in range(4)) == 4
+        assert _count_products(conn, "Grouped Rolled Back") == 0
+    stats = writer.stats()
+    assert stats["batches"] == 2
+    assert stats["largest_batch"] == 5
+    assert stats["mutations"] == 6
+    assert stats["failed"] == 1
+
+
+def test_run_write_from_async_handlers(test_db):
+    writer = WriteQueue(window=0.01, database_path=test_db)
+
+    def insert(conn, n):
+        return conn.execute("INSERT INTO products (name, price) VALUES (?, 1.0)", (f"Async Write {n}",)).lastrowid
+
+    async def scenario():
+        return await asyncio.gather(*(writer.run(insert, n) for n in range(50)))
+
+    try:
+        ids = asyncio.run(scenario())
+    finally:
+        writer.shutdown()
+    assert len(set(ids)) == 50
+    # Mutations that arrive together are committed together
+    assert writer.stats()["batches"] < 50
+    with db_session() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM products WHERE name LIKE 'Async Write %'").fetchone()[0] == 50
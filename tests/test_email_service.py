@@ -0,0 +1,119 @@
+import socket
+import time
+
+import pytest
+
+from app.services import email_service
+from app.services.email_service import MockTransport, OutgoingEmail, SMTPTransport
+from app.services.smtp_sink import LocalSMTPSink
+
+
+@pytest.fixture
+def sink():
+    with LocalSMTPSink() as smtp_sink:
+        yield smtp_sink
+
+
+def _transport(sink, pool_size=4):
+    host, port = sink.address
+    return SMTPTransport(host=host, port=port, pool_size=pool_size, timeout=5)
+
+
+def _emails(count, attachment=None):
+    return [
+        OutgoingEmail(f"client{i}@example.com", f"Invoice {i}", f"Body {i}", attachment_bytes=attachment)
+        for i in range(count)
+    ]
+
+
+def test_send_many_reuses_pooled_connections(sink):
+    transport = _transport(sink, pool_size=4)
+    try:
+        results = transport.send_many(_emails(150))
+        results += transport.send_many(_emails(50))
+    finally:
+        transport.close()
+
+    assert len(results) == 200
+    assert all(result.ok for result in results)
+    assert all(result.elapsed_ms >= 0 for result in results)
+    # Results come back in input order
+    assert [result.to_email for result in results[:150]] == [f"client{i}@example.com" for i in range(150)]
+    assert len(sink.messages) == 200
+    # Connections are opened once per pool slot and reused by the second batch
+    assert transport.connects <= 4
+    assert sink.connections == transport.connects
+
+    stats = transport.stats()
+    assert stats["sent"] == 200
+    assert stats["failed"] == 0
+    assert stats["avg_ms"] is not None
+
+
+def test_smtp_attachment_round_trip(sink):
+    transport = _transport(sink, pool_size=1)
+    try:
+        result = transport.send(OutgoingEmail("a@example.com", "Invoice", "Hello", attachment_bytes=b"%PDF-1.3 test",
+                                              attachment_name="invoice_1.pdf"))
+    finally:
+        transport.close()
+
+    assert result.ok
+    message = sink.received()[0]
+    assert message["To"] == "a@example.com"
+    assert message["Subject"] == "Invoice"
+    attachment = next(message.iter_attachments())
+    assert attachment.get_filename() == "invoice_1.pdf"
+    assert attachment.get_content() == b"%PDF-1.3 test"
+
+
+def test_smtp_reconnects_after_server_drops_connection(sink):
+    transport = _transport(sink, pool_size=1)
+    try:
+        assert transport.send_many(_emails(2))[0].ok
+        # Simulate the server dropping a connection that still looks fresh
+        smtp, _ = transport._idle.get_nowait()
+        smtp.sock.shutdown(socket.SHUT_RDWR)
+        transport._idle.put((smtp, time.monotonic()))
+
+        results = transport.send_many(_emails(3))
+    finally:
+        transport.close()
+
+    assert all(result.ok for result in results)
+    assert len(sink.messages) == 5
+    assert transport.connects == 2
+
+
+def test_smtp_unreachable_server_reports_failures():
+    with LocalSMTPSink() as sink:
+        host, port = sink.address
+    transport = SMTPTransport(host=host, port=port, pool_size=2, timeout=1)
+
+    results = transport.send_many(_emails(3))
+
+    assert [result.ok for result in results] == [False, False, False]
+    assert all(result.error for result in results)
+    assert transport.stats()["failed"] == 3
+
+
+def test_send_invoice_email_uses_configured_transport(sink, capsys):
+    previous = email_service.get_transport()
+    email_service.set_transport(_transport(sink, pool_size=1))
+    try:
+        assert email_service.send_invoice_email("b@example.com", "Invoice", "Body", b"pdf") is True
+    finally:
+        email_service.set_transport(previous)
+
+    assert len(sink.messages) == 1
+    assert "MOCK EMAIL SERVICE" not in capsys.readouterr().out
+
+
+def test_mock_transport_records_timing(capsys):
+    transport = MockTransport()
+
+    results = transport.send_many(_emails(2, attachment=b"1234"))
+
+    assert all(result.ok for result in results)
+    assert transport.stats()["sent"] == 2
+    assert "Attachment Size: 4 bytes" in capsys.readouterr().out
@@ -0,0 +1,179 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from fastapi import HTTPException, status
+
+from app.database import db_session
+from app.routes.invoices import _release_unused_numbers, _write_numbered
+from app.services.invoice_numbers import (
+    InvoiceNumberAllocator, format_invoice_no, invoice_numbers, parse_invoice_no
+)
+
+
+@pytest.fixture
+def make_allocator(test_db):
+    allocators = []
+
+    def make(block_size=100):
+        allocator = InvoiceNumberAllocator(block_size=block_size, database_path=test_db)
+        allocators.append(allocator)
+        return allocator
+    yield make
+    for allocator in allocators:
+        allocator.close()
+
+
+def _next_value(year):
+    with db_session() as conn:
+        row = conn.execute("SELECT next_value FROM invoice_sequences WHERE year = ?", (year,)).fetchone()
+    return row[0] if row else None
+
+
+def test_format_and_parse():
+    assert format_invoice_no(2026, 123) == "INV-2026-000123"
+    assert parse_invoice_no("INV-2026-000123") == (2026, 123)
+    assert parse_invoice_no("INV-93F2A1C0") is None
+
+
+def test_created_invoices_are_numbered_per_year(client, create_invoice):
+    first = create_invoice(issue_date="2011-02-01", due_date="2011-03-01")
+    # A rejected invoice does not use up a number
+    create_invoice(issue_date="2011-02-01", due_date="2011-03-01", client_id=999,
+                   expected_status=status.HTTP_404_NOT_FOUND)
+    second = create_invoice(issue_date="2011-02-01", due_date="2011-03-01")
+    other_year = create_invoice(issue_date="2012-02-01", due_date="2012-03-01")
+
+    assert first["invoice_no"] == "INV-2011-000001"
+    assert second["invoice_no"] == "INV-2011-000002"
+    assert other_year["invoice_no"] == "INV-2012-000001"
+
+    response = client.post("/invoices/batch", json={"invoices": [
+        {"client_id": 1, "issue_date": "2011-04-01", "due_date": "2011-05-01",
+         "items": [{"product_id": 1, "quantity": 1}]},
+        {"client_id": 999, "issue_date": "2011-04-01", "due_date": "2011-05-01",
+         "items": [{"product_id": 1, "quantity": 1}]},
+        {"client_id": 1, "issue_date": "2011-04-01", "due_date": "2011-05-01",
+         "items": [{"product_id": 1, "quantity": 1}]},
+    ]})
+    assert [result.get("invoice_no") for result in response.json()["results"]] == [
+        "INV-2011-000003", None, "INV-2011-000005"
+    ]
+    # The number allocated to the rejected entry is handed out next
+    assert create_invoice(issue_date="2011-02-01", due_date="2011-03-01")["invoice_no"] == "INV-2011-000004"
+    assert client.get("/health/stats").json()["invoice_numbers"]["reused"] >= 2
+
+
+def test_blocks_are_reserved_ahead(make_allocator):
+    allocator = make_allocator(block_size=10)
+    assert allocator.allocate([2013]) == ["INV-2013-000001"]
+    assert _next_value(2013) == 11
+
+    # What is left of the block is used first; a request that outgrows it
+    # reserves at least the shortfall
+    numbers = allocator.allocate([2013] * 25)
+    assert numbers == [format_invoice_no(2013, n) for n in range(2, 27)]
+    assert _next_value(2013) == 27
+    assert allocator.stats()["blocks_reserved"] == 2
+    assert allocator.take([2013]) is None
+
+
+def test_released_numbers_are_reused_lowest_first(make_allocator):
+    allocator = make_allocator()
+    allocator.allocate([2014] * 5)
+    allocator.release(["INV-2014-000004", "INV-2014-000002"])
+    assert allocator.take([2014] * 3) == ["INV-2014-000002", "INV-2014-000004", "INV-2014-000006"]
+
+
+def test_close_returns_unused_tail(make_allocator):
+    allocator = make_allocator()
+    allocator.allocate([2015] * 3)
+    allocator.release(["INV-2015-000003"])
+    assert _next_value(2015) == 101
+    allocator.close()
+    assert _next_value(2015) == 3
+
+    # Another process reserved after this block: its tail stays a gap
+    first, second = make_allocator(), make_allocator()
+    first.allocate([2015])
+    second.allocate([2015])
+    first.close()
+    assert _next_value(2015) == 203
+    second.close()
+    assert _next_value(2015) == 104
+
+
+def test_allocators_never_hand_out_the_same_number(make_allocator):
+    allocators = [make_allocator(block_size=7) for _ in range(4)]
+    numbers = []
+    lock = threading.Lock()
+
+    def run(allocator):
+        for _ in range(50):
+            allocated = allocator.allocate([2016, 2016])
+            with lock:
+                numbers.extend(allocated)
+
+    threads = [threading.Thread(target=run, args=(allocator,)) for allocator in allocators]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(numbers) == len(set(numbers)) == 400
+
+
+def _settled(result=None, error=None, cancelled=False):
+    future = Future()
+    if cancelled:
+        future.cancel()
+    elif error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def test_numbers_are_released_only_when_nothing_was_committed(monkeypatch):
+    released = []
+    monkeypatch.setattr(invoice_numbers, "release", released.extend)
+    numbers = ["INV-2017-000001", "INV-2017-000002"]
+
+    _release_unused_numbers(numbers, None, _settled(cancelled=True))
+    _release_unused_numbers(numbers, None, _settled(error=HTTPException(status_code=404)))
+    assert released == numbers * 2
+
+    released.clear()
+    _release_unused_numbers(numbers, None, _settled(result={"id": 1}))
+    conflict = sqlite3.IntegrityError("UNIQUE constraint failed: invoices.invoice_no")
+    _release_unused_numbers(numbers, None, _settled(error=conflict))
+    assert released == []
+
+    batch = _settled(result=[{"invoice_no": numbers[1]}, {"error": "Client not found"}])
+    _release_unused_numbers(numbers, lambda results: {results[0]["invoice_no"]}, batch)
+    assert released == numbers[:1]
+
+
+def test_cancelled_request_keeps_numbers_of_a_running_mutation(test_db, monkeypatch):
+    released = []
+    monkeypatch.setattr(invoice_numbers, "release", released.extend)
+    started = threading.Event()
+
+    def slow_mutation(conn, payload, invoice_nos):
+        started.set()
+        time.sleep(0.2)
+        return payload
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(_write_numbered(slow_mutation, "x", ["INV-2018-000001"]))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_midway())
+    time.sleep(0.4)  # Let the writer finish the mutation the request gave up on
+    assert released == []
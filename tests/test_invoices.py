@@ -1,6 +1,21 @@
+import asyncio
+import csv
+import json
+import io
+import os
+import zipfile
 from fastapi import status
 import pytest
 
+from app.database import db_session
+from app.main import app
+from app.routes.invoices import _hydrate_invoices
+from app.schemas import InvoiceResponse, PaginatedInvoiceResponse, PaginatedInvoiceSummaryResponse
+from app.services import export
+from app.services.catalog import catalog
+from app.services.pdf_renderer import RenderTimeout, pdf_renderer
+from migrate import load_migration_module
+
 def test_create_invoice_success(client):
     response = client.post("/invoices", json={
         "client_id": 1,
@@ -145,3 +160,346 @@ def test_combined_filters(client):
     data = response.json()
     assert all(item["client"]["id"] == 1 and item["status"] == "DRAFT" for item in data["items"])
     assert len(data["items"]) >= 1
+
+def test_list_invoices_batches_hydration(client, sql_trace):
+    for _ in range(5):
+        client.post("/invoices", json={
+            "client_id": 1,
+            "issue_date": "2023-01-01",
+            "due_date": "2023-01-31",
+            "items": [{"product_id": 1, "quantity": 2}]
+        })
+
+    sql_trace.clear()
+    response = client.get("/invoices?page=1&page_size=5")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["items"]) == 5
+
+    # COUNT + page + items, independent of page_size; clients/products come from the catalog cache
+    selects = [
+        s for s in sql_trace
+        if s.lstrip().upper().startswith("SELECT") and "catalog_generation" not in s
+    ]
+    assert len(selects) == 3
+    # Items carry their own price snapshot: no products lookup, join or recomputation
+    assert not any("products" in s for s in selects)
+
+def test_get_invoice_matches_list_entry(client):
+    res = client.post("/invoices", json={
+        "client_id": 1,
+        "issue_date": "2023-01-01",
+        "due_date": "2023-01-31",
+        "items": [{"product_id": 1, "quantity": 3}, {"product_id": 1, "quantity": 1}]
+    })
+    invoice = res.json()
+    assert [item["line_total"] for item in invoice["items"]] == [30.0, 10.0]
+
+    single = client.get(f"/invoices/{invoice['id']}").json()
+    assert single == invoice
+
+def test_item_prices_are_snapshotted(client):
+    payload = {
+        "client_id": 1,
+        "issue_date": "2023-01-01",
+        "due_date": "2023-01-31",
+        "items": [{"product_id": 1, "quantity": 2}]
+    }
+    before = client.post("/invoices", json=payload).json()
+    assert before["items"][0]["unit_price"] == 10.0
+
+    try:
+        with db_session() as conn:
+            conn.execute("UPDATE products SET price = 25.0 WHERE id = 1")
+
+        # No invalidate(): the create path checks the generation itself
+        unchanged = client.get(f"/invoices/{before['id']}").json()
+        assert unchanged == before
+        after = client.post("/invoices", json=payload).json()
+        assert after["items"][0]["unit_price"] == 25.0
+        assert after["items"][0]["line_total"] == 50.0
+    finally:
+        with db_session() as conn:
+            conn.execute("UPDATE products SET price = 10.0 WHERE id = 1")
+        catalog.invalidate()
+
+def test_snapshot_backfill_in_chunks(client):
+    migration = load_migration_module(
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations", "007_snapshot_item_prices.py")
+    )
+    invoice = client.post("/invoices", json={
+        "client_id": 1,
+        "issue_date": "2023-01-01",
+        "due_date": "2023-01-31",
+        "items": [{"product_id": 1, "quantity": quantity} for quantity in (1, 2, 3, 4, 5)]
+    }).json()
+
+    with db_session() as conn:
+        conn.execute(
+            "UPDATE invoice_items SET unit_price = NULL, line_total = NULL WHERE invoice_id = ?", (invoice["id"],)
+        )
+        conn.commit()
+        assert migration.backfill(conn, chunk_size=2) == 5
+
+    assert client.get(f"/invoices/{invoice['id']}").json() == invoice
+
+def test_fast_path_matches_response_model(client):
+    created = client.post("/invoices", json={
+        "client_id": 1,
+        "issue_date": "2023-01-01",
+        "due_date": "2023-01-31",
+        "items": [{"product_id": 1, "quantity": 3}, {"product_id": 1, "quantity": 1}],
+        "tax_amount": 1.5
+    })
+    assert created.headers["content-type"] == "application/json"
+    invoice = created.json()
+    page = client.get("/invoices?page_size=20").json()
+
+    # Re-validating through the models must not change a single byte of the payload
+    assert InvoiceResponse.model_validate(invoice).model_dump(mode="json") == invoice
+    assert PaginatedInvoiceResponse.model_validate(page).model_dump(mode="json") == page
+    assert list(invoice) == list(InvoiceResponse.model_fields)
+    assert list(page) == list(PaginatedInvoiceResponse.model_fields)
+
+def test_openapi_keeps_invoice_schemas():
+    paths = app.openapi()["paths"]
+
+    def schema_ref(path, method, code):
+        return paths[path][method]["responses"][code]["content"]["application/json"]["schema"]["$ref"]
+
+    list_schema = paths["/invoices"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert [ref["$ref"].rsplit("/", 1)[1] for ref in list_schema["anyOf"]] == [
+        "PaginatedInvoiceResponse", "PaginatedInvoiceSummaryResponse"
+    ]
+    assert schema_ref("/invoices", "post", "201").endswith("/InvoiceResponse")
+    assert schema_ref("/invoices/{invoice_id}", "get", "200").endswith("/InvoiceResponse")
+    assert schema_ref("/invoices/{invoice_id}/status", "patch", "200").endswith("/InvoiceResponse")
+
+def test_list_sparse_fields_skip_items_query(client, create_invoice, sql_trace):
+    invoice = create_invoice(issue_date="2030-03-01", due_date="2030-03-31", quantities=[2])
+
+    sql_trace.clear()
+    response = client.get("/invoices?date_from=2030-03-01&date_to=2030-03-31&fields=invoice_no,client,total,status")
+    assert response.status_code == status.HTTP_200_OK
+    assert not any("invoice_items" in statement for statement in sql_trace)
+
+    page = response.json()
+    entry = next(item for item in page["items"] if item["id"] == invoice["id"])
+    assert entry == {
+        "id": invoice["id"],
+        "invoice_no": invoice["invoice_no"],
+        "client": invoice["client"],
+        "total": invoice["total"],
+        "status": "DRAFT",
+    }
+    assert PaginatedInvoiceSummaryResponse.model_validate(page).model_dump(mode="json", exclude_unset=True) == page
+
+def test_list_include_relations(client, create_invoice, sql_trace):
+    invoice = create_invoice(issue_date="2030-03-01", due_date="2030-03-31", quantities=[2])
+
+    headers_only = client.get("/invoices?date_from=2030-03-01&date_to=2030-03-31&include=").json()["items"]
+    entry = next(item for item in headers_only if item["id"] == invoice["id"])
+    assert "items" not in entry and "client" not in entry
+    assert entry["client_id"] == 1
+    assert entry["address_snapshot"] == invoice["address_snapshot"]
+
+    sql_trace.clear()
+    with_items = client.get("/invoices?date_from=2030-03-01&date_to=2030-03-31&include=items").json()["items"]
+    assert any("invoice_items" in statement for statement in sql_trace)
+    entry = next(item for item in with_items if item["id"] == invoice["id"])
+    assert entry["items"] == invoice["items"]
+    assert "client" not in entry
+
+    full = client.get("/invoices?date_from=2030-03-01&date_to=2030-03-31&include=items,client").json()["items"]
+    entry = next(item for item in full if item["id"] == invoice["id"])
+    assert {key: entry[key] for key in invoice} == invoice
+
+def test_list_rejects_unknown_fields(client):
+    response = client.get("/invoices?fields=invoice_no,secret")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "secret" in response.json()["detail"]
+    assert client.get("/invoices?include=payments").status_code == status.HTTP_400_BAD_REQUEST
+
+def test_get_invoice_not_found(client):
+    response = client.get("/invoices/999999")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_list_invoices_cursor_pagination(client):
+    created = []
+    for day in (3, 1, 2, 2, 5):
+        res = client.post("/invoices", json={
+            "client_id": 1,
+            "issue_date": f"2031-01-0{day}",
+            "due_date": "2031-02-01",
+            "items": [{"product_id": 1, "quantity": 1}]
+        })
+        created.append((res.json()["issue_date"], res.json()["id"]))
+    expected = [invoice_id for _, invoice_id in sorted(created)]
+
+    seen = []
+    response = client.get("/invoices?date_from=2031-01-01&page_size=2")
+    data = response.json()
+    assert data["total"] == 5
+    seen += [item["id"] for item in data["items"]]
+    while data["next_cursor"]:
+        response = client.get(f"/invoices?date_from=2031-01-01&page_size=2&cursor={data['next_cursor']}")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["page"] is None
+        seen += [item["id"] for item in data["items"]]
+
+    assert seen == expected
+
+def test_list_invoices_without_total(client):
+    response = client.get("/invoices?page_size=1&with_total=false")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] is None
+    assert data["total_pages"] is None
+
+def test_list_invoices_invalid_cursor(client):
+    response = client.get("/invoices?cursor=not-a-cursor")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_create_invoices_batch(client):
+    entry = {
+        "client_id": 1,
+        "issue_date": "2023-03-01",
+        "due_date": "2023-03-31",
+        "items": [{"product_id": 1, "quantity": 2}, {"product_id": 1, "quantity": 1}],
+        "tax_amount": 1.0
+    }
+    response = client.post("/invoices/batch", json={"invoices": [
+        entry,
+        {**entry, "client_id": 999},
+        {**entry, "items": [{"product_id": 999, "quantity": 1}]},
+        entry,
+    ]})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    results = data["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[1]["error"] == "Client not found"
+    assert results[2]["error"] == "Product with ID 999 not found"
+
+    invoice = client.get(f"/invoices/{results[3]['id']}").json()
+    assert invoice["invoice_no"] == results[3]["invoice_no"]
+    assert invoice["total"] == 31.0
+    assert [item["quantity"] for item in invoice["items"]] == [2, 1]
+
+def test_create_invoices_batch_rejects_empty(client):
+    response = client.post("/invoices/batch", json={"invoices": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_export_pdf_zip(client, monkeypatch):
+    monkeypatch.setattr("app.services.export.EXPORT_CHUNK_SIZE", 2)
+    invoice_nos = []
+    for day in (1, 2, 3):
+        res = client.post("/invoices", json={
+            "client_id": 1,
+            "issue_date": f"2032-05-0{day}",
+            "due_date": "2032-06-01",
+            "items": [{"product_id": 1, "quantity": day}]
+        })
+        invoice_nos.append(res.json()["invoice_no"])
+
+    response = client.get("/invoices/export/pdf.zip?date_from=2032-05-01&date_to=2032-05-31")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == [f"invoice_{invoice_no}.pdf" for invoice_no in invoice_nos]
+    assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+def test_export_pdf_zip_empty(client):
+    response = client.get("/invoices/export/pdf.zip?date_from=2099-01-01")
+    assert response.status_code == status.HTTP_200_OK
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == []
+
+def test_export_pdf_zip_marks_failed_renders(client, create_invoice, monkeypatch):
+    invoices = [create_invoice(issue_date=f"2019-05-0{day}", due_date="2019-06-01") for day in (1, 2, 3)]
+    original = pdf_renderer.render
+
+    async def failing_render(invoice_data):
+        if invoice_data["id"] == invoices[1]["id"]:
+            raise RenderTimeout("PDF rendering took longer than 30s")
+        return await original(invoice_data)
+
+    monkeypatch.setattr(pdf_renderer, "render", failing_render)
+    response = client.get("/invoices/export/pdf.zip?date_from=2019-05-01&date_to=2019-05-31")
+    assert response.status_code == status.HTTP_200_OK
+
+    # The archive is complete, with an error entry in place of the failed PDF
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == [
+        f"invoice_{invoices[0]['invoice_no']}.pdf",
+        f"invoice_{invoices[1]['invoice_no']}.pdf.error.txt",
+        f"invoice_{invoices[2]['invoice_no']}.pdf",
+    ]
+    assert b"took longer than 30s" in archive.read(archive.namelist()[1])
+
+def test_concurrent_pdf_exports_share_part_of_the_render_queue(client, create_invoice, monkeypatch):
+    for day in range(1, 7):
+        create_invoice(issue_date=f"2019-08-0{day}", due_date="2019-09-01")
+    monkeypatch.setattr(pdf_renderer, "workers", 4)
+    monkeypatch.setattr(pdf_renderer, "queue_size", 8)
+    monkeypatch.setattr(export, "EXPORT_RENDER_SHARE", 0.25)
+    running, peak = 0, 0
+
+    async def slow_render(invoice_data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return b"%PDF-fake"
+
+    monkeypatch.setattr(pdf_renderer, "render", slow_render)
+    conditions, params = ["issue_date BETWEEN ? AND ?"], ["2019-08-01", "2019-08-31"]
+
+    async def run_exports():
+        async def consume():
+            return b"".join([chunk async for chunk in export.stream_pdf_zip(conditions, params, _hydrate_invoices)])
+        return await asyncio.gather(consume(), consume())
+
+    archives = asyncio.run(run_exports())
+    # Each export alone would keep two renders in flight
+    assert peak == 2
+    assert all(len(zipfile.ZipFile(io.BytesIO(body)).namelist()) == 6 for body in archives)
+
+def _create_export_invoices(create_invoice, year):
+    return [
+        create_invoice(issue_date=f"{year}-07-0{day}", due_date=f"{year}-08-01",
+                       product_ids=[1] * len(quantities), quantities=quantities)["id"]
+        for day, quantities in ((1, [1]), (2, [2, 3]), (3, [4]))
+    ]
+
+def test_export_ndjson(client, create_invoice, monkeypatch):
+    monkeypatch.setattr("app.services.export.EXPORT_CHUNK_SIZE", 2)
+    ids = _create_export_invoices(create_invoice, 2033)
+
+    response = client.get("/invoices/export?format=ndjson&date_from=2033-07-01&date_to=2033-07-31")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ids
+    assert lines[1] == client.get(f"/invoices/{ids[1]}").json()
+
+def test_export_csv(client, create_invoice, monkeypatch):
+    monkeypatch.setattr("app.services.export.EXPORT_CHUNK_SIZE", 2)
+    ids = _create_export_invoices(create_invoice, 2034)
+
+    response = client.get("/invoices/export?format=csv&date_from=2034-07-01&date_to=2034-07-31")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["invoice_id"]) for row in rows] == [ids[0], ids[1], ids[1], ids[2]]
+    assert [int(row["quantity"]) for row in rows] == [1, 2, 3, 4]
+    assert float(rows[2]["line_total"]) == 30.0
+
+def test_export_rejects_unknown_format(client):
+    response = client.get("/invoices/export?format=xml")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
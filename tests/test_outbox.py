@@ -0,0 +1,117 @@
+import time
+
+import pytest
+from fastapi import status
+
+from app.database import db_session
+from app.services import outbox
+from app.services.outbox import OutboxWorkerPool, PermanentJobError
+
+
+def _wait_for_job(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("DONE", "FAILED") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def _enqueue(kind, max_attempts=3):
+    with db_session() as conn:
+        return outbox.enqueue(conn, kind, payload={"n": 1}, max_attempts=max_attempts)
+
+
+def _job(job_id):
+    with db_session() as conn:
+        return dict(outbox.get_job(conn, job_id))
+
+
+@pytest.fixture
+def pool(test_db):
+    # Start from an empty queue so leftovers from other tests are not claimed here
+    with db_session() as conn:
+        conn.execute("DELETE FROM outbox WHERE status IN ('PENDING', 'PROCESSING')")
+    return OutboxWorkerPool(workers=0, batch_size=10)
+
+
+def test_send_invoice_is_queued_and_delivered(client):
+    invoice = client.post("/invoices", json={
+        "client_id": 1,
+        "issue_date": "2023-01-01",
+        "due_date": "2023-01-31",
+        "items": [{"product_id": 1, "quantity": 1}]
+    }).json()
+
+    response = client.post(f"/invoices/{invoice['id']}/send")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    data = response.json()
+    assert data["status"] == "SENT"
+    assert client.get(f"/invoices/{invoice['id']}").json()["status"] == "SENT"
+
+    job = _wait_for_job(client, data["job_id"])
+    assert job["status"] == "DONE"
+    assert job["kind"] == "send_invoice"
+    assert job["invoice_id"] == invoice["id"]
+    assert job["attempts"] == 1
+
+
+def test_send_missing_invoice(client):
+    response = client.post("/invoices/999999/send")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_job_not_found(client):
+    assert client.get("/jobs/999999").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_failed_job_is_retried_with_backoff(pool):
+    pool.register("flaky", lambda jobs: {job["id"]: RuntimeError("smtp down") for job in jobs})
+    job_id = _enqueue("flaky", max_attempts=2)
+
+    assert pool.drain_once() == 1
+    job = _job(job_id)
+    assert job["status"] == "PENDING"
+    assert job["attempts"] == 1
+    assert job["last_error"] == "smtp down"
+    assert job["available_at"] > time.time()
+
+    # Not claimable again until the backoff has elapsed
+    assert pool.drain_once() == 0
+    with db_session() as conn:
+        conn.execute("UPDATE outbox SET available_at = 0 WHERE id = ?", (job_id,))
+
+    assert pool.drain_once() == 1
+    job = _job(job_id)
+    assert job["status"] == "FAILED"
+    assert job["attempts"] == 2
+    assert pool.stats()["retried"] == 1
+    assert pool.stats()["failed"] == 1
+
+
+def test_permanent_error_fails_immediately(pool):
+    pool.register("broken", lambda jobs: {job["id"]: PermanentJobError("bad payload") for job in jobs})
+    job_id = _enqueue("broken")
+    pool.drain_once()
+    job = _job(job_id)
+    assert job["status"] == "FAILED"
+    assert job["attempts"] == 1
+
+
+def test_expired_lease_is_reclaimed(pool):
+    batches = []
+    pool.register("batched", lambda jobs: batches.append([job["id"] for job in jobs]) or {})
+    job_ids = [_enqueue("batched") for _ in range(3)]
+
+    # Simulate a worker that claimed the jobs and died
+    with db_session() as conn:
+        conn.execute("UPDATE outbox SET status = 'PROCESSING', available_at = 0 WHERE kind = 'batched'")
+
+    pool.drain_once()
+    assert batches == [job_ids]
+    assert all(_job(job_id)["status"] == "DONE" for job_id in job_ids)
+
+
+def test_backoff_grows_exponentially():
+    assert outbox.backoff_delay(1) < outbox.backoff_delay(2) < outbox.backoff_delay(3)
+    assert outbox.backoff_delay(100) == outbox.OUTBOX_BACKOFF_MAX
@@ -0,0 +1,59 @@
+import time
+from datetime import date
+
+from app.services.overdue import OverdueSweeper
+
+
+def _status(client, invoice_id):
+    return client.get(f"/invoices/{invoice_id}").json()["status"]
+
+
+def test_sweep_marks_sent_invoices_past_due_in_chunks(client, create_invoice):
+    sweeper = OverdueSweeper(interval=0, chunk_size=2, chunk_pause=0)
+    # Settle invoices left over by other tests first
+    sweeper.sweep_once(today=date(2049, 12, 31))
+
+    overdue = [
+        create_invoice(issue_date="2020-01-01", due_date=f"2050-01-0{day}", status="SENT")["id"]
+        for day in range(1, 6)
+    ]
+    not_yet_due = create_invoice(issue_date="2020-01-01", due_date="2050-02-01", status="SENT")["id"]
+    draft = create_invoice(issue_date="2020-01-01", due_date="2050-01-01")["id"]
+    paid = create_invoice(issue_date="2020-01-01", due_date="2050-01-01", status="PAID")["id"]
+
+    run = sweeper.sweep_once(today=date(2050, 2, 1))
+
+    assert run["touched"] == 5
+    assert run["chunks"] == 3
+    assert run["elapsed_ms"] >= 0
+    assert all(_status(client, invoice_id) == "OVERDUE" for invoice_id in overdue)
+    assert _status(client, not_yet_due) == "SENT"
+    assert _status(client, draft) == "DRAFT"
+    assert _status(client, paid) == "PAID"
+
+    assert sweeper.sweep_once(today=date(2050, 2, 1))["touched"] == 0
+    stats = sweeper.stats()
+    assert stats["runs"] == 3
+    assert stats["touched"] >= 5
+    assert stats["last_run"]["touched"] == 0
+
+
+def test_sweeper_thread_runs_on_interval(client, create_invoice):
+    invoice_id = create_invoice(issue_date="2020-01-01", due_date="2020-01-31", status="SENT")["id"]
+    sweeper = OverdueSweeper(interval=0.05, chunk_pause=0)
+    sweeper.start()
+    try:
+        deadline = time.monotonic() + 5
+        while _status(client, invoice_id) != "OVERDUE" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        sweeper.stop()
+
+    assert _status(client, invoice_id) == "OVERDUE"
+    assert sweeper.stats()["running"] is False
+    assert sweeper.stats()["runs"] >= 1
+
+
+def test_sweeper_stats_endpoint(client):
+    stats = client.get("/health/stats").json()["overdue_sweeper"]
+    assert {"runs", "touched", "last_run"} <= stats.keys()
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+from fastapi import status
+
+from app.services.pdf_cache import PdfCache, pdf_cache, pdf_cache_key
+from app.services.pdf_renderer import pdf_renderer
+
+
+@pytest.fixture
+def render_calls(monkeypatch):
+    calls = []
+    original = pdf_renderer.render
+
+    async def counting_render(invoice_data):
+        calls.append(invoice_data["id"])
+        return await original(invoice_data)
+
+    monkeypatch.setattr(pdf_renderer, "render", counting_render)
+    return calls
+
+
+def test_pdf_hit_skips_rendering(client, create_invoice, render_calls):
+    invoice = create_invoice()
+
+    first = client.get(f"/invoices/{invoice['id']}/pdf")
+    second = client.get(f"/invoices/{invoice['id']}/pdf")
+
+    assert first.status_code == second.status_code == status.HTTP_200_OK
+    assert second.headers["content-type"] == "application/pdf"
+    assert first.content == second.content
+    assert render_calls == [invoice["id"]]
+
+
+def test_status_change_invalidates_pdf(client, create_invoice, render_calls):
+    invoice = create_invoice()
+    client.get(f"/invoices/{invoice['id']}/pdf")
+    client.patch(f"/invoices/{invoice['id']}/status", json={"status": "PAID"})
+    client.get(f"/invoices/{invoice['id']}/pdf")
+
+    assert render_calls == [invoice["id"], invoice["id"]]
+
+
+def test_cache_key_tracks_content():
+    data = {"id": 1, "status": "DRAFT", "items": [{"quantity": 1}]}
+    assert pdf_cache_key(data) == pdf_cache_key(dict(data))
+    assert pdf_cache_key(data) != pdf_cache_key({**data, "status": "SENT"})
+    assert pdf_cache_key(data) != pdf_cache_key({**data, "items": [{"quantity": 2}]})
+
+
+def test_lru_eviction_respects_size_bound(tmp_path):
+    cache = PdfCache(directory=str(tmp_path), max_bytes=250)
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        cache.put(key, b"x" * 100)
+        cache.get("a" * 64)  # Keep "a" hot
+
+    assert cache.get("a" * 64) is not None
+    assert cache.get("b" * 64) is None
+    assert cache.get("c" * 64) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_replaced_invoice_entry_is_removed(tmp_path):
+    cache = PdfCache(directory=str(tmp_path))
+    old_path = cache.put("a" * 64, b"old", invoice_id=7)
+    cache.put("b" * 64, b"new", invoice_id=7)
+    assert not os.path.exists(old_path)
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    PdfCache(directory=str(tmp_path)).put("a" * 64, b"pdf")
+    reopened = PdfCache(directory=str(tmp_path))
+    assert reopened.get("a" * 64) is not None
+    assert reopened.stats()["bytes"] == 3
+
+
+def test_hit_returns_bytes_that_outlive_the_file(tmp_path):
+    # Two workers share the directory, each with its own index
+    first, second = PdfCache(directory=str(tmp_path)), PdfCache(directory=str(tmp_path))
+    first.put("a" * 64, b"v1", invoice_id=7)
+    pdf_bytes = second.get("a" * 64)
+    first.put("b" * 64, b"v2", invoice_id=7)  # Deletes the file second just hit
+
+    assert pdf_bytes == b"v1"
+    assert second.get("a" * 64) is None
+
+
+def test_pdf_served_when_cached_file_is_removed(client, create_invoice, render_calls, monkeypatch):
+    invoice = create_invoice()
+    first = client.get(f"/invoices/{invoice['id']}/pdf")
+
+    # Evicted (e.g. by another worker) between the lookup and the response
+    original_get = pdf_cache.get
+
+    def get_then_evict(key):
+        pdf_bytes = original_get(key)
+        os.remove(pdf_cache.path_for(key))
+        return pdf_bytes
+
+    monkeypatch.setattr(pdf_cache, "get", get_then_evict)
+    second = client.get(f"/invoices/{invoice['id']}/pdf")
+    assert second.status_code == status.HTTP_200_OK
+    assert second.content == first.content
+    assert render_calls == [invoice["id"]]
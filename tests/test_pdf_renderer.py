@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+import app.services.pdf_renderer
+from app.services.pdf_generator import generate_invoice_pdf
+from app.services.pdf_renderer import PdfRenderService, RenderQueueFull, RenderTimeout, _WARMUP_INVOICE
+
+
+@pytest.fixture(scope="module")
+def process_renderer():
+    service = PdfRenderService(workers=1, queue_size=4, timeout=60)
+    service.start()
+    yield service
+    service.shutdown()
+
+
+def test_render_in_worker_process(process_renderer):
+    pdf_bytes = asyncio.run(process_renderer.render(_WARMUP_INVOICE))
+    assert pdf_bytes.startswith(b"%PDF")
+    assert process_renderer.render_sync(_WARMUP_INVOICE).startswith(b"%PDF")
+
+    stats = process_renderer.stats()
+    assert stats["rendered"] == 2
+    assert stats["queue_depth"] == 0
+    assert stats["latency_ms"]["p50"] is not None
+
+
+def _slow_render(invoice_data):
+    # Runs in the worker process, which imports this module by name
+    time.sleep(0.5)
+    return generate_invoice_pdf(invoice_data)
+
+
+@pytest.fixture
+def slow_renders(monkeypatch):
+    monkeypatch.setattr(app.services.pdf_renderer, "generate_invoice_pdf", _slow_render)
+
+
+def test_render_timeout(process_renderer, slow_renders):
+    process_renderer.timeout = 0.05
+    try:
+        with pytest.raises(RenderTimeout):
+            asyncio.run(process_renderer.render(_WARMUP_INVOICE))
+    finally:
+        process_renderer.timeout = 60
+    assert process_renderer.stats()["timeouts"] == 1
+
+
+def test_queue_is_bounded():
+    service = PdfRenderService(workers=0, queue_size=0)
+    with pytest.raises(RenderQueueFull):
+        asyncio.run(service.render(_WARMUP_INVOICE))
+    assert service.stats()["rejected"] == 1
+
+
+def test_timed_out_render_holds_its_slot_until_the_worker_finishes(slow_renders):
+    service = PdfRenderService(workers=1, queue_size=1, timeout=0.05)
+    try:
+        with pytest.raises(RenderTimeout):
+            service.render_sync(_WARMUP_INVOICE)
+        # The worker is still busy with it, so there is no room for another
+        with pytest.raises(RenderQueueFull):
+            service.render_sync(_WARMUP_INVOICE)
+
+        deadline = time.monotonic() + 30
+        while service.stats()["queue_depth"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert service.stats()["queue_depth"] == 0
+    finally:
+        service.shutdown()
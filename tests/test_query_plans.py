@@ -0,0 +1,50 @@
+import sqlite3
+
+from app.services.outbox import outbox_workers
+from app.services.overdue import overdue_sweeper
+from tests.query_plan import assert_no_table_scans, table_scans
+
+
+def test_router_queries_use_indexes(client, create_invoice, sql_trace, test_db):
+    invoice = create_invoice()
+    create_invoice(issue_date="2023-02-01", due_date="2023-02-28")
+    client.post("/invoices/batch", json={"invoices": [
+        {"client_id": 1, "issue_date": "2023-03-01", "due_date": "2023-03-31", "items": [{"product_id": 1, "quantity": 1}]},
+    ] * 3})
+
+    client.get("/invoices")
+    client.get("/invoices?client_id=1")
+    client.get("/invoices?status=DRAFT")
+    client.get("/invoices?date_from=2023-01-15")
+    client.get("/invoices?client_id=1&status=DRAFT&date_from=2023-01-01")
+    next_cursor = client.get("/invoices?page_size=1").json()["next_cursor"]
+    client.get(f"/invoices?page_size=1&cursor={next_cursor}")
+    client.get(f"/invoices/{invoice['id']}")
+    client.get(f"/invoices/search?q={invoice['invoice_no']}")
+    client.get("/invoices/export?format=csv&status=DRAFT")
+    client.get("/invoices/export/pdf.zip?client_id=1&date_from=2023-02-01&date_to=2023-02-01")
+    client.patch(f"/invoices/{invoice['id']}/status", json={"status": "PAID"})
+    client.get(f"/invoices/{invoice['id']}/pdf")
+    job_id = client.post(f"/invoices/{invoice['id']}/send").json()["job_id"]
+    outbox_workers.drain_once()
+    client.get(f"/jobs/{job_id}")
+    overdue_sweeper.sweep_once()
+    client.get("/reports/revenue?group_by=month&month_from=2023-01")
+    client.delete(f"/invoices/{invoice['id']}")
+
+    assert sql_trace
+    conn = sqlite3.connect(test_db)
+    try:
+        assert_no_table_scans(conn, sql_trace)
+    finally:
+        conn.close()
+
+
+def test_helper_detects_table_scan(test_db):
+    conn = sqlite3.connect(test_db)
+    try:
+        assert table_scans(conn, "SELECT * FROM invoices WHERE address = 'x'")
+        assert table_scans(conn, "SELECT ii.* FROM invoice_items ii WHERE ii.quantity > 1")
+        assert not table_scans(conn, "SELECT * FROM invoices WHERE id = 1")
+    finally:
+        conn.close()
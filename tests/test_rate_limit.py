@@ -1,8 +1,12 @@
 from fastapi import status
 from fastapi.testclient import TestClient
+import multiprocessing
+import os
 import pytest
+import subprocess
+import sys
 import time
-from app.rate_limiter import limiter
+from app.rate_limiter import SQLiteStorage, limiter, rate_limit_storage
 
 @pytest.fixture(autouse=True)
 def enable_rate_limit():
@@ -56,3 +60,57 @@ def test_rate_limit_create_invoice(client):
     })
     assert res.status_code == status.HTTP_429_TOO_MANY_REQUESTS
 
+
+
+def _hit_shared_limit(path, attempts):
+    """Runs in a separate process, like one uvicorn worker."""
+    from limits import parse
+    from limits.strategies import FixedWindowRateLimiter
+
+    from app.rate_limiter import SQLiteStorage
+
+    strategy = FixedWindowRateLimiter(SQLiteStorage(f"sqlite://{path}"))
+    return sum(strategy.hit(parse("10/minute"), "shared") for _ in range(attempts))
+
+
+def test_sqlite_storage_enforces_one_limit_across_processes(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        allowed = pool.starmap(_hit_shared_limit, [(path, 10)] * 4)
+    # Four workers, 40 attempts, one 10/minute budget
+    assert sum(allowed) == 10
+
+
+def test_sqlite_storage_windows(tmp_path):
+    storage = SQLiteStorage(f"sqlite://{tmp_path / 'ratelimit.db'}")
+    assert [storage.incr("a", 60) for _ in range(3)] == [1, 2, 3]
+    assert storage.get("a") == 3
+    assert storage.get_expiry("a") > time.time() + 50
+
+    # An expired window starts again from the new hit
+    assert storage.incr("b", 0) == 1
+    assert storage.incr("b", 0) == 1
+    assert storage.get("b") == 0
+
+    storage.clear("a")
+    assert storage.get("a") == 0
+    assert storage.reset() == 1
+    assert storage.check()
+
+
+def test_rate_limit_stats(client):
+    assert isinstance(rate_limit_storage, SQLiteStorage)
+    client.get("/invoices?page_size=1")
+    stats = client.get("/health/stats").json()["rate_limit"]
+    assert stats["enabled"] is True
+    assert stats["increments"] >= 1
+
+
+def test_rate_limit_can_be_disabled_from_env():
+    env = {**os.environ, "RATE_LIMIT_ENABLED": "false", "RATE_LIMIT_STORAGE_URI": "memory://"}
+    output = subprocess.run(
+        [sys.executable, "-c", "from app.rate_limiter import limiter; print(limiter.enabled)"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"
@@ -0,0 +1,62 @@
+from fastapi import status
+
+from app.database import db_session
+from app.services import reports
+
+
+def test_revenue_report_tracks_create_status_and_delete(client, create_invoice, sql_trace):
+    create_invoice(issue_date="2040-01-10", due_date="2040-01-10", quantities=[1], tax_amount=1.0)
+    paid = create_invoice(issue_date="2040-01-20", due_date="2040-01-20", quantities=[2])
+    removed = create_invoice(issue_date="2040-02-05", due_date="2040-02-05", quantities=[3])
+    client.patch(f"/invoices/{paid['id']}/status", json={"status": "PAID"})
+    client.delete(f"/invoices/{removed['id']}")
+
+    sql_trace.clear()
+    response = client.get("/reports/revenue?month_from=2040-01&month_to=2040-12")
+    assert response.status_code == status.HTTP_200_OK
+    report = response.json()
+    # Served from the rollup alone
+    assert not any("FROM invoices" in statement for statement in sql_trace)
+
+    assert report["group_by"] == ["client", "month", "status"]
+    assert [(row["month"], row["status"], row["invoice_count"], row["total"]) for row in report["rows"]] == [
+        ("2040-01", "DRAFT", 1, 11.0),
+        ("2040-01", "PAID", 1, 20.0),
+    ]
+    assert report["rows"][0]["client_name"] == "Test Client"
+    assert report["invoice_count"] == 2
+    assert report["total"] == 31.0
+    assert report["tax"] == 1.0
+
+
+def test_revenue_report_grouping_and_filters(client, create_invoice):
+    create_invoice(issue_date="2041-03-01", due_date="2041-03-01", quantities=[1])
+    sent = create_invoice(issue_date="2041-04-01", due_date="2041-04-01", quantities=[2])
+    client.patch(f"/invoices/{sent['id']}/status", json={"status": "SENT"})
+
+    by_status = client.get("/reports/revenue?group_by=status&month_from=2041-01&month_to=2041-12").json()
+    assert [(row["status"], row["total"]) for row in by_status["rows"]] == [("DRAFT", 10.0), ("SENT", 20.0)]
+    assert by_status["rows"][0]["month"] is None
+
+    sent_only = client.get("/reports/revenue?group_by=month&status=SENT&month_from=2041-01&month_to=2041-12").json()
+    assert [(row["month"], row["total"]) for row in sent_only["rows"]] == [("2041-04", 20.0)]
+
+    assert client.get("/reports/revenue?month_from=2041-13").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get("/reports/revenue?group_by=product").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_rollup_check_and_rebuild(client, create_invoice, capsys):
+    create_invoice(issue_date="2042-06-01", due_date="2042-06-01", quantities=[4])
+
+    with db_session() as conn:
+        assert reports.check(conn) == []
+        # Simulate drift, e.g. rows changed while the triggers were missing
+        conn.execute("UPDATE revenue_rollup SET total = total + 5 WHERE month = '2042-06'")
+
+    assert reports.main(["check"]) == 1
+    assert "Mismatch 1/2042-06/DRAFT" in capsys.readouterr().out
+
+    assert reports.main(["rebuild"]) == 0
+    assert "1 buckets had drifted" in capsys.readouterr().out
+    with db_session() as conn:
+        assert reports.check(conn) == []
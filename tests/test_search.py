@@ -0,0 +1,155 @@
+import pytest
+from fastapi import status
+
+from app.database import db_session
+from app.services import search_index
+
+
+@pytest.fixture
+def make_catalog(test_db):
+    """Insert a client and two products; callers pick names no other test uses."""
+    def make(client_name, product_word):
+        with db_session() as conn:
+            client_id = conn.execute(
+                "INSERT INTO clients (name, address, company_reg_no) VALUES (?, '9 Quay Rd', 'REG-SEARCH')",
+                (client_name,)
+            ).lastrowid
+            widget_id = conn.execute(
+                "INSERT INTO products (name, price) VALUES (?, 5.0)", (f"{product_word} Widget",)
+            ).lastrowid
+            gadget_id = conn.execute(
+                "INSERT INTO products (name, price) VALUES (?, 7.0)", (f"{product_word} Gadget",)
+            ).lastrowid
+        return client_id, widget_id, gadget_id
+    return make
+
+
+def _search(client, q, **params):
+    response = client.get("/invoices/search", params={"q": q, **params})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()
+
+
+def test_search_matches_invoice_number_client_and_products(client, create_invoice, make_catalog):
+    client_id, widget_id, gadget_id = make_catalog("Zephyrine Logistics", "Quokka")
+    both = create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=client_id,
+                          product_ids=[widget_id, gadget_id])
+    widget_only = create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=client_id,
+                                 product_ids=[widget_id])
+    other_client = create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=1,
+                                  product_ids=[gadget_id])
+
+    # The invoice number without its prefix
+    fragment = both["invoice_no"][len("INV-"):]
+    assert both["id"] in [item["id"] for item in _search(client, fragment)["items"]]
+
+    by_client = _search(client, "zephyrine")
+    assert sorted(item["id"] for item in by_client["items"]) == sorted([both["id"], widget_only["id"]])
+    assert by_client["total"] == 2
+
+    # Every term is required, across columns
+    assert [item["id"] for item in _search(client, "Zephyrine gadget")["items"]] == [both["id"]]
+    assert sorted(item["id"] for item in _search(client, "quokka gadg")["items"]) == sorted(
+        [both["id"], other_client["id"]]
+    )
+
+    # Results are fully hydrated invoices
+    result = _search(client, "Zephyrine gadget")["items"][0]
+    assert result["client"]["name"] == "Zephyrine Logistics"
+    assert {item["product"]["name"] for item in result["items"]} == {"Quokka Widget", "Quokka Gadget"}
+
+
+def test_search_pages_by_rank(client, create_invoice, make_catalog):
+    client_id, widget_id, _ = make_catalog("Marigold Shipping", "Pangolin")
+    created = [create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=client_id,
+                              product_ids=[widget_id])["id"] for _ in range(3)]
+
+    first = _search(client, "marigold", page_size=2)
+    second = _search(client, "marigold", page_size=2, page=2)
+    assert first["total"] == 3 and first["total_pages"] == 2
+    assert first["next_cursor"] is None
+    assert sorted(item["id"] for item in first["items"] + second["items"]) == sorted(created)
+
+    newest = _search(client, "marigold", sort="newest")
+    assert [item["id"] for item in newest["items"]] == sorted(created, reverse=True)
+
+    uncounted = _search(client, "marigold", page_size=2, with_total=False)
+    assert uncounted["total"] is None
+    assert [item["id"] for item in uncounted["items"]] == [item["id"] for item in first["items"]]
+
+
+def test_batch_created_invoices_are_indexed_once(client, make_catalog, sql_trace):
+    client_id, widget_id, gadget_id = make_catalog("Vermilion Carriers", "Axolotl")
+    response = client.post("/invoices/batch", json={"invoices": [
+        {"client_id": client_id, "issue_date": "2029-02-01", "due_date": "2029-03-01",
+         "items": [{"product_id": widget_id, "quantity": 1}, {"product_id": gadget_id, "quantity": 2}]}
+        for _ in range(3)
+    ]})
+    created = [result["id"] for result in response.json()["results"]]
+
+    # FTS5 stores one docsize row per document it writes: one per invoice, not
+    # one more per item
+    writes = [sql for sql in sql_trace if "'invoice_search_docsize' VALUES" in sql]
+    assert len(writes) == len(created)
+    found = _search(client, "vermilion widget gadget")
+    assert sorted(item["id"] for item in found["items"]) == sorted(created)
+
+
+def test_search_index_follows_renames_and_deletes(client, create_invoice, make_catalog):
+    client_id, widget_id, _ = make_catalog("Cerulean Haulage", "Ocelot")
+    invoice = create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=client_id,
+                             product_ids=[widget_id])
+
+    with db_session() as conn:
+        conn.execute("UPDATE clients SET name = 'Xanthous Freight' WHERE id = ?", (client_id,))
+        conn.execute("UPDATE products SET name = 'Wombat Widget' WHERE id = ?", (widget_id,))
+
+    assert _search(client, "cerulean")["total"] == 0
+    assert [item["id"] for item in _search(client, "xanthous wombat")["items"]] == [invoice["id"]]
+
+    client.delete(f"/invoices/{invoice['id']}")
+    assert _search(client, "xanthous")["total"] == 0
+    with db_session() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM invoice_search WHERE rowid = ?", (invoice["id"],)).fetchone()[0] == 0
+
+
+def test_search_rejects_short_terms_and_treats_input_literally(client):
+    response = client.get("/invoices/search", params={"q": "ab c"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # FTS5 syntax in the query is not interpreted
+    assert _search(client, 'NEAR("zzq" OR *) qqqzzz')["total"] == 0
+
+
+def test_deleting_an_invoice_skips_recomputing_its_product_names(client, create_invoice, make_catalog, sql_trace):
+    client_id, widget_id, gadget_id = make_catalog("Saffron Couriers", "Tapir")
+    invoice = create_invoice(issue_date="2029-01-01", due_date="2029-01-31", client_id=client_id,
+                             product_ids=[widget_id, gadget_id, widget_id])
+
+    sql_trace.clear()
+    client.delete(f"/invoices/{invoice['id']}")
+    # Removing the FTS row deletes its docsize row; a per-item recompute would
+    # write a new one for every deleted item
+    assert not [sql for sql in sql_trace if "'invoice_search_docsize' VALUES" in sql]
+    assert _search(client, "saffron")["total"] == 0
+
+
+def test_backfill_indexes_invoices_inserted_outside_the_api(client, make_catalog, capsys):
+    client_id, widget_id, _ = make_catalog("Heliotrope Transit", "Narwhal")
+    with db_session() as conn:
+        invoice_id = conn.execute("""
+            INSERT INTO invoices (invoice_no, issue_date, due_date, client_id, address, tax, total)
+            VALUES ('INV-2019-900001', '2019-11-01', '2019-11-30', ?, '9 Quay Rd', 0, 5)
+        """, (client_id,)).lastrowid
+        conn.execute(
+            "INSERT INTO invoice_items (invoice_id, product_id, quantity, unit_price, line_total) "
+            "VALUES (?, ?, 1, 5, 5)", (invoice_id, widget_id)
+        )
+    assert _search(client, "heliotrope")["total"] == 0
+
+    assert search_index.main(["check"]) == 1
+    assert "Not indexed: 1 invoices" in capsys.readouterr().out
+
+    assert search_index.main(["backfill"]) == 0
+    assert "Indexed 1 invoices" in capsys.readouterr().out
+    assert [item["id"] for item in _search(client, "heliotrope narwhal")["items"]] == [invoice_id]
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date
+
+import httpx
+import pytest
+
+import serve
+from app.database import ConnectionPool
+from app.routes.invoices import _insert_invoices
+from app.schemas import InvoiceCreate, InvoiceItemCreate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def db_copy(test_db, tmp_path):
+    """A private copy of the migrated test database."""
+    path = str(tmp_path / "serve.db")
+    source, target = sqlite3.connect(test_db), sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return path
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _write_invoices(path, count):
+    """Runs in a separate process, like one uvicorn worker; one transaction per invoice."""
+    pool = ConnectionPool(path, max_size=1)
+    try:
+        for n in range(count):
+            with pool.connection() as conn:
+                _insert_invoices(conn, [InvoiceCreate(
+                    client_id=1,
+                    issue_date=date(2027, 1, 1),
+                    due_date=date(2027, 1, 31),
+                    items=[InvoiceItemCreate(product_id=1, quantity=n % 3 + 1)]
+                )])
+                conn.commit()
+    finally:
+        pool.close()
+    return count
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.setattr(serve, "available_cores", lambda: 6)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert serve.default_workers() == 6
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert serve.default_workers() == 3
+
+
+def test_main_migrates_once_before_starting_workers(monkeypatch, test_db):
+    calls = []
+    monkeypatch.setattr(serve, "run_migrations", lambda action: calls.append(("migrate", action)))
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: calls.append(("run", app, kwargs)))
+    monkeypatch.setenv("PDF_RENDER_WORKERS", "0")
+
+    serve.main(["--workers", "3", "--port", "9001"])
+    assert calls == [
+        ("migrate", "upgrade"),
+        ("run", "app.main:app", {"host": "0.0.0.0", "port": 9001, "workers": 3}),
+    ]
+
+    calls.clear()
+    serve.main(["--workers", "2", "--no-migrate"])
+    assert [call[0] for call in calls] == ["run"]
+
+
+def test_worker_processes_write_without_lock_errors(db_copy):
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        written = pool.starmap(_write_invoices, [(db_copy, 25)] * 4)
+    assert written == [25] * 4
+
+    conn = sqlite3.connect(db_copy)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM invoices WHERE issue_date = '2027-01-01'").fetchone()[0] == 100
+    finally:
+        conn.close()
+
+
+def test_serve_runs_multiple_workers(db_copy, tmp_path):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_PATH": db_copy,
+        "RATE_LIMIT_STORAGE_URI": "sqlite://" + str(tmp_path / "ratelimit.db"),
+        "PDF_RENDER_WORKERS": "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", "2", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health/stats", timeout=1)
+                break
+            except httpx.TransportError:
+                assert process.poll() is None, process.stdout.read()
+                assert time.monotonic() < deadline, "server did not start"
+                time.sleep(0.2)
+        assert response.status_code == 200
+        assert response.json()["db_pool"]["opened"] == response.json()["db_pool"]["max_size"]
+    finally:
+        process.terminate()
+        output, _ = process.communicate(timeout=15)
+
+    # Migrations ran in the parent only, not once per worker
+    assert output.count("Migration 011_create_invoice_search already applied") == 1